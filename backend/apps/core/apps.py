@@ -14,5 +14,12 @@ class CoreConfig(AppConfig):
         """
         Código executado quando o app está pronto
         """
-        pass
+        from django.db.models.signals import post_migrate
+        from .readiness import migration_readiness
+        
+        # Migrações aplicadas neste processo invalidam o estado de readiness
+        post_migrate.connect(
+            migration_readiness.invalidate,
+            dispatch_uid='core.readiness.invalidate',
+        )
 
@@ -0,0 +1,182 @@
+"""
+Circuit breaker de saúde do banco de dados, compartilhado pelo processo
+Substitui o SELECT 1 por requisição: falhas reais de queries e de abertura
+de conexão atualizam o estado passivamente e, com o circuito aberto, no máximo um probe em
+background por intervalo verifica a recuperação do banco.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections, DatabaseError, InterfaceError, OperationalError
+
+logger = logging.getLogger(__name__)
+
+# Erros que indicam banco indisponível (não erros de dados como IntegrityError)
+CONNECTION_ERRORS = (OperationalError, InterfaceError)
+
+DEFAULTS = {
+    # Falhas consecutivas para abrir o circuito
+    'FAILURE_THRESHOLD': 3,
+    # Sucessos consecutivos em half-open para fechar o circuito
+    'SUCCESS_THRESHOLD': 2,
+    # Intervalo mínimo (s) entre probes em background com o circuito aberto
+    'PROBE_INTERVAL': 5.0,
+}
+
+
+class CircuitBreaker:
+    """
+    Estados:
+    - closed: requisições passam; falhas de conexão consecutivas são contadas
+    - open: requisições são recusadas imediatamente; probes em background
+    - half_open: requisições passam como teste; sucessos fecham, falha reabre
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, alias='default', failure_threshold=3, success_threshold=2,
+                 probe_interval=5.0):
+        self.alias = alias
+        self.failure_threshold = failure_threshold
+        self.success_threshold = success_threshold
+        self.probe_interval = probe_interval
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Voltar ao estado inicial (fechado)"""
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.successes = 0
+            self.opened_at = None
+            self.last_probe_at = 0.0
+            self._probe_running = False
+
+    def allow_request(self):
+        """Indica se a requisição pode seguir para o banco"""
+        if self.state != self.OPEN:
+            return True
+        self._maybe_probe()
+        return False
+
+    def record_success(self):
+        if self.state == self.CLOSED and not self.failures:
+            return  # caminho quente sem lock
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.successes += 1
+                if self.successes >= self.success_threshold:
+                    self._transition(self.CLOSED)
+            elif self.state == self.CLOSED:
+                self.failures = 0
+
+    def record_failure(self, error=None):
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._transition(self.OPEN)
+            elif self.state == self.CLOSED:
+                self.failures += 1
+                if self.failures >= self.failure_threshold:
+                    self._transition(self.OPEN)
+        if error is not None:
+            logger.warning(f"Database failure recorded by circuit breaker: {error}")
+
+    def observe(self, execute, sql, params, many, context):
+        """
+        execute_wrapper do Django: registra o resultado de cada query real
+        Apenas erros de conexão contam como falha
+        """
+        try:
+            result = execute(sql, params, many, context)
+        except CONNECTION_ERRORS as e:
+            self.record_failure(e)
+            raise
+        except DatabaseError:
+            # Erro de dados/SQL: o banco respondeu
+            self.record_success()
+            raise
+        self.record_success()
+        return result
+
+    @contextmanager
+    def watch_connection(self, connection):
+        """
+        Registrar também falhas ao abrir a conexão
+        Com o banco recusando conexões, connection.cursor() falha em
+        ensure_connection(), antes de qualquer execute_wrapper rodar.
+        """
+        previous = connection.__dict__.get('ensure_connection')
+        ensure_connection = connection.ensure_connection
+
+        def guarded_ensure_connection():
+            try:
+                ensure_connection()
+            except CONNECTION_ERRORS as e:
+                self.record_failure(e)
+                raise
+
+        connection.ensure_connection = guarded_ensure_connection
+        try:
+            yield
+        finally:
+            if previous is None:
+                del connection.ensure_connection
+            else:
+                connection.ensure_connection = previous
+
+    def _transition(self, state):
+        """Trocar de estado (chamado com o lock adquirido)"""
+        if state != self.state:
+            logger.warning(f"Database circuit breaker: {self.state} -> {state}")
+        self.state = state
+        self.failures = 0
+        self.successes = 0
+        self.opened_at = time.monotonic() if state == self.OPEN else None
+
+    def _maybe_probe(self):
+        """Disparar no máximo um probe em background por intervalo"""
+        now = time.monotonic()
+        with self._lock:
+            if self._probe_running or now - self.last_probe_at < self.probe_interval:
+                return
+            self._probe_running = True
+            self.last_probe_at = now
+        threading.Thread(target=self._probe, name='db-circuit-probe', daemon=True).start()
+
+    def _probe(self):
+        """Probe em thread própria (conexão própria, fechada ao final)"""
+        connection = connections[self.alias]
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except Exception as e:
+            logger.warning(f"Database circuit probe failed: {e}")
+            with self._lock:
+                self.opened_at = time.monotonic()
+        else:
+            with self._lock:
+                if self.state == self.OPEN:
+                    self._transition(self.HALF_OPEN)
+        finally:
+            connection.close()
+            with self._lock:
+                self._probe_running = False
+
+
+def _build_breaker():
+    config = {**DEFAULTS, **getattr(settings, 'DATABASE_CIRCUIT_BREAKER', {})}
+    return CircuitBreaker(
+        failure_threshold=config['FAILURE_THRESHOLD'],
+        success_threshold=config['SUCCESS_THRESHOLD'],
+        probe_interval=config['PROBE_INTERVAL'],
+    )
+
+
+database_breaker = _build_breaker()
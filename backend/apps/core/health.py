@@ -0,0 +1,173 @@
+"""
+Health check detalhado com probes concorrentes e resultado cacheado
+Cada dependência (banco, cache, Celery) é verificada em paralelo com timeout
+rígido; o relatório agregado fica em memória do processo por HEALTH_CHECK
+['CACHE_TTL'] segundos e é renovado em background (stale-while-revalidate),
+então o endpoint responde sem I/O e nunca empilha inspeções lentas do Celery.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from .circuit_breaker import database_breaker, CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    # Validade (s) do relatório agregado antes de renovar em background
+    'CACHE_TTL': 10.0,
+    # Timeout rígido (s) de cada probe
+    'PROBE_TIMEOUT': 2.0,
+}
+
+
+class ProbeFailure(Exception):
+    """Dependência respondeu, mas não está saudável"""
+
+
+def check_database():
+    """Banco: respeita o circuit breaker antes de abrir conexão"""
+    if database_breaker.state == CircuitBreaker.OPEN:
+        raise ProbeFailure('circuit open')
+    connection = connections['default']
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    finally:
+        # Threads do pool não passam pelo ciclo de request do Django
+        connection.close()
+
+
+def check_cache():
+    """Cache (Redis): escrita e leitura de uma chave"""
+    cache.set('health_check', 'ok', 30)
+    if cache.get('health_check') != 'ok':
+        raise ProbeFailure('cache test failed')
+
+
+def check_celery(timeout):
+    """Celery: broadcast de stats limitado ao timeout do probe"""
+    if not hasattr(settings, 'CELERY_BROKER_URL'):
+        return
+    from celery import current_app as celery_app
+
+    stats = celery_app.control.inspect(timeout=timeout).stats()
+    if not stats:
+        raise ProbeFailure('no workers')
+
+
+class HealthMonitor:
+    """Executa os probes e mantém o último relatório agregado"""
+
+    def __init__(self, cache_ttl=10.0, probe_timeout=2.0):
+        self.cache_ttl = cache_ttl
+        self.probe_timeout = probe_timeout
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='health-probe')
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._report = None
+        self._checked_at = 0.0
+        self._refreshing = False
+
+    @property
+    def probes(self):
+        # Celery não derruba o status geral em desenvolvimento
+        return {
+            'database': (check_database, (), True),
+            'cache': (check_cache, (), True),
+            'celery': (check_celery, (self.probe_timeout,), not settings.DEBUG),
+        }
+
+    def get_report(self):
+        """Relatório atual; renova em background quando expirado"""
+        report = self._report
+        if report is None:
+            return self.refresh()
+
+        if time.monotonic() - self._checked_at >= self.cache_ttl:
+            self._refresh_in_background()
+
+        return report
+
+    def refresh(self):
+        """Executar todos os probes em paralelo (limitado ao timeout)"""
+        with self._refresh_lock:
+            # Outra thread pode ter renovado enquanto esperávamos
+            if self._report is not None and time.monotonic() - self._checked_at < self.cache_ttl:
+                return self._report
+
+            report = self._run_probes()
+            with self._lock:
+                self._report = report
+                self._checked_at = time.monotonic()
+            return report
+
+    def invalidate(self):
+        with self._lock:
+            self._report = None
+            self._checked_at = 0.0
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._background_refresh, name='health-refresh', daemon=True).start()
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.error(f"Health check refresh failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _run_probes(self):
+        started = time.monotonic()
+        futures = {
+            name: (self._executor.submit(probe, *args), critical)
+            for name, (probe, args, critical) in self.probes.items()
+        }
+        deadline = started + self.probe_timeout
+
+        health_status = {
+            'status': 'healthy',
+            'timestamp': time.time(),
+            'services': {}
+        }
+        overall_status = True
+
+        for name, (future, critical) in futures.items():
+            try:
+                future.result(timeout=max(0.0, deadline - time.monotonic()))
+                health_status['services'][name] = 'healthy'
+            except FutureTimeoutError:
+                health_status['services'][name] = f'unhealthy: timeout after {self.probe_timeout}s'
+                overall_status = overall_status and not critical
+            except Exception as e:
+                health_status['services'][name] = f'unhealthy: {str(e)}'
+                overall_status = overall_status and not critical
+
+        if not overall_status:
+            health_status['status'] = 'unhealthy'
+
+        health_status['duration'] = round(time.monotonic() - started, 3)
+        return health_status
+
+
+def _build_monitor():
+    config = {**DEFAULTS, **getattr(settings, 'HEALTH_CHECK', {})}
+    return HealthMonitor(
+        cache_ttl=config['CACHE_TTL'],
+        probe_timeout=config['PROBE_TIMEOUT'],
+    )
+
+
+health_monitor = _build_monitor()
@@ -0,0 +1,169 @@
+"""
+Métricas de requisições em memória do processo, no formato texto do Prometheus
+Agrega por rota resolvida (view_name, não o path bruto): histograma de
+latência, queries e tempo de banco, acertos/erros de cache e bytes de resposta.
+Cada worker do gunicorn mantém o próprio registro; o Prometheus agrega as
+séries por instância.
+"""
+
+import bisect
+import threading
+import time
+from collections import defaultdict
+
+# Limites (s) do histograma de latência
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Rótulo `method`: conjunto fixo, para que métodos arbitrários do cliente não
+# criem séries novas; os demais entram como 'other'
+HTTP_METHODS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'})
+
+_local = threading.local()
+
+
+class RequestStats:
+    """Contadores de uma requisição (vivem no thread local durante o request)"""
+
+    __slots__ = ('db_queries', 'db_time', 'cache_hits', 'cache_misses')
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """execute_wrapper do Django: conta queries e tempo de banco"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_queries += 1
+            self.db_time += time.perf_counter() - started
+
+
+def start_request_stats():
+    _local.stats = RequestStats()
+    return _local.stats
+
+
+def finish_request_stats():
+    stats = getattr(_local, 'stats', None)
+    _local.stats = None
+    return stats
+
+
+def record_cache_access(hit):
+    """
+    Registrar leitura de cache da aplicação na requisição corrente
+    Chamado pelos caminhos que leem do cache (ex.: resumo PEP)
+    """
+    stats = getattr(_local, 'stats', None)
+    if stats is None:
+        return
+    if hit:
+        stats.cache_hits += 1
+    else:
+        stats.cache_misses += 1
+
+
+class _RouteMetrics:
+    __slots__ = (
+        'buckets', 'count', 'duration_sum', 'db_queries', 'db_time',
+        'cache_hits', 'cache_misses', 'response_bytes',
+    )
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.duration_sum = 0.0
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.response_bytes = 0
+
+
+class MetricsRegistry:
+    """Registro thread-safe das métricas por (rota, método, classe de status)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = defaultdict(_RouteMetrics)
+
+    def observe(self, route, method, status_code, duration, stats=None, response_bytes=0):
+        if method not in HTTP_METHODS:
+            method = 'other'
+        key = (route, method, f'{status_code // 100}xx')
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, duration)
+        with self._lock:
+            metrics = self._routes[key]
+            metrics.buckets[bucket] += 1
+            metrics.count += 1
+            metrics.duration_sum += duration
+            metrics.response_bytes += response_bytes
+            if stats is not None:
+                metrics.db_queries += stats.db_queries
+                metrics.db_time += stats.db_time
+                metrics.cache_hits += stats.cache_hits
+                metrics.cache_misses += stats.cache_misses
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+    def render(self):
+        """Exposição no formato texto do Prometheus (version 0.0.4)"""
+        with self._lock:
+            snapshot = sorted(
+                (key, _copy(metrics)) for key, metrics in self._routes.items()
+            )
+
+        lines = [
+            '# HELP http_request_duration_seconds Request latency by resolved route.',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        for key, metrics in snapshot:
+            labels = _labels(key)
+            cumulative = 0
+            for limit, count in zip(LATENCY_BUCKETS, metrics.buckets):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{limit}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {metrics.count}')
+            lines.append(f'http_request_duration_seconds_sum{{{labels}}} {metrics.duration_sum:.6f}')
+            lines.append(f'http_request_duration_seconds_count{{{labels}}} {metrics.count}')
+
+        counters = [
+            ('http_request_db_queries_total', 'Database queries executed by route.', 'db_queries', '{}'),
+            ('http_request_db_duration_seconds_total', 'Time spent in database queries by route.', 'db_time', '{:.6f}'),
+            ('http_request_cache_hits_total', 'Application cache hits by route.', 'cache_hits', '{}'),
+            ('http_request_cache_misses_total', 'Application cache misses by route.', 'cache_misses', '{}'),
+            ('http_response_size_bytes_total', 'Response body bytes by route.', 'response_bytes', '{}'),
+        ]
+        for name, help_text, attr, fmt in counters:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for key, metrics in snapshot:
+                lines.append(f'{name}{{{_labels(key)}}} {fmt.format(getattr(metrics, attr))}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _copy(metrics):
+    copy = _RouteMetrics()
+    for attr in _RouteMetrics.__slots__:
+        value = getattr(metrics, attr)
+        setattr(copy, attr, list(value) if isinstance(value, list) else value)
+    return copy
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(key):
+    route, method, status = key
+    return f'route="{_escape(route)}",method="{_escape(method)}",status="{status}"'
+
+
+registry = MetricsRegistry()
@@ -4,6 +4,7 @@ Inclui correções para problemas identificados no relatório
 """
 
 import logging
+import random
 import time
 from django.http import JsonResponse
 from django.conf import settings
@@ -12,6 +13,9 @@ from django.core.exceptions import ValidationError
 from django.db import connection
 from django.utils.translation import gettext as _
 
+from . import metrics
+from .circuit_breaker import database_breaker
+
 logger = logging.getLogger(__name__)
 
 
@@ -88,33 +92,74 @@ class ErrorHandlingMiddleware(MiddlewareMixin):
         return None
 
 
-class RequestLoggingMiddleware(MiddlewareMixin):
+class RequestMetricsMiddleware(MiddlewareMixin):
     """
-    Middleware para logging de requisições
-    Útil para debugging e monitoramento
+    Middleware de métricas de requisições
+    Registra por rota resolvida latência, queries/tempo de banco, acessos
+    de cache e tamanho da resposta (expostos em /metrics/). Linhas INFO
+    são amostradas (REQUEST_METRICS['LOG_SAMPLE_RATE']); requisições lentas
+    são sempre registradas em WARNING.
     """
     
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+        config = getattr(settings, 'REQUEST_METRICS', {})
+        self.sample_rate = config.get('LOG_SAMPLE_RATE', 0.01)
+        self.slow_threshold = config.get('SLOW_REQUEST_THRESHOLD', 2.0)
+    
+    def __call__(self, request):
+        """Contar as queries executadas durante a requisição"""
+        request.request_stats = metrics.start_request_stats()
+        try:
+            with connection.execute_wrapper(request.request_stats):
+                return super().__call__(request)
+        finally:
+            metrics.finish_request_stats()
+    
     def process_request(self, request):
         """Iniciar timing da requisição"""
-        request.start_time = time.time()
-        
-        # Log de requisições importantes
-        if request.path.startswith('/api/'):
-            logger.info(f"API Request: {request.method} {request.path} from {request.META.get('REMOTE_ADDR')}")
-        
+        request.start_time = time.perf_counter()
         return None
     
     def process_response(self, request, response):
-        """Finalizar timing e log da resposta"""
-        if hasattr(request, 'start_time'):
-            duration = time.time() - request.start_time
-            
-            # Log de requisições lentas
-            if duration > 2.0:  # Mais de 2 segundos
-                logger.warning(f"Slow request: {request.method} {request.path} took {duration:.2f}s")
-            
-            # Adicionar header de timing
-            response['X-Response-Time'] = f"{duration:.3f}s"
+        """Finalizar timing e registrar métricas da resposta"""
+        if not hasattr(request, 'start_time'):
+            return response
+        
+        duration = time.perf_counter() - request.start_time
+        stats = getattr(request, 'request_stats', None)
+        
+        resolver_match = getattr(request, 'resolver_match', None)
+        route = resolver_match.view_name if resolver_match else 'unresolved'
+        
+        if response.streaming:
+            response_bytes = int(response.get('Content-Length') or 0)
+        else:
+            response_bytes = len(response.content)
+        
+        metrics.registry.observe(
+            route, request.method, response.status_code, duration,
+            stats=stats, response_bytes=response_bytes,
+        )
+        
+        if duration > self.slow_threshold:
+            logger.warning(
+                "Slow request: method=%s route=%s status=%s duration_ms=%.1f db_queries=%s db_ms=%.1f",
+                request.method, route, response.status_code, duration * 1000,
+                stats.db_queries if stats else 0, stats.db_time * 1000 if stats else 0,
+            )
+        elif self.sample_rate and random.random() < self.sample_rate:
+            logger.info(
+                "Request: method=%s route=%s status=%s duration_ms=%.1f db_queries=%s db_ms=%.1f "
+                "cache_hits=%s cache_misses=%s bytes=%s",
+                request.method, route, response.status_code, duration * 1000,
+                stats.db_queries if stats else 0, stats.db_time * 1000 if stats else 0,
+                stats.cache_hits if stats else 0, stats.cache_misses if stats else 0,
+                response_bytes,
+            )
+        
+        # Adicionar header de timing
+        response['X-Response-Time'] = f"{duration:.3f}s"
         
         return response
 
@@ -193,25 +238,29 @@ class SecurityHeadersMiddleware(MiddlewareMixin):
 class DatabaseHealthMiddleware(MiddlewareMixin):
     """
     Middleware para monitorar saúde do banco de dados
+    Usa o circuit breaker do processo em vez de um SELECT 1 por requisição:
+    com o circuito fechado não adiciona queries; aberto, responde 503 na hora
     """
     
+    critical_paths = ['/api/v1/kyc/', '/api/v1/screening/', '/admin/']
+    
+    def __call__(self, request):
+        """Observar passivamente as conexões e queries reais da requisição"""
+        with database_breaker.watch_connection(connection):
+            with connection.execute_wrapper(database_breaker.observe):
+                return super().__call__(request)
+    
     def process_request(self, request):
-        """Verificar conexão com banco antes de processar requisição crítica"""
-        
-        # Verificar apenas para endpoints críticos
-        critical_paths = ['/api/v1/kyc/', '/api/v1/screening/', '/admin/']
-        
-        if any(request.path.startswith(path) for path in critical_paths):
-            try:
-                # Teste simples de conexão
-                with connection.cursor() as cursor:
-                    cursor.execute("SELECT 1")
-            except Exception as e:
-                logger.error(f"Database connection failed: {str(e)}")
-                return JsonResponse({
+        """Recusar requisições críticas enquanto o circuito estiver aberto"""
+        
+        if any(request.path.startswith(path) for path in self.critical_paths):
+            if not database_breaker.allow_request():
+                logger.error("Database circuit open: rejecting request")
+                response = JsonResponse({
                     'error': 'Database unavailable',
                     'message': _('Service temporarily unavailable. Please try again.')
                 }, status=503)
+                response['Retry-After'] = str(int(database_breaker.probe_interval))
+                return response
         
         return None
-
@@ -0,0 +1,98 @@
+"""
+Estado de prontidão (readiness) do processo, calculado fora do request
+Montar o grafo de migrações carrega todos os módulos de migração e consulta
+django_migrations; isso é feito uma vez no startup (config.wsgi) e de novo
+apenas quando sinalizado (post_migrate) ou, enquanto houver migrações
+pendentes, no máximo a cada READINESS_RECHECK_INTERVAL segundos para
+detectar o `migrate` de um release concorrente.
+"""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class MigrationReadiness:
+    """Resultado memoizado da verificação de migrações pendentes"""
+
+    def __init__(self, alias='default', recheck_interval=5.0):
+        self.alias = alias
+        self.recheck_interval = recheck_interval
+        self._lock = threading.Lock()
+        self._result = None
+        self._checked_at = 0.0
+
+    def get(self):
+        """Resultado atual; só recalcula se inválido ou ainda não pronto"""
+        result = self._result
+        if self._is_stale(result):
+            with self._lock:
+                # Outra thread pode ter recalculado enquanto esperávamos
+                result = self._result
+                if self._is_stale(result):
+                    result = self._store(self._compute())
+        return result
+
+    def refresh(self):
+        """Recalcular o plano de migrações (operação cara)"""
+        with self._lock:
+            return self._store(self._compute())
+
+    def invalidate(self, **kwargs):
+        """Receiver de post_migrate: força recálculo na próxima consulta"""
+        with self._lock:
+            self._result = None
+
+    def _is_stale(self, result):
+        if result is None:
+            return True
+        return (
+            not result['ready']
+            and time.monotonic() - self._checked_at >= self.recheck_interval
+        )
+
+    def _store(self, result):
+        self._result = result
+        self._checked_at = time.monotonic()
+        return result
+
+    def _compute(self):
+        from django.db.migrations.executor import MigrationExecutor
+
+        try:
+            executor = MigrationExecutor(connections[self.alias])
+            plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+        except Exception as e:
+            logger.error(f"Readiness check failed: {e}")
+            return {'ready': False, 'reason': str(e), 'checked_at': time.time()}
+
+        if plan:
+            return {
+                'ready': False,
+                'reason': 'pending_migrations',
+                'pending_migrations': len(plan),
+                'checked_at': time.time(),
+            }
+        return {'ready': True, 'checked_at': time.time()}
+
+
+def warm_up():
+    """
+    Calcular a prontidão no startup do servidor
+    Com `gunicorn --preload` roda uma vez no master e os workers herdam o
+    resultado; a conexão é fechada para não ser compartilhada após o fork.
+    """
+    try:
+        migration_readiness.refresh()
+    finally:
+        connections.close_all()
+
+
+migration_readiness = MigrationReadiness(
+    recheck_interval=getattr(settings, 'READINESS_RECHECK_INTERVAL', 5.0),
+)
@@ -0,0 +1,195 @@
+"""
+Testes para middlewares do app core
+"""
+
+import pytest
+from django.db import OperationalError, IntegrityError, connection, connections
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from apps.core import metrics
+from apps.core.circuit_breaker import CircuitBreaker, database_breaker
+from apps.core.middleware import DatabaseHealthMiddleware, RequestMetricsMiddleware
+
+
+def _failing_execute(error):
+    def execute(sql, params, many, context):
+        raise error
+    return execute
+
+
+def _ok_execute(sql, params, many, context):
+    return None
+
+
+@pytest.fixture
+def unreachable_connection(tmp_path):
+    """Alias real de banco que recusa conexões (arquivo SQLite em diretório inexistente)"""
+    settings_dict = {**connections['default'].settings_dict, 'NAME': str(tmp_path / 'missing' / 'db.sqlite3')}
+    unreachable = DatabaseWrapper(settings_dict, alias='unreachable')
+    yield unreachable
+    unreachable.close()
+
+
+@pytest.mark.unit
+@pytest.mark.middleware
+class TestCircuitBreaker:
+    """Testes para o circuit breaker do banco"""
+    
+    def test_opens_after_consecutive_connection_failures(self):
+        breaker = CircuitBreaker(failure_threshold=2, probe_interval=3600)
+        
+        for _ in range(2):
+            with pytest.raises(OperationalError):
+                breaker.observe(_failing_execute(OperationalError('down')), 'SELECT 1', None, False, {})
+        
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.allow_request() is False
+    
+    @pytest.mark.django_db
+    def test_connection_setup_failure_counts(self, unreachable_connection):
+        breaker = CircuitBreaker(failure_threshold=2, probe_interval=3600)
+        
+        with breaker.watch_connection(unreachable_connection):
+            for _ in range(2):
+                with pytest.raises(OperationalError):
+                    unreachable_connection.cursor()
+        
+        assert breaker.state == CircuitBreaker.OPEN
+    
+    def test_data_errors_do_not_count_as_failures(self):
+        breaker = CircuitBreaker(failure_threshold=1)
+        
+        with pytest.raises(IntegrityError):
+            breaker.observe(_failing_execute(IntegrityError('dup')), 'INSERT', None, False, {})
+        
+        assert breaker.state == CircuitBreaker.CLOSED
+    
+    def test_half_open_closes_after_successes(self):
+        breaker = CircuitBreaker(failure_threshold=1, success_threshold=2)
+        breaker.record_failure()
+        breaker.state = CircuitBreaker.HALF_OPEN
+        
+        breaker.observe(_ok_execute, 'SELECT 1', None, False, {})
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        breaker.observe(_ok_execute, 'SELECT 1', None, False, {})
+        assert breaker.state == CircuitBreaker.CLOSED
+    
+    def test_half_open_failure_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=1)
+        breaker.state = CircuitBreaker.HALF_OPEN
+        
+        breaker.record_failure()
+        
+        assert breaker.state == CircuitBreaker.OPEN
+
+
+@pytest.mark.django_db
+@pytest.mark.middleware
+class TestDatabaseHealthMiddleware:
+    """Testes para DatabaseHealthMiddleware"""
+    
+    @pytest.fixture(autouse=True)
+    def reset_breaker(self):
+        database_breaker.reset()
+        yield
+        database_breaker.reset()
+    
+    def test_closed_circuit_adds_no_queries(self):
+        middleware = DatabaseHealthMiddleware(lambda request: HttpResponse('ok'))
+        request = RequestFactory().get('/api/v1/kyc/profiles/')
+        
+        with CaptureQueriesContext(connection) as context:
+            response = middleware(request)
+        
+        assert response.status_code == 200
+        assert len(context.captured_queries) == 0
+    
+    def test_open_circuit_rejects_critical_paths(self, monkeypatch):
+        monkeypatch.setattr(database_breaker, 'probe_interval', 3600)
+        monkeypatch.setattr(database_breaker, 'last_probe_at', float('inf'))
+        database_breaker.state = CircuitBreaker.OPEN
+        middleware = DatabaseHealthMiddleware(lambda request: HttpResponse('ok'))
+        
+        response = middleware(RequestFactory().get('/api/v1/kyc/profiles/'))
+        assert response.status_code == 503
+        
+        response = middleware(RequestFactory().get('/healthz/'))
+        assert response.status_code == 200
+    
+    def test_connection_failures_open_circuit(self, monkeypatch, unreachable_connection):
+        """Falhas em ensure_connection (banco fora) abrem o circuito, sem query executada"""
+        monkeypatch.setattr(database_breaker, 'failure_threshold', 1)
+        monkeypatch.setattr(database_breaker, 'probe_interval', 3600)
+        monkeypatch.setattr(database_breaker, 'last_probe_at', float('inf'))
+        monkeypatch.setattr('apps.core.middleware.connection', unreachable_connection)
+        
+        def view(request):
+            try:
+                unreachable_connection.cursor()
+            except OperationalError:
+                return HttpResponse(status=500)
+            return HttpResponse('ok')
+        
+        middleware = DatabaseHealthMiddleware(view)
+        assert middleware(RequestFactory().get('/api/v1/kyc/profiles/')).status_code == 500
+        assert database_breaker.state == CircuitBreaker.OPEN
+        assert middleware(RequestFactory().get('/api/v1/kyc/profiles/')).status_code == 503
+        assert 'ensure_connection' not in unreachable_connection.__dict__
+
+
+@pytest.mark.django_db
+@pytest.mark.middleware
+class TestRequestMetricsMiddleware:
+    """Testes para RequestMetricsMiddleware"""
+    
+    @pytest.fixture(autouse=True)
+    def reset_registry(self):
+        metrics.registry.reset()
+        yield
+        metrics.registry.reset()
+    
+    def _view(self, request):
+        from django.contrib.auth.models import User
+        User.objects.count()
+        metrics.record_cache_access(hit=False)
+        return HttpResponse('x' * 10)
+    
+    def test_records_route_metrics(self):
+        from django.urls import resolve
+        middleware = RequestMetricsMiddleware(self._view)
+        request = RequestFactory().get('/alive/')
+        request.resolver_match = resolve('/alive/')
+        
+        response = middleware(request)
+        
+        assert 'X-Response-Time' in response
+        output = metrics.registry.render()
+        labels = 'route="core:liveness_check",method="GET",status="2xx"'
+        assert f'http_request_duration_seconds_count{{{labels}}} 1' in output
+        assert f'http_request_db_queries_total{{{labels}}} 1' in output
+        assert f'http_request_cache_misses_total{{{labels}}} 1' in output
+        assert f'http_response_size_bytes_total{{{labels}}} 10' in output
+    
+    def test_unknown_methods_share_one_label(self):
+        middleware = RequestMetricsMiddleware(lambda request: HttpResponse('ok'))
+        
+        for method in ('PROPFIND', 'X-RANDOM-1', 'X-RANDOM-2'):
+            middleware(RequestFactory().generic(method, '/alive/'))
+        
+        output = metrics.registry.render()
+        assert 'http_request_duration_seconds_count{route="unresolved",method="other",status="2xx"} 3' in output
+        assert 'PROPFIND' not in output
+    
+    def test_info_lines_are_sampled(self, settings, caplog):
+        settings.REQUEST_METRICS = {'LOG_SAMPLE_RATE': 0}
+        middleware = RequestMetricsMiddleware(lambda request: HttpResponse('ok'))
+        
+        with caplog.at_level('INFO', logger='apps.core.middleware'):
+            middleware(RequestFactory().get('/api/v1/kyc/profiles/'))
+        
+        assert not [r for r in caplog.records if r.name == 'apps.core.middleware']
+        assert 'route="unresolved"' in metrics.registry.render()
+
@@ -0,0 +1,184 @@
+"""
+Testes para views do app core
+"""
+
+import threading
+import time
+
+import pytest
+from django.test import Client
+
+from apps.core import health
+from apps.core.health import HealthMonitor
+from apps.core.readiness import MigrationReadiness, migration_readiness
+
+
+@pytest.mark.unit
+class TestHealthMonitor:
+    """Testes para o HealthMonitor do health check detalhado"""
+    
+    def _monitor(self, monkeypatch, probes, **kwargs):
+        monitor = HealthMonitor(**kwargs)
+        monkeypatch.setattr(HealthMonitor, 'probes', property(lambda self: probes))
+        return monitor
+    
+    def test_report_is_cached_within_ttl(self, monkeypatch):
+        calls = []
+        probes = {'database': (lambda: calls.append(1), (), True)}
+        monitor = self._monitor(monkeypatch, probes, cache_ttl=60)
+        
+        first = monitor.get_report()
+        second = monitor.get_report()
+        
+        assert first is second
+        assert first['status'] == 'healthy'
+        assert len(calls) == 1
+    
+    def test_slow_probe_times_out(self, monkeypatch):
+        release = threading.Event()
+        probes = {
+            'database': (lambda: None, (), True),
+            'celery': (release.wait, (), True),
+        }
+        monitor = self._monitor(monkeypatch, probes, probe_timeout=0.1)
+        
+        started = time.monotonic()
+        report = monitor.get_report()
+        release.set()
+        
+        assert time.monotonic() - started < 1
+        assert report['status'] == 'unhealthy'
+        assert report['services']['database'] == 'healthy'
+        assert 'timeout' in report['services']['celery']
+    
+    def test_non_critical_failure_keeps_healthy(self, monkeypatch):
+        def fail():
+            raise health.ProbeFailure('no workers')
+        probes = {'celery': (fail, (), False)}
+        monitor = self._monitor(monkeypatch, probes)
+        
+        report = monitor.get_report()
+        
+        assert report['status'] == 'healthy'
+        assert report['services']['celery'] == 'unhealthy: no workers'
+    
+    def test_expired_report_refreshes_in_background(self, monkeypatch):
+        calls = []
+        probes = {'database': (lambda: calls.append(1), (), True)}
+        monitor = self._monitor(monkeypatch, probes, cache_ttl=0)
+        
+        first = monitor.get_report()
+        stale = monitor.get_report()
+        
+        # Resposta imediata com o relatório anterior enquanto renova
+        assert stale is first
+        deadline = time.monotonic() + 2
+        while len(calls) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(calls) == 2
+
+
+@pytest.mark.views
+class TestHealthCheckView:
+    """Testes para o endpoint /health/"""
+    
+    def test_health_check_serves_monitor_report(self, monkeypatch):
+        report = {'status': 'unhealthy', 'timestamp': 0, 'services': {'database': 'unhealthy: x'}}
+        monkeypatch.setattr(health.health_monitor, 'get_report', lambda: report)
+        
+        response = Client().get('/health/')
+        
+        assert response.status_code == 503
+        assert response.json()['services']['database'] == 'unhealthy: x'
+    
+    def test_metrics_endpoint_prometheus_format(self, settings):
+        settings.DEBUG = True
+        settings.REQUEST_METRICS = {'TOKEN': ''}
+        response = Client().get('/metrics/')
+        
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+        assert '# TYPE http_request_duration_seconds histogram' in response.content.decode()
+    
+    def test_metrics_endpoint_requires_token_when_configured(self, settings):
+        settings.REQUEST_METRICS = {'TOKEN': 'secret'}
+        
+        assert Client().get('/metrics/').status_code == 401
+        response = Client().get('/metrics/', HTTP_AUTHORIZATION='Bearer secret')
+        assert response.status_code == 200
+    
+    def test_metrics_endpoint_closed_without_token_outside_debug(self, settings):
+        settings.DEBUG = False
+        settings.REQUEST_METRICS = {'TOKEN': ''}
+        
+        assert Client().get('/metrics/').status_code == 403
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestMigrationReadiness:
+    """Testes para o estado de readiness memoizado"""
+    
+    def _count_computes(self, monkeypatch, readiness, results):
+        calls = []
+        
+        def compute():
+            calls.append(1)
+            return results[min(len(calls), len(results)) - 1]
+        
+        monkeypatch.setattr(readiness, '_compute', compute)
+        return calls
+    
+    def test_ready_result_is_computed_once(self, monkeypatch):
+        readiness = MigrationReadiness()
+        calls = self._count_computes(monkeypatch, readiness, [{'ready': True}])
+        
+        for _ in range(5):
+            assert readiness.get()['ready'] is True
+        
+        assert len(calls) == 1
+    
+    def test_pending_migrations_are_rechecked(self, monkeypatch):
+        readiness = MigrationReadiness(recheck_interval=0)
+        pending = {'ready': False, 'reason': 'pending_migrations', 'pending_migrations': 2}
+        calls = self._count_computes(monkeypatch, readiness, [pending, {'ready': True}])
+        
+        assert readiness.get()['pending_migrations'] == 2
+        assert readiness.get()['ready'] is True
+        assert readiness.get()['ready'] is True
+        assert len(calls) == 2
+    
+    def test_post_migrate_invalidates(self, monkeypatch):
+        from django.apps import apps
+        from django.db.models.signals import post_migrate
+        
+        calls = self._count_computes(monkeypatch, migration_readiness, [{'ready': True}])
+        migration_readiness.get()
+        
+        core_config = apps.get_app_config('core')
+        post_migrate.send(sender=core_config, app_config=core_config, verbosity=0, using='default')
+        migration_readiness.get()
+        
+        assert len(calls) == 2
+        migration_readiness.invalidate()
+    
+    def test_readiness_endpoint_reports_pending(self, monkeypatch):
+        monkeypatch.setattr(migration_readiness, 'get', lambda: {
+            'ready': False, 'reason': 'pending_migrations', 'pending_migrations': 3
+        })
+        
+        response = Client().get('/ready/')
+        
+        assert response.status_code == 503
+        assert response.json() == {
+            'status': 'not_ready',
+            'reason': 'pending_migrations',
+            'pending_migrations': 3
+        }
+    
+    def test_readiness_computes_real_plan(self):
+        readiness = MigrationReadiness()
+        
+        result = readiness.get()
+        
+        assert 'ready' in result
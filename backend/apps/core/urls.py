@@ -12,5 +12,6 @@ urlpatterns = [
     path('health/', views.health_check, name='health_check_detailed'),
     path('ready/', views.readiness_check, name='readiness_check'),
     path('alive/', views.liveness_check, name='liveness_check'),
+    path('metrics/', views.metrics_view, name='metrics'),
 ]
 
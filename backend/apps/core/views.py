@@ -2,16 +2,17 @@
 Views do app core, incluindo health check para Railway.app
 """
 
+import hmac
 import json
 import time
 from django.http import JsonResponse, HttpResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
-from django.db import connection
-from django.core.cache import cache
 from django.conf import settings
-import redis
-from celery import current_app as celery_app
+
+from . import metrics
+from .health import health_monitor
+from .readiness import migration_readiness
 
 
 @require_http_methods(["GET"])
@@ -19,60 +20,13 @@ def health_check(request):
     """
     Health check endpoint para Railway.app e monitoramento.
     Retorna 200 OK se todos os serviços estão funcionando.
+    Serve o último relatório do HealthMonitor (probes concorrentes com
+    timeout, renovados em background), sem I/O no caminho da requisição.
     """
-    health_status = {
-        'status': 'healthy',
-        'timestamp': time.time(),
-        'services': {}
-    }
-    
-    overall_status = True
-    
-    # Check database connection
-    try:
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT 1")
-            health_status['services']['database'] = 'healthy'
-    except Exception as e:
-        health_status['services']['database'] = f'unhealthy: {str(e)}'
-        overall_status = False
-    
-    # Check cache (Redis)
-    try:
-        cache.set('health_check', 'ok', 30)
-        if cache.get('health_check') == 'ok':
-            health_status['services']['cache'] = 'healthy'
-        else:
-            health_status['services']['cache'] = 'unhealthy: cache test failed'
-            overall_status = False
-    except Exception as e:
-        health_status['services']['cache'] = f'unhealthy: {str(e)}'
-        overall_status = False
-    
-    # Check Celery (if configured)
-    try:
-        if hasattr(settings, 'CELERY_BROKER_URL'):
-            # Simple check to see if Celery is configured
-            inspect = celery_app.control.inspect()
-            stats = inspect.stats()
-            if stats:
-                health_status['services']['celery'] = 'healthy'
-            else:
-                health_status['services']['celery'] = 'unhealthy: no workers'
-                # Don't fail overall status for Celery in development
-                if not settings.DEBUG:
-                    overall_status = False
-    except Exception as e:
-        health_status['services']['celery'] = f'unhealthy: {str(e)}'
-        if not settings.DEBUG:
-            overall_status = False
-    
-    # Set overall status
-    if not overall_status:
-        health_status['status'] = 'unhealthy'
+    health_status = health_monitor.get_report()
     
     # Return appropriate HTTP status
-    status_code = 200 if overall_status else 503
+    status_code = 200 if health_status['status'] == 'healthy' else 503
     
     return JsonResponse(health_status, status=status_code)
 
@@ -90,33 +44,24 @@ def simple_health_check(request):
 def readiness_check(request):
     """
     Readiness check para verificar se a aplicação está pronta para receber tráfego.
+    O plano de migrações é calculado no startup e memoizado (ver
+    apps.core.readiness); a requisição apenas lê o resultado.
     """
-    try:
-        # Check if database migrations are up to date
-        from django.core.management import execute_from_command_line
-        from django.db.migrations.executor import MigrationExecutor
-        from django.db import connections
-        
-        executor = MigrationExecutor(connections['default'])
-        plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
-        
-        if plan:
-            return JsonResponse({
-                'status': 'not_ready',
-                'reason': 'pending_migrations',
-                'pending_migrations': len(plan)
-            }, status=503)
-        
-        return JsonResponse({
-            'status': 'ready',
-            'timestamp': time.time()
-        }, status=200)
-        
-    except Exception as e:
-        return JsonResponse({
+    readiness = migration_readiness.get()
+    
+    if not readiness['ready']:
+        payload = {
             'status': 'not_ready',
-            'reason': str(e)
-        }, status=503)
+            'reason': readiness['reason'],
+        }
+        if 'pending_migrations' in readiness:
+            payload['pending_migrations'] = readiness['pending_migrations']
+        return JsonResponse(payload, status=503)
+    
+    return JsonResponse({
+        'status': 'ready',
+        'timestamp': time.time()
+    }, status=200)
 
 
 @require_http_methods(["GET"])
@@ -130,3 +75,22 @@ def liveness_check(request):
         'version': getattr(settings, 'VERSION', '1.0.0')
     }, status=200)
 
+
+@require_http_methods(["GET"])
+def metrics_view(request):
+    """
+    Métricas de requisições no formato texto do Prometheus.
+    Exige "Authorization: Bearer <REQUEST_METRICS['TOKEN']>"; sem token
+    configurado o endpoint só responde com DEBUG ativo.
+    """
+    token = getattr(settings, 'REQUEST_METRICS', {}).get('TOKEN')
+    if not token:
+        if not settings.DEBUG:
+            return HttpResponse(status=403)
+    elif not hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+    
+    return HttpResponse(
+        metrics.registry.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
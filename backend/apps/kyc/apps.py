@@ -9,3 +9,9 @@ class KycConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.kyc'
     verbose_name = 'Kyc'
+    
+    def ready(self):
+        """
+        Código executado quando o app está pronto
+        """
+        from . import signals  # noqa: F401
@@ -0,0 +1,45 @@
+"""
+Helpers de cache do app KYC
+Chaves versionadas: escritas incrementam a versão e invalidam todas as
+entradas derivadas sem precisar enumerar chaves
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+PEP_SUMMARY_VERSION_KEY = 'kyc:pep_summary:version'
+
+
+def get_pep_summary_timeout():
+    """TTL do cache de resumo PEP (0 desativa o modo cacheado)"""
+    return getattr(settings, 'KYC_PEP_SUMMARY_CACHE_TIMEOUT', 0)
+
+
+def get_pep_summary_version():
+    """Versão atual das entradas de resumo PEP"""
+    version = cache.get(PEP_SUMMARY_VERSION_KEY)
+    if version is None:
+        version = 1
+        cache.add(PEP_SUMMARY_VERSION_KEY, version, None)
+    return version
+
+
+def invalidate_pep_summary():
+    """Invalidar todos os resumos PEP cacheados"""
+    try:
+        cache.incr(PEP_SUMMARY_VERSION_KEY)
+    except ValueError:
+        # Chave ainda não existe (ou expirou): recomeçar numa versão nova
+        cache.set(PEP_SUMMARY_VERSION_KEY, 2, None)
+
+
+def pep_summary_cache_key(user, search=None):
+    """
+    Chave do resumo PEP para o escopo do usuário
+    Staff vê todas as declarações; demais usuários apenas as próprias
+    """
+    scope = 'staff' if user.is_staff else f'user:{user.pk}'
+    search_hash = hashlib.md5((search or '').encode('utf-8')).hexdigest()
+    return f'kyc:pep_summary:v{get_pep_summary_version()}:{scope}:{search_hash}'
@@ -0,0 +1,87 @@
+"""
+Inspeção do conteúdo de documentos KYC em uma única passagem
+Cada bloco lido alimenta, ao mesmo tempo, o SHA-256, a contagem de bytes e o
+buffer de cabeçalho usado para identificar o tipo real pelos magic bytes
+(libmagic), então o arquivo nunca é lido duas vezes e o `content_type`/`size`
+informados pelo cliente deixam de ser usados.
+"""
+
+import hashlib
+
+import magic
+
+# Tipos de arquivo aceitos para documentos KYC (verificados pelo conteúdo)
+ALLOWED_DOCUMENT_MIME_TYPES = [
+    'application/pdf',
+    'image/jpeg',
+    'image/png',
+    'image/gif',
+    'application/msword',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+]
+
+# Bytes iniciais entregues ao libmagic (suficiente para PDF, imagens e OOXML)
+SNIFF_BYTES = 8 * 1024
+
+# Tamanho padrão dos blocos lidos de arquivos já recebidos
+READ_CHUNK_SIZE = 64 * 1024
+
+# Contêineres genéricos que o libmagic pode reportar para formatos Office
+_OFFICE_CONTAINERS = {
+    'application/zip': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'application/x-ole-storage': 'application/msword',
+    'application/CDFV2': 'application/msword',
+}
+
+
+def sniff_mime_type(head, declared=None):
+    """
+    Tipo MIME a partir dos primeiros bytes do arquivo
+    Para contêineres genéricos (ZIP/OLE) que não puderam ser detalhados pelo
+    cabeçalho, aceita o tipo Office declarado apenas se for compatível.
+    """
+    if not head:
+        return 'application/x-empty'
+    detected = magic.from_buffer(bytes(head), mime=True)
+    office_type = _OFFICE_CONTAINERS.get(detected)
+    if office_type is not None and declared == office_type:
+        return office_type
+    return detected
+
+
+class ContentInspector:
+    """Acumula hash, tamanho e cabeçalho à medida que os blocos passam"""
+
+    __slots__ = ('_hasher', 'size', '_head')
+
+    def __init__(self):
+        self._hasher = hashlib.sha256()
+        self.size = 0
+        self._head = bytearray()
+
+    def update(self, data):
+        self._hasher.update(data)
+        self.size += len(data)
+        missing = SNIFF_BYTES - len(self._head)
+        if missing > 0:
+            self._head += data[:missing]
+
+    @property
+    def sha256(self):
+        return self._hasher.hexdigest()
+
+    def mime_type(self, declared=None):
+        return sniff_mime_type(self._head, declared)
+
+
+def inspect_file(file, chunk_size=READ_CHUNK_SIZE):
+    """
+    Inspecionar um File/UploadedFile do Django lendo-o uma vez em blocos
+    Retorna o ContentInspector com sha256, size e o tipo detectado.
+    """
+    inspector = ContentInspector()
+    for chunk in file.chunks(chunk_size):
+        inspector.update(chunk)
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    return inspector
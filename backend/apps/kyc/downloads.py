@@ -0,0 +1,176 @@
+"""
+Download autenticado de documentos KYC
+A autorização fica com a view (mesmo queryset do KYCDocumentViewSet); aqui
+são tratadas as requisições condicionais (ETag = SHA-256 do conteúdo),
+Range de um único intervalo e a entrega dos bytes: por X-Accel-Redirect,
+quando o nginx expõe o MEDIA_ROOT em uma location interna, ou por
+FileResponse/streaming em blocos, sem carregar o arquivo em memória.
+Os arquivos são lidos pelo storage, então blobs arquivados na camada fria
+voltam para a camada quente antes da entrega.
+"""
+
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date
+
+from .renditions import RENDITION_CONTENT_TYPE
+
+DEFAULTS = {
+    # Location interna do nginx para o MEDIA_ROOT (vazio desativa o X-Accel-Redirect)
+    'ACCEL_REDIRECT_PREFIX': '',
+    # Tamanho (bytes) dos blocos no streaming pelo Django
+    'CHUNK_SIZE': 64 * 1024,
+}
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def get_download_config():
+    return {**DEFAULTS, **getattr(settings, 'KYC_DOWNLOAD', {})}
+
+
+def document_etag(document):
+    return f'"{document.sha256}"' if document.sha256 else None
+
+
+def parse_range(header, size):
+    """
+    Intervalo (início, fim inclusivo) de um cabeçalho Range de um só intervalo
+    Múltiplos intervalos ou sintaxe inválida retornam None (resposta completa).
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Sufixo: últimos N bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiable()
+    return start, min(end, size - 1)
+
+
+def _iter_range(fh, length, chunk_size):
+    try:
+        remaining = length
+        while remaining > 0:
+            data = fh.read(min(chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+    finally:
+        fh.close()
+
+
+def _accel_path(document, prefix):
+    """Caminho interno do nginx; só para arquivos do storage local"""
+    if not prefix:
+        return None
+    try:
+        document.file.path
+    except NotImplementedError:
+        return None
+    return prefix.rstrip('/') + '/' + quote(document.file.name)
+
+
+def serve_document(request, document, as_attachment=True):
+    """Resposta de download do arquivo do documento"""
+    config = get_download_config()
+    etag = document_etag(document)
+    # updated_at acompanha a troca do arquivo (normalização, substituição)
+    last_modified = int(document.updated_at.timestamp())
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    content_type = document.mime_type or 'application/octet-stream'
+    headers = {
+        'Content-Disposition': content_disposition_header(as_attachment, document.original_filename),
+        'Accept-Ranges': 'bytes',
+        # Conteúdo autenticado: revalidado a cada uso (304 barato pelo ETag)
+        'Cache-Control': 'private, no-cache',
+        'Last-Modified': http_date(last_modified),
+    }
+    if etag:
+        headers['ETag'] = etag
+
+    accel_path = _accel_path(document, config['ACCEL_REDIRECT_PREFIX'])
+    if accel_path:
+        # O nginx transfere os bytes (inclusive Range) sem ocupar o worker
+        response = HttpResponse(content_type=content_type, headers=headers)
+        response['X-Accel-Redirect'] = accel_path
+        return response
+
+    size = document.file.size
+    byte_range = None
+    range_header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    if range_header and (not if_range or (etag and if_range == etag)):
+        try:
+            byte_range = parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416, headers=headers)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    fh = document.file.storage.open(document.file.name, 'rb')
+    if byte_range is None:
+        # Content-Length pelo próprio FileResponse; wsgi.file_wrapper (sendfile) se disponível
+        del headers['Content-Disposition']
+        response = FileResponse(
+            fh,
+            as_attachment=as_attachment,
+            filename=document.original_filename,
+            content_type=content_type,
+            headers=headers,
+        )
+        response.block_size = config['CHUNK_SIZE']
+        return response
+
+    start, end = byte_range
+    length = end - start + 1
+    fh.seek(start)
+    response = StreamingHttpResponse(
+        _iter_range(fh, length, config['CHUNK_SIZE']),
+        status=206,
+        content_type=content_type,
+        headers=headers,
+    )
+    response['Content-Length'] = str(length)
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
+
+
+def serve_rendition(request, document, rendition):
+    """Resposta com a miniatura/preview `rendition` do documento"""
+    name = document.renditions[rendition]
+    etag = f'"{document.sha256}.{rendition}"'
+
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+
+    response = FileResponse(
+        document.file.storage.open(name, 'rb'),
+        content_type=RENDITION_CONTENT_TYPE,
+        headers={'Cache-Control': 'private, no-cache', 'ETag': etag},
+    )
+    response.block_size = get_download_config()['CHUNK_SIZE']
+    return response
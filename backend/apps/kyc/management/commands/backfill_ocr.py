@@ -0,0 +1,221 @@
+"""
+Comando Django para processar o OCR de todos os documentos pendentes
+Percorre KYCDocument (ocr_processed=False) em ordem de id com iterator(),
+distribui os arquivos em um pool de processos com concorrência limitada,
+grava os resultados com bulk_update e salva o último id de cada lote em um
+checkpoint, para que uma execução interrompida continue de onde parou. O
+checkpoint nunca passa de um documento com erro: a próxima execução volta a
+ele (os já processados saem pelo filtro ocr_processed).
+"""
+
+import json
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.kyc import ocr
+from apps.kyc.models import KYCDocument
+from apps.kyc.tasks import get_ocr_config, local_document_path
+
+UPDATE_FIELDS = ['ocr_processed', 'ocr_text', 'ocr_confidence', 'updated_at']
+
+
+class Command(BaseCommand):
+    help = 'Processa em lote o OCR dos documentos KYC pendentes, com checkpoint do último id'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=200,
+            help='Documentos lidos por vez do banco e gravados por bulk_update (padrão: 200)',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Máximo de processos de OCR em paralelo (1 processa no próprio processo)',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            type=str,
+            default=str(settings.BASE_DIR / 'logs' / 'ocr_backfill.checkpoint'),
+            help='Arquivo com o último id processado',
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Ignorar o checkpoint e começar do primeiro documento pendente',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            help='Processar no máximo N documentos nesta execução',
+        )
+    
+    def handle(self, *args, **options):
+        """Executar o backfill"""
+        
+        if options['chunk_size'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--chunk-size e --concurrency devem ser positivos')
+        
+        checkpoint = options['checkpoint']
+        last_id = 0 if options['reset'] else self.read_checkpoint(checkpoint)
+        self.lang = get_ocr_config()['LANG']
+        self.concurrency = options['concurrency']
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'🔄 OCR pendente a partir do id {last_id} '
+                f'(lotes de {options["chunk_size"]}, {options["concurrency"]} processo(s))'
+            )
+        )
+        
+        pending = (
+            KYCDocument.objects
+            .filter(ocr_processed=False, pk__gt=last_id)
+            .order_by('pk')
+            .only('id', 'file', 'mime_type', 'sha256', 'original_filename')
+        )
+        if options['limit']:
+            pending = pending[:options['limit']]
+        
+        pool = None
+        if options['concurrency'] > 1:
+            pool = ProcessPoolExecutor(
+                max_workers=options['concurrency'],
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        
+        totals = {'processed': 0, 'reused': 0, 'failed': 0}
+        self.first_failed_id = None
+        try:
+            batch = []
+            for document in pending.iterator(chunk_size=options['chunk_size']):
+                batch.append(document)
+                if len(batch) >= options['chunk_size']:
+                    self.process_batch(batch, pool, checkpoint, totals)
+                    batch = []
+            if batch:
+                self.process_batch(batch, pool, checkpoint, totals)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✅ Backfill concluído: {totals["processed"]} processados, '
+                f'{totals["reused"]} reaproveitados, {totals["failed"]} com erro'
+            )
+        )
+    
+    def process_batch(self, batch, pool, checkpoint, totals):
+        """
+        OCR de um lote; o checkpoint só avança depois do bulk_update e fica
+        antes do primeiro documento com erro da execução
+        """
+        
+        # Conteúdo já processado em outros documentos (ou em lotes anteriores)
+        hashes = {document.sha256 for document in batch if document.sha256}
+        known = {
+            row['sha256']: (row['ocr_text'], row['ocr_confidence'])
+            for row in KYCDocument.objects
+            .filter(sha256__in=hashes, ocr_processed=True)
+            .values('sha256', 'ocr_text', 'ocr_confidence')
+        }
+        
+        # Um OCR por conteúdo distinto dentro do lote
+        to_run = {}
+        for document in batch:
+            key = document.sha256 or f'id:{document.pk}'
+            if key not in known and key not in to_run:
+                to_run[key] = document
+        
+        # Até `concurrency` arquivos em OCR ao mesmo tempo: cada cópia local
+        # (storages remotos) é descartada assim que o resultado é coletado
+        in_flight = deque()
+        try:
+            for key, document in to_run.items():
+                if len(in_flight) >= self.concurrency:
+                    self.collect(in_flight.popleft(), known)
+                in_flight.append(self.submit(key, document, pool))
+            while in_flight:
+                self.collect(in_flight.popleft(), known)
+        finally:
+            for _key, _document, _job, stack in in_flight:
+                stack.close()
+        
+        now = timezone.now()
+        updated = []
+        for document in batch:
+            key = document.sha256 or f'id:{document.pk}'
+            if key not in known:
+                totals['failed'] += 1
+                if self.first_failed_id is None:
+                    self.first_failed_id = document.pk
+                continue
+            if key in to_run and to_run[key] is document:
+                totals['processed'] += 1
+            else:
+                totals['reused'] += 1
+            document.ocr_processed = True
+            document.ocr_text, document.ocr_confidence = known[key]
+            document.updated_at = now
+            updated.append(document)
+        
+        KYCDocument.objects.bulk_update(updated, UPDATE_FIELDS, batch_size=len(batch))
+        if self.first_failed_id is None:
+            self.write_checkpoint(checkpoint, batch[-1].pk)
+        else:
+            self.write_checkpoint(checkpoint, self.first_failed_id - 1)
+        self.stdout.write(f'   📄 até o id {batch[-1].pk}: {len(updated)}/{len(batch)} atualizados')
+    
+    def submit(self, key, document, pool):
+        """Abrir a cópia local do arquivo e enviar o OCR ao pool (ou adiar, sem pool)"""
+        stack = ExitStack()
+        try:
+            path = stack.enter_context(local_document_path(document))
+        except Exception as e:
+            return key, document, e, stack
+        args = (path, document.mime_type, self.lang)
+        return key, document, pool.submit(ocr.extract_text, *args) if pool else args, stack
+    
+    def collect(self, submitted, known):
+        """Resultado de um OCR enviado por submit; libera a cópia local"""
+        key, document, job, stack = submitted
+        with stack:
+            try:
+                if isinstance(job, Exception):
+                    raise job
+                result = job.result() if isinstance(job, Future) else ocr.extract_text(*job)
+            except Exception as e:
+                self.stdout.write(
+                    self.style.ERROR(f'   ❌ documento {document.pk}: {e}')
+                )
+                return
+        known[key] = (result.text, result.confidence)
+    
+    def read_checkpoint(self, path):
+        try:
+            with open(path) as fh:
+                return json.load(fh)['last_id']
+        except FileNotFoundError:
+            return 0
+        except (ValueError, KeyError) as e:
+            raise CommandError(f'Checkpoint inválido em {path}: {e}')
+    
+    def write_checkpoint(self, path, last_id):
+        """Gravação atômica (arquivo temporário + rename)"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as fh:
+            json.dump({'last_id': last_id, 'updated_at': timezone.now().isoformat()}, fh)
+        os.replace(tmp_path, path)
@@ -0,0 +1,155 @@
+"""
+Comando Django para verificar se os filtros e ordenações das viewsets KYC
+são atendidos por índices, analisando a saída do EXPLAIN
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models
+
+from apps.kyc.urls import router
+
+# Marcadores no EXPLAIN de filtro sem índice (varredura completa), por banco
+FILTER_SCAN_MARKERS = {
+    'postgresql': ['Seq Scan'],
+    'sqlite': ['SCAN '],
+}
+# Marcadores de ordenação feita em memória/disco em vez de pelo índice
+SORT_MARKERS = {
+    'postgresql': ['Seq Scan', 'Sort Key'],
+    'sqlite': ['USE TEMP B-TREE FOR ORDER BY'],
+}
+
+
+class Command(BaseCommand):
+    help = 'Relata filtros e ordenações das viewsets KYC que não usam índice (via EXPLAIN)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--viewset',
+            type=str,
+            help='Verificar apenas uma viewset (basename do router, ex.: pepdeclaration)',
+        )
+        parser.add_argument(
+            '--allow-seqscan',
+            action='store_true',
+            help='PostgreSQL: manter enable_seqscan (por padrão é desligado para que '
+                 'tabelas pequenas de dev não escondam índices existentes)',
+        )
+        parser.add_argument(
+            '--plans',
+            action='store_true',
+            help='Mostrar o plano completo de cada query',
+        )
+        parser.add_argument(
+            '--fail-on-missing',
+            action='store_true',
+            help='Terminar com erro se algum filtro não usar índice (útil em CI)',
+        )
+    
+    def handle(self, *args, **options):
+        """Executar verificação dos índices"""
+        
+        vendor = connection.vendor
+        if vendor not in FILTER_SCAN_MARKERS:
+            raise CommandError(f'Banco não suportado para análise de EXPLAIN: {vendor}')
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'🔎 Verificando índices dos filtros KYC ({vendor})...\n')
+        )
+        
+        if vendor == 'postgresql' and not options['allow_seqscan']:
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+        
+        missing = []
+        for prefix, viewset, basename in router.registry:
+            if options['viewset'] and options['viewset'] != basename:
+                continue
+            missing.extend(self.check_viewset(basename, viewset, vendor, options))
+        
+        self.stdout.write('')
+        if missing:
+            self.stdout.write(
+                self.style.WARNING(f'⚠️ {len(missing)} filtro(s)/ordenação(ões) sem índice:')
+            )
+            for item in missing:
+                self.stdout.write(f'   - {item}')
+            if options['fail_on_missing']:
+                raise CommandError('Existem filtros sem índice')
+        else:
+            self.stdout.write(self.style.SUCCESS('✅ Todos os filtros usam índices'))
+    
+    def check_viewset(self, basename, viewset, vendor, options):
+        """Verificar filtros e ordenações de uma viewset"""
+        
+        model = self.get_model(viewset)
+        manager = model._default_manager
+        
+        self.stdout.write(f'\n📋 {basename} ({model._meta.db_table}):')
+        
+        missing = []
+        for field_name in getattr(viewset, 'filterset_fields', []):
+            # Sem ordenação: sem estatísticas o planner poderia preferir o
+            # índice de ordenação e esconder o índice do filtro
+            queryset = manager.filter(**{field_name: self.sample_value(model, field_name)})
+            queryset = queryset.order_by()
+            if not self.report(f'filtro {field_name}', queryset, vendor, options):
+                missing.append(f'{basename}: filtro {field_name}')
+        
+        for field_name in getattr(viewset, 'ordering_fields', []):
+            if not self.is_model_field(model, field_name):
+                continue
+            queryset = manager.order_by(f'-{field_name}')[:20]
+            if not self.report(f'ordenação {field_name}', queryset, vendor, options, check_sort=True):
+                missing.append(f'{basename}: ordenação {field_name}')
+        
+        return missing
+    
+    def report(self, label, queryset, vendor, options, check_sort=False):
+        """Rodar EXPLAIN e mostrar se a query é atendida por índice"""
+        
+        plan = queryset.explain()
+        markers = SORT_MARKERS[vendor] if check_sort else FILTER_SCAN_MARKERS[vendor]
+        indexed = not any(marker in plan for marker in markers)
+        
+        if indexed:
+            self.stdout.write(f'   ✅ {label}')
+        else:
+            self.stdout.write(f'   ❌ {self.style.ERROR(label)}')
+        
+        if options['plans'] or not indexed:
+            for line in plan.splitlines():
+                self.stdout.write(f'      {line}')
+        
+        return indexed
+    
+    def get_model(self, viewset):
+        """Obter o model de uma viewset (queryset ou serializer)"""
+        
+        queryset = getattr(viewset, 'queryset', None)
+        if queryset is not None:
+            return queryset.model
+        return viewset.serializer_class.Meta.model
+    
+    def is_model_field(self, model, field_name):
+        """Ignorar campos anotados (ex.: search_rank)"""
+        
+        try:
+            model._meta.get_field(field_name)
+        except Exception:
+            return False
+        return True
+    
+    def sample_value(self, model, field_name):
+        """Valor representativo para o filtro (do próprio banco, se houver)"""
+        
+        value = model._default_manager.values_list(field_name, flat=True).first()
+        if value is not None:
+            return value
+        
+        field = model._meta.get_field(field_name)
+        if isinstance(field, models.BooleanField):
+            return False
+        if isinstance(field, models.ForeignKey):
+            return field.target_field.to_python(field.target_field.get_default()) or 0
+        return 'x'
@@ -0,0 +1,16 @@
+"""
+Comando Django para cancelar sessões de upload expiradas e liberar os
+arquivos parciais em staging
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.kyc.uploads import purge_expired_sessions
+
+
+class Command(BaseCommand):
+    help = 'Cancela sessões de upload de documentos expiradas e remove os arquivos parciais'
+    
+    def handle(self, *args, **options):
+        count = purge_expired_sessions()
+        self.stdout.write(self.style.SUCCESS(f'✅ {count} sessões de upload expiradas removidas'))
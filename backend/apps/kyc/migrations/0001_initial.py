@@ -0,0 +1,263 @@
+# Generated by Django 5.0.8 on 2026-10-18 15:49
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="KYCProfile",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("in_review", "In Review"),
+                            ("approved", "Approved"),
+                            ("rejected", "Rejected"),
+                            ("requires_update", "Requires Update"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                    ),
+                ),
+                ("full_name", models.CharField(max_length=255)),
+                ("date_of_birth", models.DateField()),
+                ("nationality", models.CharField(max_length=100)),
+                ("document_number", models.CharField(max_length=50)),
+                ("document_type", models.CharField(max_length=20)),
+                ("address_line1", models.CharField(max_length=255)),
+                ("address_line2", models.CharField(blank=True, max_length=255)),
+                ("city", models.CharField(max_length=100)),
+                ("state", models.CharField(max_length=100)),
+                ("postal_code", models.CharField(max_length=20)),
+                ("country", models.CharField(max_length=100)),
+                ("occupation", models.CharField(max_length=255)),
+                ("employer", models.CharField(blank=True, max_length=255)),
+                (
+                    "annual_income",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=15, null=True
+                    ),
+                ),
+                ("source_of_funds", models.TextField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("reviewed_at", models.DateTimeField(blank=True, null=True)),
+                ("notes", models.TextField(blank=True)),
+                (
+                    "reviewed_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="reviewed_kyc_profiles",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="kyc_profile",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "KYC Profile",
+                "verbose_name_plural": "KYC Profiles",
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.CreateModel(
+            name="KYCDocument",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "document_type",
+                    models.CharField(
+                        choices=[
+                            ("passport", "Passport"),
+                            ("national_id", "National ID"),
+                            ("drivers_license", "Driver's License"),
+                            ("utility_bill", "Utility Bill"),
+                            ("bank_statement", "Bank Statement"),
+                            ("proof_of_income", "Proof of Income"),
+                            ("other", "Other"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("file", models.FileField(upload_to="kyc_documents/%Y/%m/%d/")),
+                ("original_filename", models.CharField(max_length=255)),
+                ("file_size", models.PositiveIntegerField()),
+                ("mime_type", models.CharField(max_length=100)),
+                ("ocr_processed", models.BooleanField(default=False)),
+                ("ocr_text", models.TextField(blank=True)),
+                ("ocr_confidence", models.FloatField(blank=True, null=True)),
+                ("is_verified", models.BooleanField(default=False)),
+                ("verification_notes", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "kyc_profile",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="documents",
+                        to="kyc.kycprofile",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "KYC Document",
+                "verbose_name_plural": "KYC Documents",
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.CreateModel(
+            name="PEPDeclaration",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("is_pep", models.BooleanField(default=False)),
+                (
+                    "pep_type",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("domestic", "Domestic PEP"),
+                            ("foreign", "Foreign PEP"),
+                            ("international", "International Organization PEP"),
+                            ("family", "Family Member of PEP"),
+                            ("close_associate", "Close Associate of PEP"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("position_held", models.CharField(blank=True, max_length=255)),
+                ("organization", models.CharField(blank=True, max_length=255)),
+                ("country", models.CharField(blank=True, max_length=100)),
+                ("start_date", models.DateField(blank=True, null=True)),
+                ("end_date", models.DateField(blank=True, null=True)),
+                ("related_pep_name", models.CharField(blank=True, max_length=255)),
+                ("relationship_type", models.CharField(blank=True, max_length=100)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "kyc_profile",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="pep_declarations",
+                        to="kyc.kycprofile",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "PEP Declaration",
+                "verbose_name_plural": "PEP Declarations",
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.CreateModel(
+            name="UBODeclaration",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("full_name", models.CharField(max_length=255)),
+                ("date_of_birth", models.DateField()),
+                ("nationality", models.CharField(max_length=100)),
+                (
+                    "ownership_percentage",
+                    models.DecimalField(decimal_places=2, max_digits=5),
+                ),
+                ("address_line1", models.CharField(max_length=255)),
+                ("address_line2", models.CharField(blank=True, max_length=255)),
+                ("city", models.CharField(max_length=100)),
+                ("state", models.CharField(max_length=100)),
+                ("postal_code", models.CharField(max_length=20)),
+                ("country", models.CharField(max_length=100)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "kyc_profile",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ubo_declarations",
+                        to="kyc.kycprofile",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "UBO Declaration",
+                "verbose_name_plural": "UBO Declarations",
+                "ordering": ["-ownership_percentage"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="kycprofile",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="kyc_profile_created_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="kycdocument",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="kyc_doc_created_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="pepdeclaration",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="kyc_pep_created_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ubodeclaration",
+            index=models.Index(
+                fields=["-ownership_percentage", "-id"], name="kyc_ubo_ownership_id_idx"
+            ),
+        ),
+    ]
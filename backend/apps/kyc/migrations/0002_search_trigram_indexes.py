@@ -0,0 +1,55 @@
+"""
+Índices GIN pg_trgm para a busca de perfis KYC e declarações PEP
+Indexam UPPER(col::text), a mesma expressão que o PostgreSQL usa para
+icontains, então os filtros de busca existentes passam a usar o índice.
+Criados com CONCURRENTLY para não bloquear tabelas grandes; em bancos
+que não são PostgreSQL (SQLite nos testes) a migração não faz nada.
+"""
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# Campos usados por search_fields de KYCProfileViewSet e PEPDeclarationViewSet
+TRIGRAM_INDEXED_COLUMNS = {
+    'kyc_kycprofile': ['full_name', 'document_number'],
+    'kyc_pepdeclaration': ['position_held', 'organization', 'related_pep_name'],
+}
+
+
+def _index_name(table, column):
+    return f'kyc_trgm_{table.split("_", 1)[-1]}_{column}'[:63]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, columns in TRIGRAM_INDEXED_COLUMNS.items():
+        for column in columns:
+            schema_editor.execute(
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{_index_name(table, column)}" '
+                f'ON "{table}" USING gin ((UPPER("{column}"::text)) gin_trgm_ops)'
+            )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, columns in TRIGRAM_INDEXED_COLUMNS.items():
+        for column in columns:
+            schema_editor.execute(
+                f'DROP INDEX CONCURRENTLY IF EXISTS "{_index_name(table, column)}"'
+            )
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("kyc", "0001_initial"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.0.8 on 2026-10-18 15:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kyc", "0002_search_trigram_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="kycdocument",
+            index=models.Index(
+                fields=["kyc_profile", "document_type"], name="kyc_doc_profile_type_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="kycdocument",
+            index=models.Index(
+                fields=["document_type", "-created_at"], name="kyc_doc_type_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="kycdocument",
+            index=models.Index(
+                fields=["is_verified", "-created_at"],
+                name="kyc_doc_verified_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="kycdocument",
+            index=models.Index(
+                condition=models.Q(("ocr_processed", False)),
+                fields=["id"],
+                name="kyc_doc_ocr_pending_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="kycprofile",
+            index=models.Index(
+                fields=["status", "-created_at"], name="kyc_profile_status_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="kycprofile",
+            index=models.Index(
+                fields=["nationality"], name="kyc_profile_nationality_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="kycprofile",
+            index=models.Index(fields=["country"], name="kyc_profile_country_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="pepdeclaration",
+            index=models.Index(
+                fields=["is_pep", "pep_type"], name="kyc_pep_is_pep_type_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="pepdeclaration",
+            index=models.Index(fields=["country"], name="kyc_pep_country_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="ubodeclaration",
+            index=models.Index(
+                fields=["kyc_profile", "-ownership_percentage"],
+                name="kyc_ubo_profile_ownership_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ubodeclaration",
+            index=models.Index(fields=["nationality"], name="kyc_ubo_nationality_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="ubodeclaration",
+            index=models.Index(fields=["country"], name="kyc_ubo_country_idx"),
+        ),
+    ]
@@ -0,0 +1,111 @@
+# Generated by Django 5.0.8 on 2026-10-18 16:00
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kyc", "0003_filter_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocumentUploadSession",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "document_type",
+                    models.CharField(
+                        choices=[
+                            ("passport", "Passport"),
+                            ("national_id", "National ID"),
+                            ("drivers_license", "Driver's License"),
+                            ("utility_bill", "Utility Bill"),
+                            ("bank_statement", "Bank Statement"),
+                            ("proof_of_income", "Proof of Income"),
+                            ("other", "Other"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("original_filename", models.CharField(max_length=255)),
+                ("mime_type", models.CharField(max_length=100)),
+                ("upload_length", models.PositiveIntegerField()),
+                ("offset", models.PositiveIntegerField(default=0)),
+                (
+                    "checksum",
+                    models.CharField(
+                        blank=True,
+                        help_text="SHA-256 declared by the client (hex)",
+                        max_length=64,
+                    ),
+                ),
+                ("sha256", models.CharField(blank=True, max_length=64)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("uploading", "Uploading"),
+                            ("completed", "Completed"),
+                            ("aborted", "Aborted"),
+                        ],
+                        default="uploading",
+                        max_length=20,
+                    ),
+                ),
+                ("expires_at", models.DateTimeField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="kyc_upload_sessions",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "document",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="upload_session",
+                        to="kyc.kycdocument",
+                    ),
+                ),
+                (
+                    "kyc_profile",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="upload_sessions",
+                        to="kyc.kycprofile",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Document Upload Session",
+                "verbose_name_plural": "Document Upload Sessions",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "expires_at"],
+                        name="kyc_upload_status_exp_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.8 on 2026-10-18 16:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kyc", "0004_document_upload_sessions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="kycdocument",
+            name="sha256",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name="kycdocument",
+            index=models.Index(fields=["sha256"], name="kyc_doc_sha256_idx"),
+        ),
+    ]
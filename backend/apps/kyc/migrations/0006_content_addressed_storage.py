@@ -0,0 +1,41 @@
+# Generated by Django 5.0.8 on 2026-10-18 16:03
+
+import apps.kyc.models
+import apps.kyc.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kyc", "0005_document_sha256"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocumentBlob",
+            fields=[
+                (
+                    "sha256",
+                    models.CharField(max_length=64, primary_key=True, serialize=False),
+                ),
+                ("size", models.PositiveIntegerField()),
+                ("ref_count", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Document Blob",
+                "verbose_name_plural": "Document Blobs",
+            },
+        ),
+        migrations.AlterField(
+            model_name="kycdocument",
+            name="file",
+            field=models.FileField(
+                max_length=255,
+                storage=apps.kyc.storage.get_document_storage,
+                upload_to=apps.kyc.models.document_upload_to,
+            ),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.0.8 on 2026-10-18 16:05
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kyc", "0006_content_addressed_storage"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OCRJob",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("sha256", models.CharField(blank=True, max_length=64)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "Queued"),
+                            ("running", "Running"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="queued",
+                        max_length=20,
+                    ),
+                ),
+                ("task_id", models.CharField(blank=True, max_length=255)),
+                ("pages", models.PositiveIntegerField(blank=True, null=True)),
+                (
+                    "reused",
+                    models.BooleanField(
+                        default=False, help_text="Result copied from identical content"
+                    ),
+                ),
+                ("error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "document",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ocr_jobs",
+                        to="kyc.kycdocument",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "OCR Job",
+                "verbose_name_plural": "OCR Jobs",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["document", "status"], name="kyc_ocrjob_doc_status_idx"
+                    )
+                ],
+            },
+        ),
+    ]
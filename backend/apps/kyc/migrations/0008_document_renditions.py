@@ -0,0 +1,18 @@
+# Generated by Django 5.0.8 on 2026-10-18 16:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kyc", "0007_ocr_jobs"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="kycdocument",
+            name="renditions",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
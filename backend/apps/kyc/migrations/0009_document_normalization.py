@@ -0,0 +1,23 @@
+# Generated by Django 5.0.8 on 2026-10-18 16:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    
+    dependencies = [
+        ("kyc", "0008_document_renditions"),
+    ]
+    
+    operations = [
+        migrations.AddField(
+            model_name="kycdocument",
+            name="normalized_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="kycdocument",
+            name="original_sha256",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
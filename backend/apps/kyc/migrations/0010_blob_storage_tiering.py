@@ -0,0 +1,22 @@
+# Generated by Django 5.0.8 on 2026-10-18 16:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    
+    dependencies = [
+        ("kyc", "0009_document_normalization"),
+    ]
+    
+    operations = [
+        migrations.AddField(
+            model_name="documentblob",
+            name="archived_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="documentblob",
+            index=models.Index(fields=["archived_at"], name="kyc_blob_archived_idx"),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.0.8 on 2026-10-18 17:24
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+INDEX_NAME = 'kyc_trgm_kycprofile_user_email'
+
+
+def copy_user_emails(apps, schema_editor):
+    KYCProfile = apps.get_model('kyc', 'KYCProfile')
+    User = KYCProfile._meta.get_field('user').related_model
+    KYCProfile.objects.update(
+        user_email=Subquery(User.objects.filter(pk=OuterRef('user_id')).values('email')[:1])
+    )
+
+
+def create_user_email_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{INDEX_NAME}" '
+        f'ON "kyc_kycprofile" USING gin ((UPPER("user_email"::text)) gin_trgm_ops)'
+    )
+
+
+def drop_user_email_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{INDEX_NAME}"')
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("kyc", "0010_blob_storage_tiering"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="kycprofile",
+            name="user_email",
+            field=models.EmailField(blank=True, editable=False, max_length=254),
+        ),
+        migrations.RunPython(copy_user_emails, migrations.RunPython.noop),
+        migrations.RunPython(create_user_email_index, drop_user_email_index),
+    ]
@@ -3,12 +3,17 @@ Models para o app KYC (Know Your Customer)
 Inclui correções para bugs identificados no relatório
 """
 
-from django.db import models
+from functools import partial
+
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 import uuid
 
+from .renditions import rendition_names
+from .storage import blob_name, get_document_storage, is_blob_name
+
 
 class KYCProfile(models.Model):
     """Perfil KYC do usuário"""
@@ -23,6 +28,9 @@ class KYCProfile(models.Model):
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='kyc_profile')
+    # Cópia de user.email para a busca com índice trigram na própria tabela
+    # (sincronizada pelos signals; auth_user pertence ao app auth)
+    user_email = models.EmailField(blank=True, editable=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     
     # Dados pessoais
@@ -63,6 +71,14 @@ class KYCProfile(models.Model):
         verbose_name = _('KYC Profile')
         verbose_name_plural = _('KYC Profiles')
         ordering = ['-created_at']
+        indexes = [
+            # Paginação keyset (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='kyc_profile_created_id_idx'),
+            # Fila de revisão: filtro por status ordenado por created_at
+            models.Index(fields=['status', '-created_at'], name='kyc_profile_status_created_idx'),
+            models.Index(fields=['nationality'], name='kyc_profile_nationality_idx'),
+            models.Index(fields=['country'], name='kyc_profile_country_idx'),
+        ]
     
     def __str__(self):
         return f"KYC Profile - {self.full_name} ({self.status})"
@@ -98,6 +114,14 @@ class UBODeclaration(models.Model):
         verbose_name = _('UBO Declaration')
         verbose_name_plural = _('UBO Declarations')
         ordering = ['-ownership_percentage']
+        indexes = [
+            # Paginação keyset (ownership_percentage, id)
+            models.Index(fields=['-ownership_percentage', '-id'], name='kyc_ubo_ownership_id_idx'),
+            # UBOs de um perfil na ordem padrão (listagem e validação)
+            models.Index(fields=['kyc_profile', '-ownership_percentage'], name='kyc_ubo_profile_ownership_idx'),
+            models.Index(fields=['nationality'], name='kyc_ubo_nationality_idx'),
+            models.Index(fields=['country'], name='kyc_ubo_country_idx'),
+        ]
     
     def __str__(self):
         return f"UBO: {self.full_name} ({self.ownership_percentage}%)"
@@ -107,10 +131,12 @@ class UBODeclaration(models.Model):
         """
         CORREÇÃO: Método seguro para obter UBOs de um perfil
         Trata casos onde não há UBOs declarados
+        Respeita o cache de prefetch_related('ubo_declarations')
         """
         try:
-            ubos = cls.objects.filter(kyc_profile=kyc_profile)
-            return list(ubos) if ubos.exists() else []
+            # Usa o cache de prefetch_related quando disponível (zero queries);
+            # caso contrário, uma única query em vez de exists() + list()
+            return list(kyc_profile.ubo_declarations.all())
         except Exception as e:
             # Log do erro para debugging
             import logging
@@ -119,47 +145,69 @@ class UBODeclaration(models.Model):
             return []
     
     @classmethod
-    def validate_ubo_declarations(cls, kyc_profile):
+    def validate_ubos(cls, ubos):
         """
-        CORREÇÃO: Validação robusta de declarações UBO
-        Evita TypeError quando beneficiário não é declarado
+        Validação em passagem única sobre UBOs já carregados
+        Aceita qualquer iterável (lista, cache de prefetch, objetos não salvos)
+        e calcula total, contagem e erros sem executar queries
         """
-        try:
-            ubos = cls.get_ubos_for_profile(kyc_profile)
-            
-            if not ubos:
-                # Caso não haja UBOs declarados, retorna validação específica
-                return {
-                    'is_valid': False,
-                    'errors': [_('No UBO declarations found. At least one UBO must be declared.')],
-                    'total_percentage': 0
-                }
-            
-            total_percentage = sum(ubo.ownership_percentage for ubo in ubos)
-            errors = []
-            
-            # Validações
-            if total_percentage > 100:
-                errors.append(_('Total ownership percentage cannot exceed 100%'))
-            
-            if total_percentage < 25:
-                errors.append(_('At least 25% ownership must be declared for UBO requirements'))
+        total_percentage = 0
+        ubo_count = 0
+        ubo_errors = []
+        
+        for ubo in ubos:
+            ubo_count += 1
+            total_percentage += ubo.ownership_percentage
             
             # Validar cada UBO individualmente
-            for ubo in ubos:
-                if ubo.ownership_percentage < 0:
-                    errors.append(f_('Invalid ownership percentage for {ubo.full_name}'))
-                
-                if not ubo.full_name.strip():
-                    errors.append(_('UBO name cannot be empty'))
+            if ubo.ownership_percentage < 0:
+                ubo_errors.append(
+                    _('Invalid ownership percentage for {name}').format(name=ubo.full_name)
+                )
             
+            if not ubo.full_name.strip():
+                ubo_errors.append(_('UBO name cannot be empty'))
+        
+        if not ubo_count:
+            # Caso não haja UBOs declarados, retorna validação específica
             return {
-                'is_valid': len(errors) == 0,
-                'errors': errors,
-                'total_percentage': total_percentage,
-                'ubo_count': len(ubos)
+                'is_valid': False,
+                'errors': [_('No UBO declarations found. At least one UBO must be declared.')],
+                'total_percentage': 0
             }
+        
+        errors = []
+        
+        # Validações do total
+        if total_percentage > 100:
+            errors.append(_('Total ownership percentage cannot exceed 100%'))
+        
+        if total_percentage < 25:
+            errors.append(_('At least 25% ownership must be declared for UBO requirements'))
+        
+        errors.extend(ubo_errors)
+        
+        return {
+            'is_valid': len(errors) == 0,
+            'errors': errors,
+            'total_percentage': total_percentage,
+            'ubo_count': ubo_count
+        }
+    
+    @classmethod
+    def validate_ubo_declarations(cls, kyc_profile, ubos=None):
+        """
+        CORREÇÃO: Validação robusta de declarações UBO
+        Evita TypeError quando beneficiário não é declarado
+        Usa `ubos` quando fornecido; senão lê o cache de prefetch do perfil
+        (ou executa uma única query)
+        """
+        try:
+            if ubos is None:
+                ubos = cls.get_ubos_for_profile(kyc_profile)
             
+            return cls.validate_ubos(ubos)
+        
         except Exception as e:
             # Log do erro e retorna validação com erro
             import logging
@@ -207,6 +255,13 @@ class PEPDeclaration(models.Model):
         verbose_name = _('PEP Declaration')
         verbose_name_plural = _('PEP Declarations')
         ordering = ['-created_at']
+        indexes = [
+            # Paginação keyset (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='kyc_pep_created_id_idx'),
+            # Filtros is_pep / pep_type (listagem e resumo)
+            models.Index(fields=['is_pep', 'pep_type'], name='kyc_pep_is_pep_type_idx'),
+            models.Index(fields=['country'], name='kyc_pep_country_idx'),
+        ]
     
     def __str__(self):
         if self.is_pep:
@@ -214,6 +269,11 @@ class PEPDeclaration(models.Model):
         return f"Non-PEP: {self.kyc_profile.full_name}"
 
 
+def document_upload_to(instance, filename):
+    """Blob endereçado pelo SHA-256 do conteúdo (ver apps.kyc.storage)"""
+    return blob_name(instance.sha256)
+
+
 class KYCDocument(models.Model):
     """Documentos anexados ao processo KYC"""
     
@@ -229,10 +289,18 @@ class KYCDocument(models.Model):
     
     kyc_profile = models.ForeignKey(KYCProfile, on_delete=models.CASCADE, related_name='documents')
     document_type = models.CharField(max_length=20, choices=DOCUMENT_TYPES)
-    file = models.FileField(upload_to='kyc_documents/%Y/%m/%d/')
+    file = models.FileField(upload_to=document_upload_to, storage=get_document_storage, max_length=255)
     original_filename = models.CharField(max_length=255)
     file_size = models.PositiveIntegerField()
     mime_type = models.CharField(max_length=100)
+    # SHA-256 do conteúdo (hex), calculado na mesma leitura que detecta o tipo
+    sha256 = models.CharField(max_length=64, blank=True)
+    # Renditions geradas para o conteúdo ({'thumbnail': nome, 'preview': nome})
+    renditions = models.JSONField(default=dict, blank=True)
+    # Normalização da imagem (apps.kyc.normalize); o original só é mantido
+    # (blob referenciado por original_sha256) quando a política exige
+    normalized_at = models.DateTimeField(null=True, blank=True)
+    original_sha256 = models.CharField(max_length=64, blank=True)
     
     # OCR e processamento
     ocr_processed = models.BooleanField(default=False)
@@ -250,7 +318,262 @@ class KYCDocument(models.Model):
         verbose_name = _('KYC Document')
         verbose_name_plural = _('KYC Documents')
         ordering = ['-created_at']
+        indexes = [
+            # Paginação keyset (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='kyc_doc_created_id_idx'),
+            # Documentos obrigatórios por perfil (submit_for_review, completude)
+            models.Index(fields=['kyc_profile', 'document_type'], name='kyc_doc_profile_type_idx'),
+            models.Index(fields=['document_type', '-created_at'], name='kyc_doc_type_created_idx'),
+            models.Index(fields=['is_verified', '-created_at'], name='kyc_doc_verified_created_idx'),
+            # Documentos com o mesmo conteúdo (dedup, reaproveitamento de OCR)
+            models.Index(fields=['sha256'], name='kyc_doc_sha256_idx'),
+            # Parcial: apenas documentos ainda sem OCR
+            models.Index(
+                fields=['id'],
+                condition=models.Q(ocr_processed=False),
+                name='kyc_doc_ocr_pending_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.get_document_type_display()} - {self.kyc_profile.full_name}"
+    
+    def save(self, *args, **kwargs):
+        """
+        Arquivo novo: garante o SHA-256 e adquire a referência ao blob antes
+        de gravá-lo, na mesma transação (ver DocumentBlob)
+        Na troca do arquivo de um documento existente o hash é recalculado se
+        ainda for o do conteúdo anterior, e o blob anterior é liberado.
+        """
+        if not self.file or self.file._committed:
+            return super().save(*args, **kwargs)
+        
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                previous = KYCDocument.objects.filter(pk=self.pk).values('file', 'sha256').first()
+            if not self.sha256 or (previous and self.sha256 == previous['sha256']):
+                from .content import inspect_file
+                content = inspect_file(self.file)
+                self.sha256 = content.sha256
+                self.file_size = content.size
+            DocumentBlob.acquire(self.sha256, self.file.size)
+            super().save(*args, **kwargs)
+            if previous and previous['file'] != self.original_file_name:
+                DocumentBlob.release(previous['file'])
+    
+    @property
+    def original_file_name(self):
+        """Blob do arquivo original mantido após a normalização"""
+        return blob_name(self.original_sha256) if self.original_sha256 else None
+    
+    def get_processed_duplicate(self):
+        """Outro documento com o mesmo conteúdo e OCR já processado"""
+        if not self.sha256:
+            return None
+        return (
+            KYCDocument.objects
+            .filter(sha256=self.sha256, ocr_processed=True)
+            .exclude(pk=self.pk)
+            .only('ocr_text', 'ocr_confidence')
+            .first()
+        )
+
+
+class DocumentBlob(models.Model):
+    """
+    Contagem de referências de um blob do storage endereçado por conteúdo
+    Aquisição e liberação bloqueiam a linha do blob (select_for_update), então
+    um upload do mesmo conteúdo nunca reaproveita um blob que está sendo
+    removido: ou espera a remoção e grava de novo, ou a impede.
+    """
+    
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    size = models.PositiveIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    # Cópia comprimida na camada fria (ver apps.kyc.storage.TieredStorage)
+    archived_at = models.DateTimeField(null=True, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = _('Document Blob')
+        verbose_name_plural = _('Document Blobs')
+        indexes = [
+            models.Index(fields=['archived_at'], name='kyc_blob_archived_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.sha256} ({self.ref_count} refs)"
+    
+    @property
+    def name(self):
+        return blob_name(self.sha256)
+    
+    @classmethod
+    def acquire(cls, sha256, size, count=1):
+        """Registrar `count` novas referências (deve rodar dentro de uma transação)"""
+        blob, _created = cls.objects.select_for_update().get_or_create(
+            sha256=sha256, defaults={'size': size}
+        )
+        blob.ref_count = models.F('ref_count') + count
+        update_fields = ['ref_count', 'updated_at']
+        if blob.archived_at:
+            # Reaproveitado por um novo upload (o arquivo já voltou para a
+            # camada quente): sai do ciclo de remoção da cópia quente
+            blob.archived_at = None
+            update_fields.append('archived_at')
+        blob.save(update_fields=update_fields)
+        return blob
+    
+    @classmethod
+    def release(cls, name):
+        """
+        Liberar a referência ao arquivo `name`; remove o blob na última
+        A contagem cai na transação do chamador, mas os arquivos só são
+        removidos após o commit (ver purge): um rollback não perde conteúdo.
+        Arquivos fora do storage endereçado (legados) não são tocados.
+        """
+        if not is_blob_name(name):
+            return
+        sha256 = name.rsplit('/', 1)[-1]
+        with transaction.atomic():
+            blob = cls.objects.select_for_update().filter(sha256=sha256).first()
+            if blob is None:
+                return
+            if blob.ref_count > 1:
+                blob.ref_count = models.F('ref_count') - 1
+                blob.save(update_fields=['ref_count', 'updated_at'])
+                return
+            blob.ref_count = 0
+            blob.save(update_fields=['ref_count', 'updated_at'])
+            transaction.on_commit(partial(cls.purge, sha256))
+    
+    @classmethod
+    def purge(cls, sha256):
+        """
+        Remover arquivos e linha de um blob sem referências
+        Roda após o commit que zerou a contagem e confere de novo com o lock
+        adquirido: um upload do mesmo conteúdo nesse meio-tempo (que espera o
+        lock ou já readquiriu o blob) mantém os arquivos.
+        """
+        with transaction.atomic():
+            blob = cls.objects.select_for_update().filter(sha256=sha256, ref_count=0).first()
+            if blob is None:
+                return
+            storage = KYCDocument._meta.get_field('file').storage
+            for rendition in rendition_names(sha256):
+                storage.delete(rendition)
+            storage.delete(blob.name)
+            blob.delete()
+
+
+class DocumentUploadSession(models.Model):
+    """
+    Sessão de upload retomável (estilo tus) de um KYCDocument
+    Os bytes são anexados em ordem a um arquivo parcial em staging; `offset`
+    é a quantidade já persistida, então um cliente interrompido consulta o
+    offset e reenvia apenas o restante. Ao completar `upload_length` bytes o
+    documento é criado.
+    """
+    
+    STATUS_CHOICES = [
+        ('uploading', _('Uploading')),
+        ('completed', _('Completed')),
+        ('aborted', _('Aborted')),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kyc_profile = models.ForeignKey(KYCProfile, on_delete=models.CASCADE, related_name='upload_sessions')
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='kyc_upload_sessions')
+    document_type = models.CharField(max_length=20, choices=KYCDocument.DOCUMENT_TYPES)
+    original_filename = models.CharField(max_length=255)
+    mime_type = models.CharField(max_length=100)
+    
+    # Contabilidade do upload
+    upload_length = models.PositiveIntegerField()
+    offset = models.PositiveIntegerField(default=0)
+    checksum = models.CharField(max_length=64, blank=True, help_text=_('SHA-256 declared by the client (hex)'))
+    sha256 = models.CharField(max_length=64, blank=True)
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploading')
+    document = models.OneToOneField(
+        KYCDocument, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_session'
+    )
+    expires_at = models.DateTimeField()
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = _('Document Upload Session')
+        verbose_name_plural = _('Document Upload Sessions')
+        ordering = ['-created_at']
+        indexes = [
+            # Limpeza de sessões expiradas
+            models.Index(fields=['status', 'expires_at'], name='kyc_upload_status_exp_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.original_filename} ({self.offset}/{self.upload_length})"
+    
+    @property
+    def is_complete(self):
+        return self.offset >= self.upload_length
+
 
+class OCRJob(models.Model):
+    """Processamento assíncrono de OCR de um documento (consultável pelo id)"""
+    
+    STATUS_CHOICES = [
+        ('queued', _('Queued')),
+        ('running', _('Running')),
+        ('completed', _('Completed')),
+        ('failed', _('Failed')),
+    ]
+    ACTIVE_STATUSES = ('queued', 'running')
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    document = models.ForeignKey(KYCDocument, on_delete=models.CASCADE, related_name='ocr_jobs')
+    # Conteúdo processado; jobs do mesmo hash compartilham o resultado
+    sha256 = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    task_id = models.CharField(max_length=255, blank=True)
+    pages = models.PositiveIntegerField(null=True, blank=True)
+    reused = models.BooleanField(default=False, help_text=_('Result copied from identical content'))
+    error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = _('OCR Job')
+        verbose_name_plural = _('OCR Jobs')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['document', 'status'], name='kyc_ocrjob_doc_status_idx'),
+        ]
+    
+    def __str__(self):
+        return f"OCR {self.document_id} ({self.status})"
+    
+    @classmethod
+    def enqueue(cls, document):
+        """
+        Enfileirar OCR do documento; reaproveita um job ativo existente
+        A tarefa é publicada após o commit para sempre encontrar o job.
+        Retorna (job, created).
+        """
+        from .tasks import process_document_ocr
+        
+        with transaction.atomic():
+            # Lock do documento serializa pedidos concorrentes
+            list(KYCDocument.objects.select_for_update().filter(pk=document.pk).values_list('pk', flat=True))
+            job = cls.objects.filter(document=document, status__in=cls.ACTIVE_STATUSES).first()
+            if job is not None:
+                return job, False
+            job = cls.objects.create(document=document, sha256=document.sha256)
+            transaction.on_commit(lambda: process_document_ocr.delay(str(job.pk)))
+        return job, True
@@ -0,0 +1,50 @@
+"""
+Normalização de imagens de documentos KYC
+Fotos de celular chegam com 12MP, orientação só no EXIF e metadados (GPS,
+modelo do aparelho). A normalização roda fora do request, no próprio worker
+(apps.kyc.tasks.normalize_document): aplica a orientação, descarta os
+metadados, reduz para uma resolução suficiente para OCR e recomprime como
+JPEG. Sem dependências do Django.
+"""
+
+import io
+from dataclasses import dataclass
+
+from PIL import Image, ImageOps
+
+NORMALIZABLE_MIME_TYPES = {'image/jpeg', 'image/png'}
+OUTPUT_MIME_TYPE = 'image/jpeg'
+OUTPUT_FORMAT = 'JPEG'
+
+
+@dataclass
+class NormalizedImage:
+    data: bytes
+    width: int
+    height: int
+
+
+def is_normalizable(mime_type):
+    return mime_type in NORMALIZABLE_MIME_TYPES
+
+
+def normalize_image(path, max_dimension, quality):
+    """
+    Normalizar a imagem em `path`
+    O maior lado fica com no máximo `max_dimension` pixels; nada é ampliado.
+    O JPEG é gravado sem EXIF/ICC, então nenhum metadado original sobrevive.
+    """
+    with Image.open(path) as source:
+        image = ImageOps.exif_transpose(source)
+        if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+            # Transparência sobre fundo branco (JPEG não tem canal alfa)
+            rgba = image.convert('RGBA')
+            image = Image.new('RGB', rgba.size, (255, 255, 255))
+            image.paste(rgba, mask=rgba.getchannel('A'))
+        elif image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+
+        buffer = io.BytesIO()
+        image.save(buffer, OUTPUT_FORMAT, quality=quality, optimize=True)
+        return NormalizedImage(buffer.getvalue(), image.width, image.height)
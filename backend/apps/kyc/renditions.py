@@ -0,0 +1,99 @@
+"""
+Renditions (miniatura e preview) de documentos KYC
+Gerados fora do request (apps.kyc.tasks.generate_document_renditions) e
+gravados ao lado do blob original, com o nome derivado do SHA-256
+(`kyc_blobs/ab/cd/<sha256>.thumbnail.jpg`): documentos com o mesmo conteúdo
+compartilham os mesmos arquivos e nada é gerado duas vezes. A primeira
+página de PDFs escaneados usa a imagem embutida na página (sem rasterizador
+externo); PDFs só com texto não têm rendition.
+"""
+
+import io
+
+from PIL import Image, ImageOps
+
+from .storage import blob_name
+
+# Do maior para o menor: cada rendition é reduzida a partir da anterior
+RENDITIONS = {
+    'preview': {'size': (1280, 1280), 'quality': 82},
+    'thumbnail': {'size': (240, 240), 'quality': 75},
+}
+
+RENDITION_FORMAT = 'JPEG'
+RENDITION_EXTENSION = 'jpg'
+RENDITION_CONTENT_TYPE = 'image/jpeg'
+
+
+def rendition_name(sha256, rendition):
+    return f'{blob_name(sha256)}.{rendition}.{RENDITION_EXTENSION}'
+
+
+def rendition_names(sha256):
+    return [rendition_name(sha256, rendition) for rendition in RENDITIONS]
+
+
+def is_renderable(mime_type):
+    return mime_type.startswith('image/') or mime_type == 'application/pdf'
+
+
+def open_source_image(fh, mime_type):
+    """Imagem de origem: o próprio arquivo ou a maior imagem da 1ª página do PDF"""
+    if mime_type.startswith('image/'):
+        image = Image.open(fh)
+        image.load()
+        return image
+
+    if mime_type == 'application/pdf':
+        from PyPDF2 import PdfReader
+
+        reader = PdfReader(fh)
+        if not reader.pages:
+            return None
+        images = list(reader.pages[0].images)
+        if not images:
+            return None
+        largest = max(images, key=lambda embedded: len(embedded.data))
+        image = Image.open(io.BytesIO(largest.data))
+        image.load()
+        return image
+
+    return None
+
+
+def render(image, size, quality):
+    """Reduzir mantendo a proporção e codificar como JPEG progressivo"""
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    image.thumbnail(size, Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    image.save(buffer, RENDITION_FORMAT, quality=quality, optimize=True, progressive=True)
+    return image, buffer.getvalue()
+
+
+def ensure_renditions(document, storage):
+    """
+    Gerar as renditions ausentes do conteúdo do documento
+    Retorna {rendition: nome no storage} (vazio se o tipo não tem preview).
+    """
+    from django.core.files.base import ContentFile
+
+    if not document.sha256 or not document.file or not is_renderable(document.mime_type):
+        return {}
+
+    names = {rendition: rendition_name(document.sha256, rendition) for rendition in RENDITIONS}
+    missing = [rendition for rendition, name in names.items() if not storage.exists(name)]
+    if not missing:
+        return names
+
+    with document.file.open('rb') as fh:
+        image = open_source_image(fh, document.mime_type)
+    if image is None:
+        return {}
+
+    for rendition, spec in RENDITIONS.items():
+        image, data = render(image, spec['size'], spec['quality'])
+        if rendition in missing:
+            storage.save(names[rendition], ContentFile(data))
+    return names
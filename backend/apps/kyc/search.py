@@ -0,0 +1,80 @@
+"""
+Busca textual do app KYC
+No PostgreSQL, os lookups icontains do SearchFilter (UPPER(col::text) LIKE ...)
+são atendidos pelos índices GIN pg_trgm criados na migração 0002, e os
+resultados ganham um rank de similaridade. Em outros bancos (SQLite nos
+testes) a busca continua funcionando por varredura, com rank constante.
+
+Cada campo de busca vira uma subconsulta de pks sobre uma única tabela,
+combinadas por UNION: um OR entre colunas de tabelas diferentes (via JOIN)
+não consegue usar os índices trigram de cada tabela e cai em seq scan.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connection
+from django.db.models import FloatField, Value
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.functions import Greatest
+from rest_framework import filters
+
+SEARCH_RANK_FIELD = 'search_rank'
+
+
+def supports_trigram_search():
+    """pg_trgm só está disponível no PostgreSQL"""
+    return connection.vendor == 'postgresql'
+
+
+def trigram_rank(term, fields):
+    """Expressão de rank: maior similaridade de palavra entre os campos"""
+    from django.contrib.postgres.search import TrigramWordSimilarity
+
+    similarities = [TrigramWordSimilarity(term, field) for field in fields]
+    if len(similarities) == 1:
+        return similarities[0]
+    return Greatest(*similarities)
+
+
+def matching_pks(model, lookup, term):
+    """
+    Subconsulta com os pks de `model` que casam com `lookup`
+    Relações diretas (FK/OneToOne) viram `<fk>__in` sobre a tabela
+    relacionada, para que cada nível filtre só a própria tabela
+    """
+    name, _, rest = lookup.partition(LOOKUP_SEP)
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        field = None
+    if field is not None and rest and field.is_relation and field.concrete and not field.many_to_many:
+        condition = {f'{name}__in': matching_pks(field.related_model, rest, term)}
+    else:
+        condition = {lookup: term}
+    return model._base_manager.filter(**condition).order_by().values('pk')
+
+
+class TrigramSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter com rank de similaridade trigram
+    Anota `search_rank` para permitir `?ordering=-search_rank`; sem termo de
+    busca o rank é constante, então a ordenação por ele não falha
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+        if search_fields and search_terms:
+            lookups = [self.construct_search(str(field), queryset) for field in search_fields]
+            # Todo termo precisa casar em algum campo: um UNION de pks por termo
+            for search_term in search_terms:
+                first, *others = [matching_pks(queryset.model, lookup, search_term) for lookup in lookups]
+                queryset = queryset.filter(pk__in=first.union(*others) if others else first)
+
+        term = ' '.join(self.get_search_terms(request))
+        if search_fields and term and supports_trigram_search():
+            fields = [str(field).lstrip(''.join(self.lookup_prefixes)) for field in search_fields]
+            rank = trigram_rank(term, fields)
+        else:
+            rank = Value(0.0, output_field=FloatField())
+
+        return queryset.annotate(**{SEARCH_RANK_FIELD: rank})
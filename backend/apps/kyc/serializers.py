@@ -2,10 +2,48 @@
 Serializers do app KYC
 """
 
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
-from .models import KYCProfile, UBODeclaration, PEPDeclaration, KYCDocument
+from .models import (
+    KYCProfile, UBODeclaration, PEPDeclaration, KYCDocument, DocumentBlob, DocumentUploadSession, OCRJob
+)
+from .content import ALLOWED_DOCUMENT_MIME_TYPES, inspect_file
+from .storage import TieredStorage, blob_name
+from . import uploads
+
+
+def inspect_document_file(value):
+    """
+    Validar um arquivo de documento pelo conteúdo real
+    Uma única leitura em blocos calcula SHA-256, tamanho e tipo (magic bytes);
+    `content_type` e `size` enviados pelo cliente não são confiáveis.
+    Retorna os metadados do KYCDocument (file_size, mime_type, sha256).
+    """
+    # Validar tamanho (10MB max) antes de ler o conteúdo
+    if value.size > uploads.get_max_document_size():
+        raise serializers.ValidationError(_('File size cannot exceed 10MB'))
+    
+    content = inspect_file(value)
+    if content.size > uploads.get_max_document_size():
+        raise serializers.ValidationError(_('File size cannot exceed 10MB'))
+    
+    # Validar tipo de arquivo
+    mime_type = content.mime_type(declared=value.content_type)
+    if mime_type not in ALLOWED_DOCUMENT_MIME_TYPES:
+        raise serializers.ValidationError(_('File type not allowed'))
+    
+    return {
+        'file_size': content.size,
+        'mime_type': mime_type,
+        'sha256': content.sha256,
+    }
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -97,59 +135,286 @@ class KYCDocumentSerializer(serializers.ModelSerializer):
     """Serializer para documentos KYC"""
     
     file_url = serializers.SerializerMethodField()
+    download_url = serializers.SerializerMethodField()
+    thumbnail_url = serializers.SerializerMethodField()
+    preview_url = serializers.SerializerMethodField()
     
     class Meta:
         model = KYCDocument
         fields = [
             'id', 'kyc_profile', 'document_type', 'file', 'file_url',
-            'original_filename', 'file_size', 'mime_type', 'ocr_processed',
-            'ocr_text', 'ocr_confidence', 'is_verified', 'verification_notes',
+            'download_url', 'thumbnail_url', 'preview_url',
+            'original_filename', 'file_size', 'mime_type', 'sha256', 'normalized_at',
+            'ocr_processed', 'ocr_text', 'ocr_confidence', 'is_verified', 'verification_notes',
             'created_at', 'updated_at'
         ]
         read_only_fields = [
-            'id', 'file_size', 'mime_type', 'ocr_processed', 'ocr_text',
+            'id', 'file_size', 'mime_type', 'sha256', 'normalized_at', 'ocr_processed', 'ocr_text',
             'ocr_confidence', 'created_at', 'updated_at'
         ]
     
     def get_file_url(self, obj):
-        """Obter URL do arquivo"""
-        if obj.file:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.file.url)
-            return obj.file.url
-        return None
+        """
+        URL do arquivo para exibição no navegador
+        Passa pelo download autenticado: a URL de mídia não traz de volta
+        blobs arquivados na camada fria
+        """
+        url = self._get_download_url(obj)
+        return f'{url}?inline=1' if url else None
+    
+    def get_download_url(self, obj):
+        """Download autenticado (Range, ETag e X-Accel-Redirect)"""
+        return self._get_download_url(obj)
+    
+    def get_thumbnail_url(self, obj):
+        """Miniatura para listagens (None enquanto não gerada)"""
+        return self._get_rendition_url(obj, 'thumbnail')
+    
+    def get_preview_url(self, obj):
+        """Preview em resolução de tela"""
+        return self._get_rendition_url(obj, 'preview')
+    
+    def _get_download_url(self, obj):
+        if not obj.file or obj.pk is None:
+            return None
+        return self._absolute_url(reverse('kyc:kycdocument-download', kwargs={'pk': obj.pk}))
+    
+    def _get_rendition_url(self, obj, rendition):
+        if not (obj.renditions or {}).get(rendition) or obj.pk is None:
+            return None
+        return self._absolute_url(
+            reverse('kyc:kycdocument-rendition', kwargs={'pk': obj.pk, 'rendition': rendition})
+        )
+    
+    def _absolute_url(self, url):
+        request = self.context.get('request')
+        if request:
+            return request.build_absolute_uri(url)
+        return url
     
     def validate_file(self, value):
-        """Validar arquivo"""
-        # Validar tamanho (10MB max)
-        max_size = 10 * 1024 * 1024  # 10MB
-        if value.size > max_size:
-            raise serializers.ValidationError(_('File size cannot exceed 10MB'))
-        
-        # Validar tipo de arquivo
-        allowed_types = [
-            'application/pdf',
-            'image/jpeg',
-            'image/png',
-            'image/gif',
-            'application/msword',
-            'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-        ]
-        
-        if value.content_type not in allowed_types:
-            raise serializers.ValidationError(_('File type not allowed'))
-        
+        """Validar arquivo pelo conteúdo real (ver inspect_document_file)"""
+        self._file_content = inspect_document_file(value)
         return value
     
     def create(self, validated_data):
-        """Criar documento com metadados"""
+        """Criar documento com metadados extraídos do conteúdo"""
         file = validated_data['file']
         validated_data['original_filename'] = file.name
-        validated_data['file_size'] = file.size
-        validated_data['mime_type'] = file.content_type
+        validated_data.update(self._file_content)
         
         return super().create(validated_data)
+    
+    def update(self, instance, validated_data):
+        """
+        Troca do arquivo: metadados do conteúdo novo e descarte do que
+        derivava do anterior (renditions, normalização, OCR)
+        """
+        if 'file' not in validated_data:
+            return super().update(instance, validated_data)
+        
+        from .tasks import enqueue_document_processing
+        
+        file = validated_data['file']
+        validated_data['original_filename'] = file.name
+        validated_data.update(self._file_content)
+        validated_data.update(
+            renditions={}, normalized_at=None, original_sha256='',
+            ocr_processed=False, ocr_text='', ocr_confidence=None,
+        )
+        previous_original = instance.original_file_name
+        
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+            if previous_original:
+                DocumentBlob.release(previous_original)
+            enqueue_document_processing(instance)
+        return instance
+
+
+class KYCDocumentBatchUploadSerializer(serializers.Serializer):
+    """
+    Upload de vários documentos de um perfil em uma requisição
+    `files` e `document_types` são listas alinhadas pela posição. Os arquivos
+    são validados em paralelo (hash e libmagic liberam o GIL) e os válidos
+    inseridos com um único bulk_create; o resultado informa cada arquivo.
+    Os blobs são gravados antes da transação, e os gravados por esta
+    requisição são removidos se ela for revertida.
+    """
+    
+    files = serializers.ListField(child=serializers.FileField(), allow_empty=False)
+    document_types = serializers.ListField(
+        child=serializers.ChoiceField(choices=KYCDocument.DOCUMENT_TYPES), allow_empty=False
+    )
+    
+    def validate(self, attrs):
+        max_files = getattr(settings, 'KYC_BATCH_UPLOAD_MAX_FILES', 10)
+        if len(attrs['files']) != len(attrs['document_types']):
+            raise serializers.ValidationError(_('Each file needs a document type'))
+        if len(attrs['files']) > max_files:
+            raise serializers.ValidationError(
+                _('At most %(count)d files per batch') % {'count': max_files}
+            )
+        return attrs
+    
+    def create(self, validated_data):
+        """Retorna a lista de resultados por arquivo, na ordem recebida"""
+        from .tasks import enqueue_document_processing
+        
+        kyc_profile = validated_data['kyc_profile']
+        files = validated_data['files']
+        
+        with ThreadPoolExecutor(max_workers=min(len(files), 4)) as pool:
+            inspections = list(pool.map(self._inspect, files))
+        
+        results = []
+        documents = []
+        contents = {}
+        for index, (file, document_type, (metadata, errors)) in enumerate(
+            zip(files, validated_data['document_types'], inspections)
+        ):
+            result = {'index': index, 'filename': file.name, 'document_type': document_type}
+            if errors:
+                result.update(status='error', errors=errors)
+            else:
+                document = KYCDocument(
+                    kyc_profile=kyc_profile,
+                    document_type=document_type,
+                    file=blob_name(metadata['sha256']),
+                    original_filename=file.name,
+                    **metadata
+                )
+                documents.append(document)
+                contents.setdefault(document.sha256, file)
+                result.update(status='created', document=document)
+            results.append(result)
+        
+        if documents:
+            storage = KYCDocument._meta.get_field('file').storage
+            # Fora da transação: gravar arquivos com linhas bloqueadas seguraria os locks
+            written = []
+            for sha256, file in contents.items():
+                name = self._store_blob(storage, sha256, file)
+                if name:
+                    written.append(name)
+            try:
+                with transaction.atomic():
+                    # bulk_create não chama save() nem post_save: referências aos
+                    # blobs adquiridas aqui e o processamento pós-upload publicado abaixo
+                    for sha256, count in Counter(document.sha256 for document in documents).items():
+                        size = next(document.file_size for document in documents if document.sha256 == sha256)
+                        DocumentBlob.acquire(sha256, size, count=count)
+                        # Blob removido por uma liberação concorrente antes do lock
+                        name = self._store_blob(storage, sha256, contents[sha256])
+                        if name:
+                            written.append(name)
+                    KYCDocument.objects.bulk_create(documents)
+                    for document in documents:
+                        enqueue_document_processing(document)
+            except Exception:
+                self._remove_blobs(storage, written)
+                raise
+        
+        context = self.context
+        for result in results:
+            if 'document' in result:
+                result['document'] = KYCDocumentSerializer(result['document'], context=context).data
+        return results
+    
+    @staticmethod
+    def _inspect(file):
+        try:
+            return inspect_document_file(file), None
+        except serializers.ValidationError as e:
+            return None, e.detail
+    
+    @staticmethod
+    def _store_blob(storage, sha256, file):
+        """Gravar o blob se ainda não existir; retorna o nome quando gravado"""
+        name = blob_name(sha256)
+        if storage.exists(name):
+            if isinstance(storage, TieredStorage):
+                # Blob arquivado reaproveitado volta para a camada quente
+                storage.fetch(name)
+            return None
+        storage.save(name, file)
+        return name
+    
+    @staticmethod
+    def _remove_blobs(storage, names):
+        """Remover blobs gravados por um lote revertido que ninguém referencia"""
+        for name in names:
+            with transaction.atomic():
+                sha256 = name.rsplit('/', 1)[-1]
+                if not DocumentBlob.objects.select_for_update().filter(sha256=sha256).exists():
+                    storage.delete(name)
+
+
+class OCRJobSerializer(serializers.ModelSerializer):
+    """Serializer para acompanhamento de jobs de OCR"""
+    
+    class Meta:
+        model = OCRJob
+        fields = [
+            'id', 'document', 'status', 'pages', 'reused', 'error',
+            'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
+
+
+class DocumentUploadSessionSerializer(serializers.ModelSerializer):
+    """Serializer para sessões de upload retomável de documentos"""
+    
+    filename = serializers.CharField(source='original_filename', max_length=255)
+    
+    class Meta:
+        model = DocumentUploadSession
+        fields = [
+            'id', 'kyc_profile', 'document_type', 'filename', 'mime_type',
+            'upload_length', 'offset', 'checksum', 'sha256', 'status',
+            'document', 'expires_at', 'created_at', 'updated_at'
+        ]
+        read_only_fields = [
+            'id', 'offset', 'sha256', 'status', 'document', 'expires_at',
+            'created_at', 'updated_at'
+        ]
+    
+    def validate_kyc_profile(self, value):
+        """Usuários comuns só enviam documentos para o próprio perfil"""
+        request = self.context.get('request')
+        if request and not request.user.is_staff and value.user_id != request.user.id:
+            raise serializers.ValidationError(_('Invalid KYC profile'))
+        return value
+    
+    def validate_mime_type(self, value):
+        if value not in ALLOWED_DOCUMENT_MIME_TYPES:
+            raise serializers.ValidationError(_('File type not allowed'))
+        return value
+    
+    def validate_upload_length(self, value):
+        # Rejeitado antes de qualquer byte ser enviado
+        if value > uploads.get_max_document_size():
+            raise serializers.ValidationError(_('File size cannot exceed 10MB'))
+        if value == 0:
+            raise serializers.ValidationError(_('File is empty'))
+        return value
+    
+    def validate_checksum(self, value):
+        value = value.lower()
+        if value and (len(value) != 64 or any(c not in '0123456789abcdef' for c in value)):
+            raise serializers.ValidationError(_('Checksum must be a hex SHA-256 digest'))
+        return value
+    
+    def create(self, validated_data):
+        return uploads.create_session(
+            user=self.context['request'].user,
+            kyc_profile=validated_data['kyc_profile'],
+            document_type=validated_data['document_type'],
+            filename=validated_data['original_filename'],
+            mime_type=validated_data['mime_type'],
+            upload_length=validated_data['upload_length'],
+            checksum=validated_data.get('checksum', ''),
+        )
 
 
 class KYCProfileSerializer(serializers.ModelSerializer):
@@ -181,6 +446,10 @@ class KYCProfileSerializer(serializers.ModelSerializer):
             'reviewed_at', 'completion_percentage', 'ubo_validation_status'
         ]
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._ubo_validation_cache = {}
+    
     def get_completion_percentage(self, obj):
         """Calcular percentual de completude"""
         required_fields = [
@@ -195,12 +464,14 @@ class KYCProfileSerializer(serializers.ModelSerializer):
                 completed_fields += 1
         
         # Verificar documentos obrigatórios
+        # .all() lê do cache de prefetch do viewset; values_list() geraria
+        # uma query por perfil
         required_docs = ['passport', 'utility_bill']
-        uploaded_docs = obj.documents.values_list('document_type', flat=True)
+        uploaded_docs = {doc.document_type for doc in obj.documents.all()}
         docs_complete = all(doc in uploaded_docs for doc in required_docs)
         
         # Verificar UBO
-        ubo_validation = UBODeclaration.validate_ubo_declarations(obj)
+        ubo_validation = self._get_ubo_validation(obj)
         ubo_complete = ubo_validation['is_valid']
         
         # Verificar PEP
@@ -216,7 +487,16 @@ class KYCProfileSerializer(serializers.ModelSerializer):
     
     def get_ubo_validation_status(self, obj):
         """Obter status de validação UBO"""
-        return UBODeclaration.validate_ubo_declarations(obj)
+        return self._get_ubo_validation(obj)
+    
+    def _get_ubo_validation(self, obj):
+        """
+        Validação UBO memoizada por perfil durante a serialização
+        completion_percentage e ubo_validation_status compartilham o resultado
+        """
+        if obj.pk not in self._ubo_validation_cache:
+            self._ubo_validation_cache[obj.pk] = UBODeclaration.validate_ubo_declarations(obj)
+        return self._ubo_validation_cache[obj.pk]
     
     def validate_annual_income(self, value):
         """Validar renda anual"""
@@ -0,0 +1,51 @@
+"""
+Signals do app KYC
+"""
+
+from django.contrib.auth.models import User
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .cache import invalidate_pep_summary
+from .models import KYCProfile, PEPDeclaration, KYCDocument, DocumentBlob
+
+
+@receiver(pre_save, sender=KYCProfile)
+def copy_user_email(sender, instance, **kwargs):
+    """Manter a cópia do e-mail usada pela busca"""
+    if instance.user_id:
+        instance.user_email = instance.user.email
+
+
+@receiver(post_save, sender=User)
+def sync_profile_user_email(sender, instance, **kwargs):
+    """Propagar mudanças de e-mail do usuário para o perfil KYC"""
+    KYCProfile.objects.filter(user=instance).exclude(user_email=instance.email).update(
+        user_email=instance.email
+    )
+
+
+@receiver(post_save, sender=PEPDeclaration)
+@receiver(post_delete, sender=PEPDeclaration)
+def invalidate_pep_summary_on_change(sender, **kwargs):
+    """Invalidar resumos PEP cacheados quando declarações mudam"""
+    invalidate_pep_summary()
+
+
+@receiver(post_delete, sender=KYCDocument)
+def release_document_blob(sender, instance, **kwargs):
+    """Liberar a referência ao blob; o arquivo sai com a última referência"""
+    if instance.file:
+        DocumentBlob.release(instance.file.name)
+    if instance.original_file_name:
+        DocumentBlob.release(instance.original_file_name)
+
+
+@receiver(post_save, sender=KYCDocument)
+def process_uploaded_document(sender, instance, created, **kwargs):
+    """Normalização (se ativa) e miniatura/preview em background após o upload"""
+    if not created:
+        return
+    from .tasks import enqueue_document_processing
+    
+    enqueue_document_processing(instance)
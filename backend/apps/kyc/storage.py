@@ -0,0 +1,215 @@
+"""
+Storage de documentos KYC endereçado por conteúdo
+O arquivo de cada KYCDocument é gravado como blob nomeado pelo SHA-256
+(`kyc_blobs/ab/cd/<sha256>`); uploads repetidos do mesmo conteúdo apontam
+para o mesmo blob em vez de gerar uma nova cópia. A contagem de referências
+fica em DocumentBlob (apps.kyc.models), que remove o blob junto com a
+última referência.
+
+TieredStorage acrescenta uma camada fria: blobs de perfis encerrados são
+comprimidos para outro diretório (apps.kyc.tasks.archive_cold_documents) e
+voltam para a camada quente no primeiro acesso.
+"""
+
+import gzip
+import os
+import shutil
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.utils.module_loading import import_string
+
+BLOB_PREFIX = 'kyc_blobs'
+
+
+def blob_name(sha256):
+    """Caminho do blob (dois níveis de diretório para não saturar um só)"""
+    return f'{BLOB_PREFIX}/{sha256[:2]}/{sha256[2:4]}/{sha256}'
+
+
+def is_blob_name(name):
+    return bool(name) and name.startswith(f'{BLOB_PREFIX}/')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    FileSystemStorage que não renomeia nem reescreve blobs existentes
+    Mesmo nome implica mesmo conteúdo, então gravar um blob que já existe é
+    uma operação nula; gravações concorrentes do mesmo blob terminam com um
+    rename atômico. Outros caminhos (documentos legados) seguem o padrão.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        if is_blob_name(name):
+            return name
+        return super().get_available_name(name, max_length=max_length)
+
+    def _save(self, name, content):
+        if not is_blob_name(name):
+            return super()._save(name, content)
+        if self.exists(name):
+            return name
+
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        if self.directory_permissions_mode is not None:
+            old_umask = os.umask(0o777 & ~self.directory_permissions_mode)
+            try:
+                os.makedirs(directory, self.directory_permissions_mode, exist_ok=True)
+            finally:
+                os.umask(old_umask)
+        else:
+            os.makedirs(directory, exist_ok=True)
+
+        if hasattr(content, 'temporary_file_path'):
+            # Arquivo já em disco (upload temporário ou staging): move sem copiar
+            file_move_safe(content.temporary_file_path(), full_path, allow_overwrite=True)
+        else:
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+            try:
+                with os.fdopen(fd, 'wb') as fh:
+                    for chunk in content.chunks():
+                        fh.write(chunk)
+                os.replace(tmp_path, full_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+        return name
+
+
+def _atomic_copy(source, target_path, open_target=open):
+    """Copiar o stream `source` para `target_path` via temporário + rename"""
+    directory = os.path.dirname(target_path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    os.close(fd)
+    try:
+        with open_target(tmp_path, 'wb') as fh:
+            shutil.copyfileobj(source, fh, 1024 * 1024)
+        os.replace(tmp_path, target_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class TieredStorage(ContentAddressedStorage):
+    """
+    Storage endereçado por conteúdo com camada quente e fria
+    A camada quente é o MEDIA_ROOT; a fria guarda `<blob>.gz` em
+    KYC_STORAGE_TIERING['COLD_ROOT'] (diretório local, substituível por um
+    volume de arquivamento). Qualquer acesso ao conteúdo (open, path, size)
+    de um blob só frio o descomprime de volta para a camada quente; a cópia
+    fria é mantida, então arquivar de novo é só remover a cópia quente.
+    url() não passa pelo storage: arquivos de documentos são expostos pelas
+    views autenticadas (download/renditions), que leem por aqui.
+    """
+
+    @property
+    def cold_location(self):
+        return os.path.abspath(get_tiering_config()['COLD_ROOT'])
+
+    def hot_path(self, name):
+        return super().path(name)
+
+    def cold_path(self, name):
+        return os.path.join(self.cold_location, f'{name}.gz')
+
+    def is_hot(self, name):
+        return os.path.exists(self.hot_path(name))
+
+    def is_cold(self, name):
+        return is_blob_name(name) and os.path.exists(self.cold_path(name))
+
+    def exists(self, name):
+        return os.path.lexists(self.hot_path(name)) or self.is_cold(name)
+
+    def _save(self, name, content):
+        # Novo upload de um conteúdo arquivado: volta para a camada quente
+        if self.fetch(name):
+            return name
+        return super()._save(name, content)
+
+    def path(self, name):
+        self.fetch(name)
+        return self.hot_path(name)
+
+    def delete(self, name):
+        if not name:
+            raise ValueError('The name must be given to delete().')
+        for path in (self.hot_path(name), self.cold_path(name)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def fetch(self, name):
+        """Trazer o blob da camada fria; retorna True se foi descomprimido"""
+        if self.is_hot(name) or not self.is_cold(name):
+            return False
+        with gzip.open(self.cold_path(name), 'rb') as source:
+            _atomic_copy(source, self.hot_path(name))
+        return True
+
+    def archive(self, name):
+        """
+        Mover o blob para a camada fria
+        Retorna os bytes liberados na camada quente (0 se já estava frio).
+        """
+        if not is_blob_name(name) or not self.is_hot(name):
+            return 0
+        hot_path = self.hot_path(name)
+        if not self.is_cold(name):
+            level = get_tiering_config()['COMPRESSION_LEVEL']
+            with open(hot_path, 'rb') as source:
+                _atomic_copy(
+                    source,
+                    self.cold_path(name),
+                    lambda path, mode: gzip.open(path, mode, compresslevel=level),
+                )
+        size = os.path.getsize(hot_path)
+        os.remove(hot_path)
+        return size
+
+    def evict(self, name, max_age):
+        """Remover a cópia quente de um blob arquivado sem acesso há `max_age` s"""
+        if not self.is_cold(name) or not self.is_hot(name):
+            return 0
+        hot_path = self.hot_path(name)
+        stat = os.stat(hot_path)
+        if time.time() - max(stat.st_atime, stat.st_mtime) < max_age:
+            return 0
+        os.remove(hot_path)
+        return stat.st_size
+
+
+TIERING_DEFAULTS = {
+    'COLD_ROOT': '',
+    # Dias desde a decisão (aprovado/rejeitado) até o arquivamento
+    'ARCHIVE_AFTER_DAYS': 90,
+    # Cópias quentes de blobs arquivados sem acesso por este tempo (s) saem de novo
+    'HOT_CACHE_TTL': 7 * 24 * 3600,
+    'COMPRESSION_LEVEL': 6,
+    'BATCH_SIZE': 500,
+}
+
+
+def get_tiering_config():
+    config = {**TIERING_DEFAULTS, **getattr(settings, 'KYC_STORAGE_TIERING', {})}
+    if not config['COLD_ROOT']:
+        # Ao lado do MEDIA_ROOT (camada quente)
+        config['COLD_ROOT'] = os.path.join(os.path.dirname(os.path.abspath(settings.MEDIA_ROOT)), 'cold_storage')
+    return config
+
+
+def get_document_storage():
+    """Storage do campo KYCDocument.file (settings.KYC_DOCUMENT_STORAGE)"""
+    path = getattr(settings, 'KYC_DOCUMENT_STORAGE', 'apps.kyc.storage.TieredStorage')
+    return import_string(path)()
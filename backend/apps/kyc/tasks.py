@@ -0,0 +1,321 @@
+"""
+Tarefas Celery do app KYC
+Publicadas na fila `kyc` pelo roteamento `apps.kyc.*` (config/celery.py).
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import partial
+
+from celery import shared_task
+from celery.exceptions import MaxRetriesExceededError
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import normalize, ocr, renditions
+from .models import KYCDocument, DocumentBlob, OCRJob
+from .storage import TieredStorage, blob_name, get_tiering_config
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    # Threads do pool para páginas de PDF (1 desativa o pool)
+    'PAGE_WORKERS': 4,
+    # Idiomas do Tesseract (ex.: 'por+eng')
+    'LANG': 'eng',
+    # Validade (s) do lock por conteúdo; cobre o OCR mais longo esperado
+    'LOCK_TIMEOUT': 15 * 60,
+    # Espera (s) antes de tentar de novo quando o mesmo conteúdo está em processamento
+    'LOCK_RETRY_DELAY': 10,
+}
+
+NORMALIZATION_DEFAULTS = {
+    # Desativada por padrão: o arquivo enviado é mantido como veio
+    'ENABLED': False,
+    # Maior lado (px) após a redução; ~300 dpi em A4, suficiente para OCR
+    'MAX_DIMENSION': 2480,
+    'JPEG_QUALITY': 85,
+    # Tipos de documento cujo arquivo original deve ser mantido (política de retenção)
+    'KEEP_ORIGINAL_TYPES': [],
+}
+
+# Perfis encerrados: documentos candidatos à camada fria
+ARCHIVABLE_PROFILE_STATUSES = ['approved', 'rejected']
+
+
+def get_ocr_config():
+    return {**DEFAULTS, **getattr(settings, 'KYC_OCR', {})}
+
+
+def get_normalization_config():
+    return {**NORMALIZATION_DEFAULTS, **getattr(settings, 'KYC_NORMALIZATION', {})}
+
+
+def enqueue_document_processing(document):
+    """
+    Processamento de um documento recém-criado, publicado após o commit
+    Imagens passam pela normalização (quando ativa), que gera as renditions
+    ao final; os demais tipos renderizáveis vão direto para as renditions.
+    """
+    if not document.sha256:
+        return
+    if get_normalization_config()['ENABLED'] and normalize.is_normalizable(document.mime_type):
+        transaction.on_commit(partial(normalize_document.delay, document.pk))
+    elif renditions.is_renderable(document.mime_type):
+        transaction.on_commit(partial(generate_document_renditions.delay, document.pk))
+
+
+@contextmanager
+def local_document_path(document):
+    """Caminho local do arquivo; storages remotos são copiados para um temporário"""
+    try:
+        path = document.file.path
+    except NotImplementedError:
+        path = None
+    if path:
+        yield path
+        return
+
+    suffix = os.path.splitext(document.original_filename)[1]
+    with tempfile.NamedTemporaryFile(suffix=suffix) as tmp:
+        with document.file.open('rb') as source:
+            shutil.copyfileobj(source, tmp)
+        tmp.flush()
+        yield tmp.name
+
+
+def store_ocr_result(document, text, confidence):
+    """Gravar o resultado em todos os documentos pendentes com o mesmo conteúdo"""
+    targets = Q(pk=document.pk)
+    if document.sha256:
+        targets |= Q(sha256=document.sha256, ocr_processed=False)
+    return KYCDocument.objects.filter(targets).update(
+        ocr_processed=True,
+        ocr_text=text,
+        ocr_confidence=confidence,
+        updated_at=timezone.now(),
+    )
+
+
+def _finish_job(job_id, status, **fields):
+    OCRJob.objects.filter(pk=job_id).update(status=status, finished_at=timezone.now(), **fields)
+
+
+@shared_task(bind=True, name='apps.kyc.tasks.process_document_ocr')
+def process_document_ocr(self, job_id):
+    """
+    Executar o OCR de um OCRJob
+    Idempotente por conteúdo: reentregas de um job finalizado não fazem nada,
+    documentos com SHA-256 já processado reaproveitam o texto e um lock por
+    hash impede que dois workers processem o mesmo conteúdo ao mesmo tempo.
+    """
+    config = get_ocr_config()
+    job = OCRJob.objects.select_related('document').filter(pk=job_id).first()
+    if job is None:
+        logger.warning(f"OCR job {job_id} não encontrado")
+        return None
+    if job.status not in OCRJob.ACTIVE_STATUSES:
+        return job.status
+
+    document = job.document
+    lock_key = f'kyc:ocr:lock:{document.sha256 or document.pk}'
+    if not cache.add(lock_key, str(job_id), config['LOCK_TIMEOUT']):
+        try:
+            raise self.retry(
+                countdown=config['LOCK_RETRY_DELAY'],
+                max_retries=config['LOCK_TIMEOUT'] // config['LOCK_RETRY_DELAY'],
+            )
+        except MaxRetriesExceededError:
+            _finish_job(job_id, 'failed', error='Content is locked by another OCR job')
+            return 'failed'
+
+    try:
+        OCRJob.objects.filter(pk=job_id).update(
+            status='running', started_at=timezone.now(), task_id=self.request.id or ''
+        )
+        document.refresh_from_db()
+
+        if document.ocr_processed:
+            _finish_job(job_id, 'completed', reused=True)
+            return 'completed'
+
+        duplicate = document.get_processed_duplicate()
+        if duplicate is not None:
+            store_ocr_result(document, duplicate.ocr_text, duplicate.ocr_confidence)
+            _finish_job(job_id, 'completed', reused=True)
+            return 'completed'
+
+        with local_document_path(document) as path:
+            result = ocr.extract_text(
+                path,
+                document.mime_type,
+                lang=config['LANG'],
+                max_workers=config['PAGE_WORKERS'],
+            )
+        store_ocr_result(document, result.text, result.confidence)
+        _finish_job(job_id, 'completed', pages=result.pages)
+        return 'completed'
+
+    except Exception as e:
+        logger.error(f"Erro no processamento OCR do documento {document.pk}: {str(e)}")
+        _finish_job(job_id, 'failed', error=str(e))
+        return 'failed'
+
+    finally:
+        cache.delete(lock_key)
+
+
+@shared_task(name='apps.kyc.tasks.generate_document_renditions')
+def generate_document_renditions(document_id):
+    """
+    Gerar miniatura e preview do documento (reaproveitados por SHA-256)
+    O resultado é gravado em todos os documentos com o mesmo conteúdo.
+    """
+    document = KYCDocument.objects.filter(pk=document_id).first()
+    if document is None or not document.sha256:
+        return None
+
+    storage = KYCDocument._meta.get_field('file').storage
+    try:
+        names = renditions.ensure_renditions(document, storage)
+    except Exception as e:
+        logger.error(f"Erro ao gerar renditions do documento {document_id}: {str(e)}")
+        return None
+
+    if names:
+        KYCDocument.objects.filter(sha256=document.sha256).update(renditions=names)
+    return names
+
+
+@shared_task(name='apps.kyc.tasks.normalize_document')
+def normalize_document(document_id):
+    """
+    Normalizar a imagem do documento e substituir o arquivo
+    O conteúdo normalizado vira um novo blob; o original é liberado, a menos
+    que o tipo do documento esteja em KEEP_ORIGINAL_TYPES. Reexecuções de um
+    documento já normalizado não fazem nada.
+    """
+    config = get_normalization_config()
+    document = KYCDocument.objects.filter(pk=document_id).first()
+    if document is None or document.normalized_at or not normalize.is_normalizable(document.mime_type):
+        return None
+    
+    try:
+        with local_document_path(document) as path:
+            result = normalize.normalize_image(path, config['MAX_DIMENSION'], config['JPEG_QUALITY'])
+    except Exception as e:
+        logger.error(f"Erro ao normalizar o documento {document_id}: {str(e)}")
+        # Renditions a partir do arquivo original
+        generate_document_renditions.delay(document_id)
+        return None
+    
+    sha256 = hashlib.sha256(result.data).hexdigest()
+    with transaction.atomic():
+        document = KYCDocument.objects.select_for_update().filter(pk=document_id).first()
+        if document is None or document.normalized_at:
+            return None
+        original_size = document.file_size
+        if document.document_type in config['KEEP_ORIGINAL_TYPES']:
+            document.original_sha256 = document.sha256
+        base_name = os.path.splitext(document.original_filename)[0]
+        document.file = ContentFile(result.data, name=f'{base_name}.jpg')
+        document.sha256 = sha256
+        document.file_size = len(result.data)
+        document.mime_type = normalize.OUTPUT_MIME_TYPE
+        document.renditions = {}
+        document.normalized_at = timezone.now()
+        document.save()
+        transaction.on_commit(partial(generate_document_renditions.delay, document.pk))
+    
+    logger.info(
+        f"Documento {document_id} normalizado: {original_size} -> {len(result.data)} bytes "
+        f"({result.width}x{result.height})"
+    )
+    return sha256
+
+
+def _archivable_documents(cutoff):
+    """Documentos de perfis aprovados/rejeitados antes de `cutoff`"""
+    decided_before = (
+        Q(kyc_profile__reviewed_at__lt=cutoff)
+        | Q(kyc_profile__reviewed_at__isnull=True, kyc_profile__updated_at__lt=cutoff)
+    )
+    return Q(kyc_profile__status__in=ARCHIVABLE_PROFILE_STATUSES) & decided_before
+
+
+@shared_task(name='apps.kyc.tasks.archive_cold_documents')
+def archive_cold_documents():
+    """
+    Mover para a camada fria os blobs de perfis encerrados (Celery Beat)
+    Um blob só é arquivado quando nenhum documento de perfil ainda ativo o
+    referencia. Cópias quentes de blobs já arquivados, trazidas de volta por
+    um acesso, são removidas de novo após HOT_CACHE_TTL sem uso.
+    """
+    storage = KYCDocument._meta.get_field('file').storage
+    if not isinstance(storage, TieredStorage):
+        return None
+    
+    config = get_tiering_config()
+    cutoff = timezone.now() - timedelta(days=config['ARCHIVE_AFTER_DAYS'])
+    archivable = _archivable_documents(cutoff)
+    closed_documents = KYCDocument.objects.filter(archivable)
+    active_documents = KYCDocument.objects.exclude(archivable)
+    candidates = (
+        DocumentBlob.objects
+        .filter(archived_at__isnull=True)
+        .filter(
+            Q(sha256__in=closed_documents.values('sha256'))
+            | Q(sha256__in=closed_documents.values('original_sha256'))
+        )
+        .exclude(sha256__in=active_documents.values('sha256'))
+        .order_by('sha256')
+        .values_list('sha256', flat=True)
+    )
+    
+    totals = {'archived': 0, 'evicted': 0, 'failed': 0, 'freed_bytes': 0}
+    last = ''
+    while True:
+        batch = list(candidates.filter(sha256__gt=last)[:config['BATCH_SIZE']])
+        if not batch:
+            break
+        last = batch[-1]
+        for sha256 in batch:
+            try:
+                with transaction.atomic():
+                    # Mesmo lock de DocumentBlob.acquire/release
+                    blob = (
+                        DocumentBlob.objects.select_for_update()
+                        .filter(sha256=sha256, archived_at__isnull=True)
+                        .first()
+                    )
+                    if blob is None:
+                        continue
+                    totals['freed_bytes'] += storage.archive(blob.name)
+                    blob.archived_at = timezone.now()
+                    blob.save(update_fields=['archived_at', 'updated_at'])
+                totals['archived'] += 1
+            except OSError as e:
+                logger.error(f"Erro ao arquivar o blob {sha256}: {str(e)}")
+                totals['failed'] += 1
+    
+    archived = DocumentBlob.objects.filter(archived_at__isnull=False).values_list('sha256', flat=True)
+    for sha256 in archived.iterator(chunk_size=config['BATCH_SIZE']):
+        freed = storage.evict(blob_name(sha256), config['HOT_CACHE_TTL'])
+        if freed:
+            totals['evicted'] += 1
+            totals['freed_bytes'] += freed
+    
+    logger.info(
+        f"Camada fria: {totals['archived']} blobs arquivados, {totals['evicted']} cópias quentes "
+        f"removidas, {totals['freed_bytes']} bytes liberados, {totals['failed']} com erro"
+    )
+    return totals
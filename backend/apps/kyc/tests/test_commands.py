@@ -0,0 +1,141 @@
+"""
+Testes para management commands do app KYC
+"""
+
+import json
+import pytest
+from contextlib import contextmanager
+from io import StringIO
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from apps.kyc import ocr, tasks
+from apps.kyc.models import KYCDocument
+from apps.kyc.tests.test_tasks import make_pdf
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestCheckFilterIndexesCommand:
+    """Testes para o comando check_filter_indexes"""
+    
+    def test_reports_indexed_filters(self):
+        """Filtros com índice dedicado são reportados como atendidos"""
+        out = StringIO()
+        call_command('check_filter_indexes', '--viewset', 'kycprofile', stdout=out)
+        
+        output = out.getvalue()
+        assert '✅ filtro status' in output
+        assert '✅ ordenação created_at' in output
+    
+    def test_fail_on_missing(self):
+        """--fail-on-missing termina com erro quando há ordenação sem índice"""
+        with pytest.raises(CommandError):
+            call_command(
+                'check_filter_indexes', '--viewset', 'kycdocument',
+                '--fail-on-missing', stdout=StringIO()
+            )
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestBackfillOCRCommand:
+    """Testes para o comando backfill_ocr"""
+    
+    @pytest.fixture
+    def documents(self, kyc_profile, settings, tmp_path):
+        settings.MEDIA_ROOT = str(tmp_path / 'media')
+        contents = [make_pdf(['FIRST']), make_pdf(['SECOND']), make_pdf(['FIRST'])]
+        return [
+            KYCDocument.objects.create(
+                kyc_profile=kyc_profile,
+                document_type='other',
+                original_filename=f'doc{i}.pdf',
+                file=ContentFile(content, name=f'doc{i}.pdf'),
+                file_size=len(content),
+                mime_type='application/pdf'
+            )
+            for i, content in enumerate(contents)
+        ]
+    
+    def test_processes_pending_and_reuses_duplicates(self, documents, tmp_path):
+        checkpoint = tmp_path / 'checkpoint.json'
+        out = StringIO()
+        call_command(
+            'backfill_ocr', '--concurrency', '1', '--chunk-size', '2',
+            '--checkpoint', str(checkpoint), stdout=out
+        )
+        
+        texts = list(KYCDocument.objects.order_by('pk').values_list('ocr_text', flat=True))
+        assert texts == ['FIRST', 'SECOND', 'FIRST']
+        assert json.loads(checkpoint.read_text())['last_id'] == documents[-1].pk
+        assert '2 processados, 1 reaproveitados, 0 com erro' in out.getvalue()
+    
+    def test_resumes_from_checkpoint(self, documents, tmp_path):
+        checkpoint = tmp_path / 'checkpoint.json'
+        checkpoint.write_text(json.dumps({'last_id': documents[0].pk}))
+        call_command('backfill_ocr', '--concurrency', '1', '--checkpoint', str(checkpoint), stdout=StringIO())
+        
+        processed = dict(KYCDocument.objects.values_list('pk', 'ocr_processed'))
+        assert processed == {documents[0].pk: False, documents[1].pk: True, documents[2].pk: True}
+    
+    def test_checkpoint_stops_before_failed_document(self, documents, tmp_path, mocker):
+        """Documento com erro é tentado de novo na próxima execução"""
+        checkpoint = tmp_path / 'checkpoint.json'
+        extract_text = ocr.extract_text
+        failing = mocker.patch('apps.kyc.ocr.extract_text', side_effect=[
+            extract_text(documents[0].file.path, 'application/pdf'),
+            RuntimeError('tesseract crashed'),
+        ])
+        out = StringIO()
+        call_command(
+            'backfill_ocr', '--concurrency', '1', '--chunk-size', '1',
+            '--checkpoint', str(checkpoint), stdout=out
+        )
+        
+        assert failing.call_count == 2
+        assert json.loads(checkpoint.read_text())['last_id'] == documents[1].pk - 1
+        assert '1 processados, 1 reaproveitados, 1 com erro' in out.getvalue()
+        
+        mocker.stopall()
+        call_command('backfill_ocr', '--concurrency', '1', '--checkpoint', str(checkpoint), stdout=StringIO())
+        
+        assert KYCDocument.objects.get(pk=documents[1].pk).ocr_text == 'SECOND'
+        assert json.loads(checkpoint.read_text())['last_id'] == documents[1].pk
+    
+    def test_local_copies_bounded_by_concurrency(self, documents, tmp_path, mocker):
+        """Cópias locais de storages remotos não se acumulam pelo lote inteiro"""
+        local_document_path = tasks.local_document_path
+        open_copies = []
+        peak = []
+        
+        @contextmanager
+        def counting_path(document):
+            with local_document_path(document) as path:
+                open_copies.append(path)
+                peak.append(len(open_copies))
+                try:
+                    yield path
+                finally:
+                    open_copies.remove(path)
+        
+        mocker.patch(
+            'apps.kyc.management.commands.backfill_ocr.local_document_path', side_effect=counting_path
+        )
+        call_command(
+            'backfill_ocr', '--concurrency', '1', '--chunk-size', '3',
+            '--checkpoint', str(tmp_path / 'checkpoint.json'), stdout=StringIO()
+        )
+        
+        assert peak == [1, 1]
+        assert not open_copies
+        assert not KYCDocument.objects.filter(ocr_processed=False).exists()
+    
+    def test_process_pool(self, documents, tmp_path):
+        call_command(
+            'backfill_ocr', '--concurrency', '2',
+            '--checkpoint', str(tmp_path / 'checkpoint.json'), stdout=StringIO()
+        )
+        
+        assert not KYCDocument.objects.filter(ocr_processed=False).exists()
@@ -10,7 +10,10 @@ from django.core.exceptions import ValidationError
 from decimal import Decimal
 from datetime import date
 
-from apps.kyc.models import KYCProfile, UBODeclaration, PEPDeclaration, KYCDocument
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+from apps.kyc.models import KYCProfile, UBODeclaration, PEPDeclaration, KYCDocument, DocumentBlob
 
 
 @pytest.mark.django_db
@@ -184,6 +187,45 @@ class TestUBODeclaration:
         assert 'At least 25% ownership must be declared' in validation['errors'][0]
         assert validation['total_percentage'] == 10
     
+    def test_validate_ubos_in_memory(self, kyc_profile):
+        """Validação em passagem única sobre UBOs não salvos"""
+        ubos = [
+            UBODeclaration(kyc_profile=kyc_profile, full_name="UBO 1",
+                           ownership_percentage=Decimal('60.00')),
+            UBODeclaration(kyc_profile=kyc_profile, full_name=" ",
+                           ownership_percentage=Decimal('50.00')),
+        ]
+        
+        validation = UBODeclaration.validate_ubos(iter(ubos))
+        
+        assert validation['is_valid'] is False
+        assert validation['total_percentage'] == 110
+        assert validation['ubo_count'] == 2
+        assert 'cannot exceed 100%' in validation['errors'][0]
+        assert 'UBO name cannot be empty' in validation['errors'][1]
+    
+    def test_validate_ubo_declarations_uses_prefetch_cache(self, kyc_profile, django_assert_num_queries):
+        """Validação não executa queries quando os UBOs já foram prefetched"""
+        UBODeclaration.objects.create(
+            kyc_profile=kyc_profile,
+            full_name="Prefetched UBO",
+            date_of_birth=date(1980, 1, 1),
+            nationality="Brazilian",
+            ownership_percentage=Decimal('100.00'),
+            address_line1="Address",
+            city="City",
+            state="State",
+            postal_code="12345",
+            country="Brazil"
+        )
+        profile = KYCProfile.objects.prefetch_related('ubo_declarations').get(pk=kyc_profile.pk)
+        
+        with django_assert_num_queries(0):
+            validation = UBODeclaration.validate_ubo_declarations(profile)
+        
+        assert validation['is_valid'] is True
+        assert validation['ubo_count'] == 1
+    
     def test_ubo_ordering(self, kyc_profile):
         """Teste ordenação de UBOs por percentual de propriedade"""
         ubo1 = UBODeclaration.objects.create(
@@ -299,3 +341,88 @@ class TestKYCDocument:
         docs = list(KYCDocument.objects.all())
         assert docs[0] == doc2  # Mais recente primeiro
         assert docs[1] == doc1
+    
+    def _create_with_file(self, kyc_profile, content, name='bill.pdf'):
+        return KYCDocument.objects.create(
+            kyc_profile=kyc_profile,
+            document_type='utility_bill',
+            original_filename=name,
+            file=ContentFile(content, name=name),
+            file_size=len(content),
+            mime_type='application/pdf'
+        )
+    
+    def test_identical_content_shares_blob(self, kyc_profile, settings, tmp_path):
+        """Uploads repetidos do mesmo conteúdo apontam para um único blob"""
+        settings.MEDIA_ROOT = str(tmp_path)
+        doc1 = self._create_with_file(kyc_profile, b'%PDF-1.4 same bill', 'bill.pdf')
+        doc2 = self._create_with_file(kyc_profile, b'%PDF-1.4 same bill', 'retry.pdf')
+        doc3 = self._create_with_file(kyc_profile, b'%PDF-1.4 other bill')
+        
+        assert doc1.file.name == doc2.file.name
+        assert doc1.file.name.endswith(doc1.sha256)
+        assert doc3.file.name != doc1.file.name
+        assert DocumentBlob.objects.get(sha256=doc1.sha256).ref_count == 2
+        assert len([p for p in tmp_path.rglob('*') if p.is_file()]) == 2
+    
+    def test_blob_removed_with_last_reference(self, kyc_profile, settings, tmp_path,
+                                              django_capture_on_commit_callbacks):
+        """O blob só é apagado quando o último documento é removido"""
+        settings.MEDIA_ROOT = str(tmp_path)
+        doc1 = self._create_with_file(kyc_profile, b'%PDF-1.4 passport')
+        doc2 = self._create_with_file(kyc_profile, b'%PDF-1.4 passport')
+        storage = doc1.file.storage
+        name = doc1.file.name
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            doc1.delete()
+        assert storage.exists(name)
+        assert DocumentBlob.objects.get(sha256=doc2.sha256).ref_count == 1
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            doc2.delete()
+        assert not storage.exists(name)
+        assert not DocumentBlob.objects.exists()
+    
+    def test_profile_delete_releases_blobs(self, kyc_profile, settings, tmp_path,
+                                           django_capture_on_commit_callbacks):
+        settings.MEDIA_ROOT = str(tmp_path)
+        doc = self._create_with_file(kyc_profile, b'%PDF-1.4 id card')
+        name = doc.file.name
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            kyc_profile.delete()
+        
+        assert not doc.file.storage.exists(name)
+        assert not DocumentBlob.objects.exists()
+    
+    def test_rolled_back_delete_keeps_blob(self, kyc_profile, settings, tmp_path,
+                                           django_capture_on_commit_callbacks):
+        """Arquivos só saem após o commit: um rollback mantém documento, blob e arquivo"""
+        settings.MEDIA_ROOT = str(tmp_path)
+        doc = self._create_with_file(kyc_profile, b'%PDF-1.4 passport')
+        name, pk = doc.file.name, doc.pk
+        
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            with pytest.raises(RuntimeError):
+                with transaction.atomic():
+                    doc.delete()
+                    raise RuntimeError('request failed')
+        
+        assert callbacks == []
+        assert doc.file.storage.exists(name)
+        assert DocumentBlob.objects.get(sha256=doc.sha256).ref_count == 1
+        assert KYCDocument.objects.filter(pk=pk).exists()
+    
+    def test_blob_reacquired_before_purge_is_kept(self, kyc_profile, settings, tmp_path):
+        """Upload do mesmo conteúdo entre o commit e a remoção mantém o arquivo"""
+        settings.MEDIA_ROOT = str(tmp_path)
+        doc = self._create_with_file(kyc_profile, b'%PDF-1.4 passport')
+        name = doc.file.name
+        doc.delete()
+        DocumentBlob.acquire(doc.sha256, doc.file_size)
+        
+        DocumentBlob.purge(doc.sha256)
+        
+        assert doc.file.storage.exists(name)
+        assert DocumentBlob.objects.get(sha256=doc.sha256).ref_count == 1
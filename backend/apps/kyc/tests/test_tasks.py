@@ -0,0 +1,465 @@
+"""
+Testes para tarefas Celery e OCR do app KYC
+"""
+
+import io
+import multiprocessing
+
+import pytest
+from PIL import Image
+from datetime import timedelta
+from django.core.files.base import ContentFile
+from django.utils import timezone
+
+from apps.kyc import normalize, ocr
+from apps.kyc.models import KYCProfile, KYCDocument, OCRJob, DocumentBlob
+from apps.kyc.renditions import rendition_name
+from apps.kyc.serializers import KYCDocumentSerializer
+from apps.kyc.storage import blob_name
+from apps.kyc.tasks import (
+    process_document_ocr, generate_document_renditions, normalize_document, archive_cold_documents
+)
+from conftest import KYCProfileFactory
+
+
+def make_pdf(pages):
+    """PDF mínimo com camada de texto, uma linha por página"""
+    objects = [
+        '<< /Type /Catalog /Pages 2 0 R >>',
+        '<< /Type /Pages /Kids [%s] /Count %d >>' % (
+            ' '.join(f'{3 + 2 * i} 0 R' for i in range(len(pages))), len(pages)
+        ),
+    ]
+    font_id = 3 + 2 * len(pages)
+    for i, text in enumerate(pages):
+        stream = f'BT /F1 12 Tf 72 720 Td ({text}) Tj ET'
+        objects.append(
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R '
+            f'/Resources << /Font << /F1 {font_id} 0 R >> >> >>'
+        )
+        objects.append(f'<< /Length {len(stream)} >>\nstream\n{stream}\nendstream')
+    objects.append('<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>')
+    
+    out = b'%PDF-1.4\n'
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f'{number} 0 obj\n{body}\nendobj\n'.encode()
+    xref = len(out)
+    out += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+    for offset in offsets:
+        out += f'{offset:010d} 00000 n \n'.encode()
+    out += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+    return out
+
+
+@pytest.fixture
+def pdf_document(kyc_profile, settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    content = make_pdf(['PASSPORT JOHN DOE', 'PAGE TWO'])
+    return KYCDocument.objects.create(
+        kyc_profile=kyc_profile,
+        document_type='passport',
+        original_filename='passport.pdf',
+        file=ContentFile(content, name='passport.pdf'),
+        file_size=len(content),
+        mime_type='application/pdf'
+    )
+
+
+def _extract_in_worker(path, results):
+    try:
+        result = ocr.extract_text(path, 'application/pdf', max_workers=2)
+        results.put(result.text.split('\n\f'))
+    except Exception as e:
+        results.put(repr(e))
+
+
+class TestOCR:
+    """Testes para extração de texto"""
+    
+    def test_pdf_pages_in_pool(self, tmp_path):
+        """Páginas extraídas em paralelo mantêm a ordem"""
+        path = tmp_path / 'doc.pdf'
+        path.write_bytes(make_pdf(['FIRST', 'SECOND', 'THIRD']))
+        result = ocr.extract_text(str(path), 'application/pdf', max_workers=2)
+        
+        assert result.pages == 3
+        assert result.text.split('\n\f') == ['FIRST', 'SECOND', 'THIRD']
+        assert result.confidence == 1.0
+    
+    def test_pool_inside_daemonic_worker(self, tmp_path):
+        """Worker Celery prefork: processos daemon não podem criar processos filhos"""
+        path = tmp_path / 'doc.pdf'
+        path.write_bytes(make_pdf(['FIRST', 'SECOND']))
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        worker = context.Process(target=_extract_in_worker, args=(str(path), results), daemon=True)
+        worker.start()
+        try:
+            outcome = results.get(timeout=30)
+        finally:
+            worker.join(timeout=5)
+        
+        assert outcome == ['FIRST', 'SECOND']
+    
+    def test_unsupported_type(self, tmp_path):
+        path = tmp_path / 'doc.txt'
+        path.write_text('hello')
+        with pytest.raises(ocr.UnsupportedDocument):
+            ocr.extract_text(str(path), 'text/plain')
+
+
+@pytest.mark.django_db
+class TestProcessDocumentOCR:
+    """Testes para a tarefa process_document_ocr"""
+    
+    def test_job_completes_and_shares_result_with_duplicates(self, pdf_document, settings):
+        settings.KYC_OCR = {'PAGE_WORKERS': 1}
+        duplicate = KYCDocument.objects.create(
+            kyc_profile=pdf_document.kyc_profile,
+            document_type='passport',
+            original_filename='retry.pdf',
+            file=ContentFile(pdf_document.file.read(), name='retry.pdf'),
+            file_size=pdf_document.file_size,
+            mime_type='application/pdf'
+        )
+        job = OCRJob.objects.create(document=pdf_document, sha256=pdf_document.sha256)
+        
+        assert process_document_ocr.apply(args=[str(job.pk)]).get() == 'completed'
+        
+        job.refresh_from_db()
+        assert job.status == 'completed'
+        assert job.pages == 2
+        duplicate.refresh_from_db()
+        assert duplicate.ocr_processed is True
+        assert 'PASSPORT JOHN DOE' in duplicate.ocr_text
+    
+    def test_redelivery_is_noop(self, pdf_document, mocker):
+        job = OCRJob.objects.create(document=pdf_document, status='completed')
+        extract = mocker.patch('apps.kyc.tasks.ocr.extract_text')
+        
+        assert process_document_ocr.apply(args=[str(job.pk)]).get() == 'completed'
+        extract.assert_not_called()
+    
+    def test_failure_recorded_on_job(self, pdf_document, mocker):
+        mocker.patch('apps.kyc.tasks.ocr.extract_text', side_effect=RuntimeError('tesseract missing'))
+        job = OCRJob.objects.create(document=pdf_document)
+        
+        assert process_document_ocr.apply(args=[str(job.pk)]).get() == 'failed'
+        job.refresh_from_db()
+        assert job.status == 'failed'
+        assert 'tesseract missing' in job.error
+
+
+def make_png(size=(2000, 1200)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, (200, 30, 30)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@pytest.mark.django_db
+class TestGenerateDocumentRenditions:
+    """Testes para a tarefa generate_document_renditions"""
+    
+    def _create_scan(self, kyc_profile, content, name='scan.png'):
+        return KYCDocument.objects.create(
+            kyc_profile=kyc_profile,
+            document_type='national_id',
+            original_filename=name,
+            file=ContentFile(content, name=name),
+            file_size=len(content),
+            mime_type='image/png'
+        )
+    
+    def test_renditions_shared_by_content(self, kyc_profile, settings, tmp_path):
+        settings.MEDIA_ROOT = str(tmp_path)
+        content = make_png()
+        document = self._create_scan(kyc_profile, content)
+        duplicate = self._create_scan(kyc_profile, content, 'retry.png')
+        
+        names = generate_document_renditions.apply(args=[document.pk]).get()
+        
+        storage = document.file.storage
+        with storage.open(names['thumbnail']) as fh:
+            assert max(Image.open(fh).size) == 240
+        with storage.open(names['preview']) as fh:
+            assert max(Image.open(fh).size) == 1280
+        duplicate.refresh_from_db()
+        assert duplicate.renditions == names
+        assert names['thumbnail'] == rendition_name(document.sha256, 'thumbnail')
+        
+        data = KYCDocumentSerializer(duplicate).data
+        assert data['thumbnail_url'].endswith(f'/documents/{duplicate.pk}/renditions/thumbnail/')
+        assert data['preview_url'].endswith(f'/documents/{duplicate.pk}/renditions/preview/')
+    
+    def test_rendition_endpoint(self, authenticated_client, kyc_profile, settings, tmp_path):
+        settings.MEDIA_ROOT = str(tmp_path)
+        document = self._create_scan(kyc_profile, make_png())
+        names = generate_document_renditions.apply(args=[document.pk]).get()
+        document.refresh_from_db()
+        
+        response = authenticated_client.get(KYCDocumentSerializer(document).data['thumbnail_url'])
+        
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'image/jpeg'
+        with document.file.storage.open(names['thumbnail']) as fh:
+            assert b''.join(response.streaming_content) == fh.read()
+        
+        etag = response['ETag']
+        response = authenticated_client.get(
+            KYCDocumentSerializer(document).data['thumbnail_url'], HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == 304
+    
+    def test_existing_renditions_not_regenerated(self, kyc_profile, settings, tmp_path, mocker):
+        settings.MEDIA_ROOT = str(tmp_path)
+        content = make_png()
+        document = self._create_scan(kyc_profile, content)
+        generate_document_renditions.apply(args=[document.pk])
+        render = mocker.patch('apps.kyc.renditions.render')
+        
+        duplicate = self._create_scan(kyc_profile, content, 'retry.png')
+        generate_document_renditions.apply(args=[duplicate.pk])
+        
+        render.assert_not_called()
+        duplicate.refresh_from_db()
+        assert duplicate.renditions['preview']
+    
+    def test_renditions_removed_with_blob(self, kyc_profile, settings, tmp_path,
+                                          django_capture_on_commit_callbacks):
+        settings.MEDIA_ROOT = str(tmp_path)
+        document = self._create_scan(kyc_profile, make_png())
+        names = generate_document_renditions.apply(args=[document.pk]).get()
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            document.delete()
+        
+        assert not any(document.file.storage.exists(name) for name in names.values())
+    
+    def test_text_only_pdf_has_no_renditions(self, pdf_document):
+        assert generate_document_renditions.apply(args=[pdf_document.pk]).get() == {}
+        pdf_document.refresh_from_db()
+        assert KYCDocumentSerializer(pdf_document).data['thumbnail_url'] is None
+
+
+def make_camera_jpeg(size=(4000, 3000)):
+    """Foto de celular: paisagem com orientação 6 (girar 90°) e fabricante no EXIF"""
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    exif[0x010F] = 'PhoneMaker'
+    buffer = io.BytesIO()
+    Image.new('RGB', size, (90, 120, 200)).save(buffer, 'JPEG', quality=95, exif=exif)
+    return buffer.getvalue()
+
+
+class TestNormalizeImage:
+    """Testes para a normalização de imagens"""
+    
+    def test_orients_strips_metadata_and_downscales(self, tmp_path):
+        path = tmp_path / 'photo.jpg'
+        path.write_bytes(make_camera_jpeg())
+        
+        result = normalize.normalize_image(str(path), max_dimension=2000, quality=80)
+        
+        image = Image.open(io.BytesIO(result.data))
+        assert image.size == (1500, 2000) == (result.width, result.height)
+        assert image.format == 'JPEG'
+        assert not image.getexif()
+    
+    def test_transparent_png_flattened(self, tmp_path):
+        path = tmp_path / 'scan.png'
+        Image.new('RGBA', (100, 50), (0, 0, 0, 0)).save(path)
+        
+        result = normalize.normalize_image(str(path), max_dimension=2000, quality=80)
+        
+        image = Image.open(io.BytesIO(result.data))
+        assert image.size == (100, 50)
+        assert image.getpixel((10, 10)) == (255, 255, 255)
+
+
+@pytest.mark.django_db
+class TestNormalizeDocument:
+    """Testes para a tarefa normalize_document"""
+    
+    @pytest.fixture
+    def photo(self, kyc_profile, settings, tmp_path):
+        settings.MEDIA_ROOT = str(tmp_path)
+        settings.KYC_NORMALIZATION = {'ENABLED': True, 'MAX_DIMENSION': 1000}
+        content = make_camera_jpeg()
+        return KYCDocument.objects.create(
+            kyc_profile=kyc_profile,
+            document_type='passport',
+            original_filename='IMG_0001.jpeg',
+            file=ContentFile(content, name='IMG_0001.jpeg'),
+            file_size=len(content),
+            mime_type='image/jpeg'
+        )
+    
+    def test_replaces_file_and_releases_original(self, photo, mocker, django_capture_on_commit_callbacks):
+        original_name = photo.file.name
+        mocker.patch('apps.kyc.tasks.generate_document_renditions.delay')
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            sha256 = normalize_document.apply(args=[photo.pk]).get()
+        
+        photo.refresh_from_db()
+        assert photo.sha256 == sha256
+        assert photo.file.name == blob_name(sha256)
+        assert photo.normalized_at is not None
+        assert photo.original_sha256 == ''
+        assert photo.file_size < 100 * 1024
+        with photo.file.open('rb') as fh:
+            assert Image.open(fh).size == (750, 1000)
+        assert not photo.file.storage.exists(original_name)
+        assert normalize_document.apply(args=[photo.pk]).get() is None
+    
+    def test_keeps_original_when_policy_requires(self, photo, settings, django_capture_on_commit_callbacks):
+        settings.KYC_NORMALIZATION = {**settings.KYC_NORMALIZATION, 'KEEP_ORIGINAL_TYPES': ['passport']}
+        original_sha256 = photo.sha256
+        
+        normalize_document.apply(args=[photo.pk])
+        
+        photo.refresh_from_db()
+        assert photo.original_sha256 == original_sha256
+        assert photo.file.storage.exists(photo.original_file_name)
+        assert DocumentBlob.objects.get(sha256=original_sha256).ref_count == 1
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            photo.delete()
+        assert not DocumentBlob.objects.filter(sha256=original_sha256).exists()
+        assert not photo.file.storage.exists(blob_name(original_sha256))
+    
+    def test_enqueued_on_upload_instead_of_renditions(
+        self, kyc_profile, settings, tmp_path, mocker, django_capture_on_commit_callbacks
+    ):
+        settings.MEDIA_ROOT = str(tmp_path)
+        settings.KYC_NORMALIZATION = {'ENABLED': True}
+        normalize_delay = mocker.patch('apps.kyc.tasks.normalize_document.delay')
+        renditions_delay = mocker.patch('apps.kyc.tasks.generate_document_renditions.delay')
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            document = KYCDocument.objects.create(
+                kyc_profile=kyc_profile,
+                document_type='passport',
+                original_filename='scan.png',
+                file=ContentFile(make_png(), name='scan.png'),
+                file_size=1,
+                mime_type='image/png'
+            )
+        
+        normalize_delay.assert_called_once_with(document.pk)
+        renditions_delay.assert_not_called()
+
+
+@pytest.mark.django_db
+class TestArchiveColdDocuments:
+    """Testes para a camada fria do storage de documentos"""
+    
+    CONTENT = b'%PDF-1.4 ' + b'approved passport scan ' * 200
+    
+    @pytest.fixture(autouse=True)
+    def tiering(self, settings, tmp_path):
+        settings.MEDIA_ROOT = str(tmp_path / 'media')
+        settings.KYC_STORAGE_TIERING = {'COLD_ROOT': str(tmp_path / 'cold'), 'ARCHIVE_AFTER_DAYS': 30}
+        return tmp_path
+    
+    def _document(self, profile, content=CONTENT):
+        return KYCDocument.objects.create(
+            kyc_profile=profile,
+            document_type='passport',
+            original_filename='passport.pdf',
+            file=ContentFile(content, name='passport.pdf'),
+            file_size=len(content),
+            mime_type='application/pdf'
+        )
+    
+    def _close(self, profile, status='approved', days_ago=60):
+        KYCProfile.objects.filter(pk=profile.pk).update(
+            status=status, reviewed_at=timezone.now() - timedelta(days=days_ago)
+        )
+    
+    def test_archives_closed_profiles_and_fetches_on_access(self, kyc_profile):
+        document = self._document(kyc_profile)
+        self._close(kyc_profile)
+        recent = KYCProfileFactory()
+        recent_document = self._document(recent, b'%PDF-1.4 recent')
+        self._close(recent, days_ago=1)
+        storage = document.file.storage
+        
+        totals = archive_cold_documents.apply().get()
+        
+        assert totals['archived'] == 1
+        assert totals['freed_bytes'] == len(self.CONTENT)
+        assert not storage.is_hot(document.file.name)
+        assert storage.is_cold(document.file.name)
+        assert storage.is_hot(recent_document.file.name)
+        assert DocumentBlob.objects.get(sha256=document.sha256).archived_at is not None
+        
+        # Acesso transparente: o conteúdo volta para a camada quente
+        document.refresh_from_db()
+        with document.file.open('rb') as fh:
+            assert fh.read() == self.CONTENT
+        assert storage.is_hot(document.file.name)
+    
+    def test_blob_shared_with_active_profile_stays_hot(self, kyc_profile):
+        document = self._document(kyc_profile)
+        self._close(kyc_profile, status='rejected')
+        self._document(KYCProfileFactory(status='in_review'))
+        
+        assert archive_cold_documents.apply().get()['archived'] == 0
+        assert document.file.storage.is_hot(document.file.name)
+    
+    def test_rehydrated_copy_evicted_after_ttl(self, kyc_profile, settings):
+        document = self._document(kyc_profile)
+        self._close(kyc_profile)
+        archive_cold_documents.apply()
+        storage = document.file.storage
+        assert storage.size(document.file.name) == len(self.CONTENT)
+        
+        settings.KYC_STORAGE_TIERING = {**settings.KYC_STORAGE_TIERING, 'HOT_CACHE_TTL': 0}
+        totals = archive_cold_documents.apply().get()
+        
+        assert totals['evicted'] == 1
+        assert not storage.is_hot(document.file.name)
+    
+    def test_file_url_fetches_archived_blob(self, staff_client, kyc_profile):
+        document = self._document(kyc_profile)
+        self._close(kyc_profile)
+        archive_cold_documents.apply()
+        storage = document.file.storage
+        
+        file_url = KYCDocumentSerializer(document).data['file_url']
+        response = staff_client.get(file_url)
+        
+        assert response.status_code == 200
+        assert b''.join(response.streaming_content) == self.CONTENT
+        assert storage.is_hot(document.file.name)
+    
+    def test_new_upload_of_archived_content_is_hot(self, kyc_profile, settings):
+        document = self._document(kyc_profile)
+        self._close(kyc_profile)
+        archive_cold_documents.apply()
+        storage = document.file.storage
+        
+        self._document(KYCProfileFactory())
+        
+        assert storage.is_hot(document.file.name)
+        blob = DocumentBlob.objects.get(sha256=document.sha256)
+        assert blob.ref_count == 2
+        assert blob.archived_at is None
+        # Nem removido de novo como cópia quente de um blob arquivado
+        settings.KYC_STORAGE_TIERING = {**settings.KYC_STORAGE_TIERING, 'HOT_CACHE_TTL': 0}
+        assert archive_cold_documents.apply().get()['evicted'] == 0
+        assert storage.is_hot(document.file.name)
+    
+    def test_delete_removes_cold_copy(self, kyc_profile, django_capture_on_commit_callbacks):
+        document = self._document(kyc_profile)
+        self._close(kyc_profile)
+        archive_cold_documents.apply()
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            document.delete()
+        
+        assert not document.file.storage.exists(document.file.name)
+        assert not DocumentBlob.objects.exists()
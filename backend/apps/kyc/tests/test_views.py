@@ -8,10 +8,23 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 from django.contrib.auth.models import User
+from django.db import DatabaseError, connection
+from django.test.utils import CaptureQueriesContext
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils.http import http_date
 from decimal import Decimal
-from datetime import date
+from datetime import date, timedelta
+import hashlib
+import io
 
-from apps.kyc.models import KYCProfile, UBODeclaration, PEPDeclaration, KYCDocument
+from PIL import Image
+
+from apps.kyc.models import (
+    KYCProfile, UBODeclaration, PEPDeclaration, KYCDocument, DocumentBlob, DocumentUploadSession, OCRJob
+)
+from apps.kyc import uploads
+from apps.kyc.storage import blob_name
+from conftest import KYCProfileFactory, UBODeclarationFactory, PEPDeclarationFactory
 
 
 @pytest.mark.django_db
@@ -29,6 +42,35 @@ class TestKYCProfileViewSet:
         assert len(response.data['results']) == 1
         assert response.data['results'][0]['id'] == str(kyc_profile.id)
     
+    def test_list_kyc_profiles_ordering_by_rank_without_search(self, authenticated_client, kyc_profile):
+        """?ordering=-search_rank sem ?search= usa rank constante em vez de falhar"""
+        url = reverse('kyc:kycprofile-list')
+        response = authenticated_client.get(url, {'ordering': '-search_rank'})
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['results'][0]['id'] == str(kyc_profile.id)
+    
+    def test_search_kyc_profiles_by_user_email(self, staff_client, kyc_profile):
+        """Busca pelo e-mail usa a cópia no perfil, mantida em dia com o usuário"""
+        other_profile = KYCProfileFactory(full_name='Maria Costa')
+        kyc_profile.user.email = 'renamed.owner@example.org'
+        kyc_profile.user.save()
+        
+        url = reverse('kyc:kycprofile-list')
+        response = staff_client.get(url, {'search': 'renamed.owner'})
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert [item['id'] for item in response.data['results']] == [str(kyc_profile.id)]
+        
+        # Cada termo precisa casar em algum campo, não necessariamente o mesmo
+        response = staff_client.get(url, {'search': f'Maria {other_profile.user_email}'})
+        
+        assert [item['id'] for item in response.data['results']] == [str(other_profile.id)]
+        
+        response = staff_client.get(url, {'search': 'Maria renamed.owner'})
+        
+        assert response.data['results'] == []
+    
     def test_list_kyc_profiles_unauthenticated(self, api_client):
         """Teste listagem sem autenticação"""
         url = reverse('kyc:kycprofile-list')
@@ -86,6 +128,56 @@ class TestKYCProfileViewSet:
         assert response.status_code == status.HTTP_200_OK
         assert response.data['ubo_validation']['is_valid'] is False
         assert 'No UBO declarations found' in response.data['ubo_validation']['errors'][0]
+    
+    def _create_full_profiles(self, count):
+        """Criar perfis com UBOs, PEPs e documentos aninhados"""
+        for _ in range(count):
+            profile = KYCProfileFactory()
+            UBODeclarationFactory(kyc_profile=profile, ownership_percentage=Decimal('60.00'))
+            UBODeclarationFactory(kyc_profile=profile, ownership_percentage=Decimal('40.00'))
+            PEPDeclarationFactory(kyc_profile=profile)
+            for document_type in ('passport', 'utility_bill'):
+                KYCDocument.objects.create(
+                    kyc_profile=profile,
+                    document_type=document_type,
+                    original_filename=f'{document_type}.pdf',
+                    file_size=1024,
+                    mime_type='application/pdf'
+                )
+    
+    def _count_list_queries(self, client, page_size):
+        url = reverse('kyc:kycprofile-list')
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, {'page_size': page_size})
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['results']) == page_size
+        return len(context.captured_queries)
+    
+    def test_list_query_count_is_constant(self, staff_client):
+        """Listagem carrega relacionamentos aninhados sem N+1"""
+        self._create_full_profiles(2)
+        small_page_queries = self._count_list_queries(staff_client, 2)
+        
+        self._create_full_profiles(18)
+        large_page_queries = self._count_list_queries(staff_client, 20)
+        
+        # count + perfis (user/reviewed_by) + 3 prefetches
+        assert small_page_queries == large_page_queries
+        assert large_page_queries <= 5
+    
+    def test_retrieve_computed_fields_use_prefetch(self, staff_client):
+        """Campos calculados não executam queries por perfil"""
+        self._create_full_profiles(1)
+        profile = KYCProfile.objects.get()
+        
+        url = reverse('kyc:kycprofile-detail', kwargs={'pk': profile.id})
+        with CaptureQueriesContext(connection) as context:
+            response = staff_client.get(url)
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['ubo_validation_status']['is_valid'] is True
+        assert response.data['completion_percentage'] > 0
+        assert len(context.captured_queries) <= 4
 
 
 @pytest.mark.django_db
@@ -147,6 +239,31 @@ class TestPEPDeclarationViewSet:
         assert len(response.data['results']) == 1
         assert 'Minister' in response.data['results'][0]['position_held']
     
+    def test_list_pep_declarations_search_profile_name(self, staff_client, kyc_profile):
+        """Busca PEP inclui o nome do perfil KYC e anota o rank"""
+        PEPDeclaration.objects.create(kyc_profile=kyc_profile, is_pep=False)
+        other_profile = KYCProfileFactory(full_name='Unrelated Person')
+        PEPDeclaration.objects.create(kyc_profile=other_profile, is_pep=False)
+        
+        url = reverse('kyc:pepdeclaration-list')
+        response = staff_client.get(
+            url, {'search': kyc_profile.full_name, 'ordering': '-search_rank'}
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['results']) == 1
+        assert response.data['results'][0]['kyc_profile'] == kyc_profile.id
+    
+    def test_list_pep_declarations_ordering_by_rank_without_search(self, authenticated_client, kyc_profile):
+        """?ordering=-search_rank sem ?search= usa rank constante em vez de falhar"""
+        PEPDeclaration.objects.create(kyc_profile=kyc_profile, is_pep=False)
+        
+        url = reverse('kyc:pepdeclaration-list')
+        response = authenticated_client.get(url, {'ordering': '-search_rank'})
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['results']) == 1
+    
     def test_pep_summary_endpoint(self, authenticated_client, kyc_profile):
         """CORREÇÃO: Teste endpoint de resumo otimizado"""
         # Criar declarações variadas
@@ -163,6 +280,49 @@ class TestPEPDeclarationViewSet:
         assert response.data['non_pep_count'] == 1
         assert 'by_type' in response.data
     
+    def test_pep_summary_single_query(self, authenticated_client, kyc_profile, django_assert_num_queries):
+        """Resumo PEP calculado em uma única agregação"""
+        PEPDeclaration.objects.create(kyc_profile=kyc_profile, is_pep=True, pep_type='domestic')
+        PEPDeclaration.objects.create(kyc_profile=kyc_profile, is_pep=True, pep_type='domestic')
+        PEPDeclaration.objects.create(kyc_profile=kyc_profile, is_pep=True, pep_type='family')
+        PEPDeclaration.objects.create(kyc_profile=kyc_profile, is_pep=False)
+        
+        from apps.kyc.views import PEPDeclarationViewSet
+        queryset = PEPDeclaration.objects.filter(kyc_profile=kyc_profile)
+        
+        with django_assert_num_queries(1):
+            summary = PEPDeclarationViewSet._build_summary(queryset)
+        
+        assert summary == {
+            'total_declarations': 4,
+            'pep_count': 3,
+            'non_pep_count': 1,
+            'by_type': {'domestic': 2, 'family': 1}
+        }
+    
+    def test_pep_summary_cached_until_write(self, authenticated_client, kyc_profile, settings):
+        """Modo cacheado serve o resumo até a próxima escrita em PEPDeclaration"""
+        settings.CACHES = {
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+        }
+        settings.KYC_PEP_SUMMARY_CACHE_TIMEOUT = 60
+        PEPDeclaration.objects.create(kyc_profile=kyc_profile, is_pep=True, pep_type='domestic')
+        url = reverse('kyc:pepdeclaration-summary')
+        
+        assert authenticated_client.get(url).data['pep_count'] == 1
+        
+        # Escrita que não dispara signals não invalida o cache
+        PEPDeclaration.objects.bulk_create([
+            PEPDeclaration(kyc_profile=kyc_profile, is_pep=True, pep_type='foreign')
+        ])
+        assert authenticated_client.get(url).data['pep_count'] == 1
+        
+        # save() invalida o resumo cacheado
+        PEPDeclaration.objects.create(kyc_profile=kyc_profile, is_pep=False)
+        response = authenticated_client.get(url)
+        assert response.data['pep_count'] == 2
+        assert response.data['non_pep_count'] == 1
+    
     def test_large_pep_list_performance(self, authenticated_client, kyc_profile):
         """CORREÇÃO: Teste performance com lista grande de PEPs"""
         # Criar muitas declarações PEP para testar paginação
@@ -183,6 +343,57 @@ class TestPEPDeclarationViewSet:
         assert response.status_code == status.HTTP_200_OK
         assert len(response.data['results']) == 10  # Paginação limitada
         assert response.data['count'] == 100
+    
+    def test_list_pep_declarations_cursor_pagination(self, authenticated_client, kyc_profile):
+        """Paginação keyset percorre todas as declarações sem repetir"""
+        PEPDeclaration.objects.bulk_create([
+            PEPDeclaration(kyc_profile=kyc_profile, is_pep=False) for _ in range(25)
+        ])
+        
+        url = reverse('kyc:pepdeclaration-list')
+        response = authenticated_client.get(url, {'pagination': 'cursor'})
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert 'count' not in response.data
+        assert len(response.data['results']) == 10
+        
+        seen = [item['id'] for item in response.data['results']]
+        while response.data['next']:
+            response = authenticated_client.get(response.data['next'])
+            assert response.status_code == status.HTTP_200_OK
+            seen.extend(item['id'] for item in response.data['results'])
+        
+        assert len(seen) == 25
+        assert len(set(seen)) == 25
+    
+    @pytest.mark.parametrize('ordering', ['start_date', '-start_date'])
+    def test_cursor_pagination_with_null_dates(self, authenticated_client, kyc_profile, ordering):
+        """Campo anulável na ordenação: NULLs na fronteira da página não repetem nem somem"""
+        PEPDeclaration.objects.bulk_create([
+            PEPDeclaration(kyc_profile=kyc_profile, is_pep=False, start_date=date(2020, 1, 1 + i % 3))
+            for i in range(7)
+        ] + [
+            PEPDeclaration(kyc_profile=kyc_profile, is_pep=False) for _ in range(8)
+        ])
+        
+        url = reverse('kyc:pepdeclaration-list')
+        response = authenticated_client.get(url, {'pagination': 'cursor', 'ordering': ordering, 'page_size': 4})
+        pages = [response.data['results']]
+        while response.data['next']:
+            response = authenticated_client.get(response.data['next'])
+            assert response.status_code == status.HTTP_200_OK
+            pages.append(response.data['results'])
+        
+        seen = [item['id'] for page in pages for item in page]
+        assert len(seen) == len(set(seen)) == 15
+        dates = [item['start_date'] for page in pages for item in page]
+        assert (dates[-8:] if ordering == 'start_date' else dates[:8]) == [None] * 8
+        
+        # Voltando pelos links anteriores, as páginas são as mesmas
+        for page in reversed(pages[:-1]):
+            response = authenticated_client.get(response.data['previous'])
+            assert response.status_code == status.HTTP_200_OK
+            assert [item['id'] for item in response.data['results']] == [item['id'] for item in page]
 
 
 @pytest.mark.django_db
@@ -235,6 +446,41 @@ class TestUBODeclarationViewSet:
         response = authenticated_client.post(url, new_ubo_data, format='json')
         
         assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    def test_cursor_pagination_with_many_ownership_ties(self, authenticated_client, kyc_profile):
+        """Keyset composto (percentual, id): mais de 1000 empates sem repetir nem perder linhas"""
+        UBODeclaration.objects.bulk_create([
+            UBODeclaration(
+                kyc_profile=kyc_profile,
+                full_name=f'UBO {i}',
+                date_of_birth=date(1980, 1, 1),
+                nationality='Brazilian',
+                ownership_percentage=Decimal('25.00') if i < 1500 else Decimal('10.00'),
+                address_line1='Address',
+                city='City',
+                state='State',
+                postal_code='12345',
+                country='Brazil'
+            )
+            for i in range(1550)
+        ])
+        
+        url = reverse('kyc:ubodeclaration-list')
+        response = authenticated_client.get(url, {'pagination': 'cursor', 'page_size': 100})
+        pages = [response.data['results']]
+        while response.data['next']:
+            response = authenticated_client.get(response.data['next'])
+            assert response.status_code == status.HTTP_200_OK
+            pages.append(response.data['results'])
+        
+        seen = [item['id'] for page in pages for item in page]
+        assert len(pages) == 16
+        assert len(seen) == len(set(seen)) == 1550
+        assert [item['ownership_percentage'] for item in pages[-1]][-1] == '10.00'
+        
+        # Voltando pelo link anterior, a página é a mesma
+        response = authenticated_client.get(response.data['previous'])
+        assert [item['id'] for item in response.data['results']] == [item['id'] for item in pages[-2]]
 
 
 @pytest.mark.django_db
@@ -272,8 +518,9 @@ class TestKYCDocumentViewSet:
         assert len(response.data['results']) == 1
         assert response.data['results'][0]['id'] == doc1.id
     
-    def test_process_ocr_endpoint(self, authenticated_client, kyc_profile):
-        """Teste endpoint de processamento OCR"""
+    def test_process_ocr_endpoint(self, authenticated_client, kyc_profile, mocker,
+                                  django_capture_on_commit_callbacks):
+        """Teste endpoint de processamento OCR (assíncrono)"""
         document = KYCDocument.objects.create(
             kyc_profile=kyc_profile,
             document_type='passport',
@@ -281,10 +528,448 @@ class TestKYCDocumentViewSet:
             file_size=1024,
             mime_type='application/pdf'
         )
+        delay = mocker.patch('apps.kyc.tasks.process_document_ocr.delay')
         
         url = reverse('kyc:kycdocument-process-ocr', kwargs={'pk': document.id})
-        response = authenticated_client.post(url)
+        with django_capture_on_commit_callbacks(execute=True):
+            response = authenticated_client.post(url)
+            # Pedido repetido reaproveita o job ativo
+            repeated = authenticated_client.post(url)
         
-        assert response.status_code == status.HTTP_200_OK
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert repeated.data['id'] == response.data['id']
+        assert response.data['status'] == 'queued'
+        delay.assert_called_once_with(str(response.data['id']))
+        
+        status_response = authenticated_client.get(response['Location'])
+        assert status_response.status_code == status.HTTP_200_OK
+        assert status_response.data['status'] == 'queued'
+    
+    def test_process_ocr_reuses_identical_content(self, authenticated_client, kyc_profile,
+                                                  django_capture_on_commit_callbacks):
+        """Documento com o mesmo SHA-256 já processado não passa de novo pelo OCR"""
+        digest = hashlib.sha256(b'same scan').hexdigest()
+        KYCDocument.objects.create(
+            kyc_profile=kyc_profile, document_type='passport', original_filename='a.pdf',
+            file_size=9, mime_type='application/pdf', sha256=digest,
+            ocr_processed=True, ocr_text='JOHN DOE', ocr_confidence=0.87
+        )
+        document = KYCDocument.objects.create(
+            kyc_profile=kyc_profile, document_type='passport', original_filename='b.pdf',
+            file_size=9, mime_type='application/pdf', sha256=digest
+        )
+        
+        url = reverse('kyc:kycdocument-process-ocr', kwargs={'pk': document.id})
+        with django_capture_on_commit_callbacks(execute=True):
+            response = authenticated_client.post(url)
+        
+        assert response.status_code == status.HTTP_202_ACCEPTED
         document.refresh_from_db()
-        assert document.ocr_processed is True
+        assert document.ocr_text == 'JOHN DOE'
+        assert document.ocr_confidence == 0.87
+        assert OCRJob.objects.get(pk=response.data['id']).reused is True
+    
+    def test_upload_metadata_comes_from_content(self, authenticated_client, kyc_profile, upload_storage):
+        """Tipo, tamanho e hash vêm do conteúdo, não do cliente"""
+        content = b'%PDF-1.4 scanned passport'
+        upload = SimpleUploadedFile('passport.png', content, content_type='image/png')
+        
+        response = authenticated_client.post(reverse('kyc:kycdocument-list'), {
+            'kyc_profile': str(kyc_profile.id),
+            'document_type': 'passport',
+            'original_filename': 'passport.png',
+            'file': upload,
+        }, format='multipart')
+        
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['mime_type'] == 'application/pdf'
+        assert response.data['file_size'] == len(content)
+        assert response.data['sha256'] == hashlib.sha256(content).hexdigest()
+    
+    def test_upload_rejects_spoofed_content_type(self, authenticated_client, kyc_profile, upload_storage):
+        upload = SimpleUploadedFile('passport.pdf', b'#!/bin/sh\necho hi\n', content_type='application/pdf')
+        
+        response = authenticated_client.post(reverse('kyc:kycdocument-list'), {
+            'kyc_profile': str(kyc_profile.id),
+            'document_type': 'passport',
+            'original_filename': 'passport.pdf',
+            'file': upload,
+        }, format='multipart')
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'file' in response.data
+    
+    def test_replacing_file_stores_new_content(self, authenticated_client, kyc_profile, upload_storage,
+                                               django_capture_on_commit_callbacks):
+        """PATCH com outro arquivo grava o conteúdo novo e libera o blob anterior"""
+        old_content = b'%PDF-1.4 old passport'
+        new_content = b'%PDF-1.4 renewed passport scan'
+        response = authenticated_client.post(reverse('kyc:kycdocument-list'), {
+            'kyc_profile': str(kyc_profile.id),
+            'document_type': 'passport',
+            'original_filename': 'old.pdf',
+            'file': SimpleUploadedFile('old.pdf', old_content, content_type='application/pdf'),
+        }, format='multipart')
+        assert response.status_code == status.HTTP_201_CREATED
+        old_sha256 = response.data['sha256']
+        
+        url = reverse('kyc:kycdocument-detail', kwargs={'pk': response.data['id']})
+        with django_capture_on_commit_callbacks(execute=True):
+            response = authenticated_client.patch(url, {
+                'file': SimpleUploadedFile('new.pdf', new_content, content_type='application/pdf'),
+            }, format='multipart')
+        
+        assert response.status_code == status.HTTP_200_OK
+        new_sha256 = hashlib.sha256(new_content).hexdigest()
+        assert response.data['sha256'] == new_sha256
+        assert response.data['file_size'] == len(new_content)
+        document = KYCDocument.objects.get(pk=response.data['id'])
+        with document.file.open('rb') as fh:
+            assert fh.read() == new_content
+        assert DocumentBlob.objects.get(sha256=new_sha256).ref_count == 1
+        assert not DocumentBlob.objects.filter(sha256=old_sha256).exists()
+        assert not document.file.storage.exists(blob_name(old_sha256))
+    
+    def test_replacing_file_updates_content_metadata(
+        self, authenticated_client, kyc_profile, upload_storage, django_capture_on_commit_callbacks, mocker
+    ):
+        """Tipo e tamanho do arquivo novo; OCR e renditions do anterior são descartados"""
+        response = authenticated_client.post(reverse('kyc:kycdocument-list'), {
+            'kyc_profile': str(kyc_profile.id),
+            'document_type': 'passport',
+            'original_filename': 'passport.pdf',
+            'file': SimpleUploadedFile('passport.pdf', b'%PDF-1.4 passport', content_type='application/pdf'),
+        }, format='multipart')
+        KYCDocument.objects.filter(pk=response.data['id']).update(
+            ocr_processed=True, ocr_text='JOHN DOE', ocr_confidence=0.9, renditions={'thumbnail': 'old'}
+        )
+        buffer = io.BytesIO()
+        Image.new('RGB', (40, 30), (200, 30, 30)).save(buffer, 'PNG')
+        renditions = mocker.patch('apps.kyc.tasks.generate_document_renditions.delay')
+        
+        url = reverse('kyc:kycdocument-detail', kwargs={'pk': response.data['id']})
+        with django_capture_on_commit_callbacks(execute=True):
+            response = authenticated_client.patch(url, {
+                'file': SimpleUploadedFile('passport.png', buffer.getvalue(), content_type='application/pdf'),
+            }, format='multipart')
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['mime_type'] == 'image/png'
+        assert response.data['file_size'] == len(buffer.getvalue())
+        assert response.data['original_filename'] == 'passport.png'
+        assert response.data['ocr_processed'] is False
+        assert response.data['ocr_text'] == ''
+        assert response.data['thumbnail_url'] is None
+        renditions.assert_called_once_with(response.data['id'])
+
+
+@pytest.fixture
+def upload_storage(settings, tmp_path):
+    """MEDIA_ROOT e staging isolados por teste"""
+    settings.MEDIA_ROOT = str(tmp_path / 'media')
+    settings.KYC_UPLOAD = {'STAGING_DIR': str(tmp_path / 'staging'), 'READ_CHUNK_SIZE': 4}
+    uploads.hash_states.clear()
+    return tmp_path
+
+
+@pytest.mark.django_db
+@pytest.mark.api
+@pytest.mark.views
+class TestDocumentUploadViewSet:
+    """Testes para o upload retomável de documentos"""
+    
+    CONTENT = b'%PDF-1.4 passport scan bytes'
+    
+    def _open_session(self, client, kyc_profile, **extra):
+        data = {
+            'kyc_profile': str(kyc_profile.id),
+            'document_type': 'passport',
+            'filename': 'passport.pdf',
+            'mime_type': 'application/pdf',
+            'upload_length': len(self.CONTENT),
+            **extra,
+        }
+        return client.post(reverse('kyc:documentupload-list'), data, format='json')
+    
+    def _patch(self, client, session_id, offset, body):
+        return client.generic(
+            'PATCH',
+            reverse('kyc:documentupload-detail', kwargs={'pk': session_id}),
+            data=body,
+            content_type='application/offset+octet-stream',
+            HTTP_UPLOAD_OFFSET=str(offset),
+        )
+    
+    def test_chunked_upload_creates_document(self, authenticated_client, kyc_profile, upload_storage):
+        """Partes em sequência completam o upload e criam o documento"""
+        checksum = hashlib.sha256(self.CONTENT).hexdigest()
+        response = self._open_session(authenticated_client, kyc_profile, checksum=checksum)
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response['Upload-Offset'] == '0'
+        assert response['Location'].endswith(f"/uploads/{response.data['id']}/")
+        session_id = response.data['id']
+        
+        response = self._patch(authenticated_client, session_id, 0, self.CONTENT[:10])
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert response['Upload-Offset'] == '10'
+        
+        response = self._patch(authenticated_client, session_id, 10, self.CONTENT[10:])
+        assert response.status_code == status.HTTP_201_CREATED
+        
+        document = KYCDocument.objects.get(pk=response.data['id'])
+        assert document.file_size == len(self.CONTENT)
+        assert document.original_filename == 'passport.pdf'
+        assert document.sha256 == checksum
+        assert document.mime_type == 'application/pdf'
+        with document.file.open('rb') as fh:
+            assert fh.read() == self.CONTENT
+        
+        session = DocumentUploadSession.objects.get(pk=session_id)
+        assert session.status == 'completed'
+        assert session.sha256 == checksum
+        # Arquivo parcial foi movido para o storage
+        assert not list((upload_storage / 'staging').iterdir())
+    
+    def test_resume_after_lost_hash_state(self, authenticated_client, kyc_profile, upload_storage):
+        """Retomada em outro worker: hash reconstruído sem reenvio de bytes"""
+        session_id = self._open_session(authenticated_client, kyc_profile).data['id']
+        self._patch(authenticated_client, session_id, 0, self.CONTENT[:7])
+        uploads.hash_states.clear()
+        
+        response = authenticated_client.head(reverse('kyc:documentupload-detail', kwargs={'pk': session_id}))
+        assert response['Upload-Offset'] == '7'
+        
+        response = self._patch(authenticated_client, session_id, 7, self.CONTENT[7:])
+        assert response.status_code == status.HTTP_201_CREATED
+        session = DocumentUploadSession.objects.get(pk=session_id)
+        assert session.sha256 == hashlib.sha256(self.CONTENT).hexdigest()
+    
+    def test_offset_mismatch_conflict(self, authenticated_client, kyc_profile, upload_storage):
+        session_id = self._open_session(authenticated_client, kyc_profile).data['id']
+        response = self._patch(authenticated_client, session_id, 5, self.CONTENT[5:])
+        
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert response['Upload-Offset'] == '0'
+    
+    def test_declared_size_over_limit_rejected(self, authenticated_client, kyc_profile, upload_storage, settings):
+        settings.KYC_DOCUMENT_MAX_SIZE = 16
+        response = self._open_session(authenticated_client, kyc_profile)
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'upload_length' in response.data
+    
+    def test_chunk_beyond_declared_length_rejected(self, authenticated_client, kyc_profile, upload_storage):
+        session_id = self._open_session(authenticated_client, kyc_profile).data['id']
+        response = self._patch(authenticated_client, session_id, 0, self.CONTENT + b'extra')
+        
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        assert DocumentUploadSession.objects.get(pk=session_id).offset == 0
+    
+    def test_checksum_mismatch_restarts_session(self, authenticated_client, kyc_profile, upload_storage):
+        session_id = self._open_session(authenticated_client, kyc_profile, checksum='0' * 64).data['id']
+        response = self._patch(authenticated_client, session_id, 0, self.CONTENT)
+        
+        assert response.status_code == 460
+        assert response['Upload-Offset'] == '0'
+        assert not KYCDocument.objects.exists()
+    
+    def test_other_user_cannot_upload_to_profile(self, api_client, kyc_profile, upload_storage):
+        other_user = User.objects.create_user(username='other', email='other@test.com')
+        api_client.force_authenticate(user=other_user)
+        response = self._open_session(api_client, kyc_profile)
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'kyc_profile' in response.data
+    
+    def test_disallowed_content_rejected_on_completion(self, authenticated_client, kyc_profile, upload_storage):
+        """Tipo declarado permitido, mas conteúdo real não"""
+        content = b'plain text, not a pdf'
+        response = self._open_session(authenticated_client, kyc_profile, upload_length=len(content))
+        session_id = response.data['id']
+        response = self._patch(authenticated_client, session_id, 0, content)
+        
+        assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+        assert DocumentUploadSession.objects.get(pk=session_id).status == 'aborted'
+        assert not KYCDocument.objects.exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.api
+@pytest.mark.views
+class TestKYCDocumentDownload:
+    """Testes para o download autenticado de documentos"""
+    
+    CONTENT = b'%PDF-1.4 ' + bytes(range(256)) * 4
+    
+    @pytest.fixture
+    def document(self, kyc_profile, upload_storage):
+        return KYCDocument.objects.create(
+            kyc_profile=kyc_profile,
+            document_type='passport',
+            original_filename='passport.pdf',
+            file=SimpleUploadedFile('passport.pdf', self.CONTENT),
+            file_size=len(self.CONTENT),
+            mime_type='application/pdf'
+        )
+    
+    def _url(self, document):
+        return reverse('kyc:kycdocument-download', kwargs={'pk': document.pk})
+    
+    def test_full_download(self, authenticated_client, document):
+        response = authenticated_client.get(self._url(document), HTTP_ACCEPT='application/pdf')
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert b''.join(response.streaming_content) == self.CONTENT
+        assert response['Content-Type'] == 'application/pdf'
+        assert response['Content-Length'] == str(len(self.CONTENT))
+        assert response['ETag'] == f'"{document.sha256}"'
+        assert 'attachment; filename="passport.pdf"' == response['Content-Disposition']
+    
+    def test_range_request(self, authenticated_client, document):
+        response = authenticated_client.get(self._url(document), HTTP_RANGE='bytes=9-18')
+        
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert b''.join(response.streaming_content) == self.CONTENT[9:19]
+        assert response['Content-Range'] == f'bytes 9-18/{len(self.CONTENT)}'
+        assert response['Content-Length'] == '10'
+    
+    def test_suffix_range_and_unsatisfiable(self, authenticated_client, document):
+        response = authenticated_client.get(self._url(document), HTTP_RANGE='bytes=-4')
+        assert b''.join(response.streaming_content) == self.CONTENT[-4:]
+        
+        response = authenticated_client.get(self._url(document), HTTP_RANGE=f'bytes={len(self.CONTENT)}-')
+        assert response.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+        assert response['Content-Range'] == f'bytes */{len(self.CONTENT)}'
+    
+    def test_if_range_mismatch_returns_full_file(self, authenticated_client, document):
+        response = authenticated_client.get(
+            self._url(document), HTTP_RANGE='bytes=0-3', HTTP_IF_RANGE='"stale"'
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert b''.join(response.streaming_content) == self.CONTENT
+    
+    def test_conditional_request_not_modified(self, authenticated_client, document):
+        response = authenticated_client.get(self._url(document), HTTP_IF_NONE_MATCH=f'"{document.sha256}"')
+        
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    
+    def test_last_modified_follows_file_replacement(self, authenticated_client, document):
+        replaced_at = document.created_at + timedelta(days=1)
+        KYCDocument.objects.filter(pk=document.pk).update(updated_at=replaced_at)
+        
+        response = authenticated_client.get(
+            self._url(document), HTTP_IF_MODIFIED_SINCE=http_date(document.created_at.timestamp())
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Last-Modified'] == http_date(replaced_at.timestamp())
+        
+        response = authenticated_client.get(self._url(document), HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    
+    def test_x_accel_redirect(self, authenticated_client, document, settings):
+        settings.KYC_DOWNLOAD = {'ACCEL_REDIRECT_PREFIX': '/protected-media/'}
+        response = authenticated_client.get(self._url(document))
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response['X-Accel-Redirect'] == f'/protected-media/{document.file.name}'
+        assert response.content == b''
+    
+    def test_other_user_cannot_download(self, api_client, document):
+        other_user = User.objects.create_user(username='other', email='other@test.com')
+        api_client.force_authenticate(user=other_user)
+        
+        response = api_client.get(self._url(document))
+        
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+@pytest.mark.api
+@pytest.mark.views
+class TestKYCDocumentBatchUpload:
+    """Testes para o upload em lote de documentos do perfil"""
+    
+    def _url(self, profile):
+        return reverse('kyc:kycprofile-upload-documents', kwargs={'pk': profile.id})
+    
+    def test_batch_upload_reports_each_file(self, authenticated_client, kyc_profile, upload_storage):
+        """Arquivos válidos são criados e os inválidos reportados na mesma resposta"""
+        content = b'%PDF-1.4 utility bill'
+        response = authenticated_client.post(self._url(kyc_profile), {
+            'files': [
+                SimpleUploadedFile('passport.pdf', b'%PDF-1.4 passport'),
+                SimpleUploadedFile('script.pdf', b'#!/bin/sh\necho hi\n'),
+                SimpleUploadedFile('address.pdf', content),
+            ],
+            'document_types': ['passport', 'utility_bill', 'utility_bill'],
+        }, format='multipart')
+        
+        assert response.status_code == status.HTTP_207_MULTI_STATUS
+        assert response.data['created'] == 2
+        results = response.data['results']
+        assert [result['status'] for result in results] == ['created', 'error', 'created']
+        assert results[2]['document']['sha256'] == hashlib.sha256(content).hexdigest()
+        assert kyc_profile.documents.count() == 2
+        assert kyc_profile.documents.get(document_type='passport').file.read() == b'%PDF-1.4 passport'
+    
+    def test_duplicate_files_share_blob(self, authenticated_client, kyc_profile, upload_storage):
+        from apps.kyc.models import DocumentBlob
+        
+        content = b'%PDF-1.4 same content'
+        response = authenticated_client.post(self._url(kyc_profile), {
+            'files': [SimpleUploadedFile('a.pdf', content), SimpleUploadedFile('b.pdf', content)],
+            'document_types': ['passport', 'national_id'],
+        }, format='multipart')
+        
+        assert response.status_code == status.HTTP_201_CREATED
+        assert DocumentBlob.objects.get(sha256=hashlib.sha256(content).hexdigest()).ref_count == 2
+    
+    def test_rollback_removes_written_blobs(self, authenticated_client, kyc_profile, upload_storage, mocker):
+        """Lote revertido não deixa arquivos órfãos nem remove blobs já referenciados"""
+        existing = b'%PDF-1.4 existing passport'
+        response = authenticated_client.post(self._url(kyc_profile), {
+            'files': [SimpleUploadedFile('passport.pdf', existing)],
+            'document_types': ['passport'],
+        }, format='multipart')
+        assert response.status_code == status.HTTP_201_CREATED
+        storage = KYCDocument._meta.get_field('file').storage
+        existing_name = blob_name(hashlib.sha256(existing).hexdigest())
+        new_name = blob_name(hashlib.sha256(b'%PDF-1.4 new bill').hexdigest())
+        
+        # Falha depois do bulk_create, com a transação ainda aberta
+        mocker.patch('apps.kyc.tasks.enqueue_document_processing', side_effect=DatabaseError('broker down'))
+        response = authenticated_client.post(self._url(kyc_profile), {
+            'files': [
+                SimpleUploadedFile('copy.pdf', existing),
+                SimpleUploadedFile('bill.pdf', b'%PDF-1.4 new bill'),
+            ],
+            'document_types': ['passport', 'utility_bill'],
+        }, format='multipart')
+        
+        assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+        assert storage.exists(existing_name)
+        assert not storage.exists(new_name)
+        assert list(DocumentBlob.objects.values_list('ref_count', flat=True)) == [1]
+    
+    def test_mismatched_document_types(self, authenticated_client, kyc_profile, upload_storage):
+        response = authenticated_client.post(self._url(kyc_profile), {
+            'files': [SimpleUploadedFile('a.pdf', b'%PDF-1.4 a')],
+            'document_types': ['passport', 'national_id'],
+        }, format='multipart')
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not KYCDocument.objects.exists()
+    
+    def test_other_user_profile(self, api_client, kyc_profile, upload_storage):
+        other_user = User.objects.create_user(username='other', email='other@test.com')
+        api_client.force_authenticate(user=other_user)
+        
+        response = api_client.post(self._url(kyc_profile), {
+            'files': [SimpleUploadedFile('a.pdf', b'%PDF-1.4 a')],
+            'document_types': ['passport'],
+        }, format='multipart')
+        
+        assert response.status_code == status.HTTP_404_NOT_FOUND
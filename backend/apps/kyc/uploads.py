@@ -0,0 +1,291 @@
+"""
+Upload retomável e em partes (estilo tus) de documentos KYC
+Cada PATCH é lido do corpo da requisição em blocos de tamanho fixo e anexado
+direto ao arquivo parcial em staging, atualizando tamanho, SHA-256 e o
+cabeçalho usado na detecção do tipo (ContentInspector) de forma incremental;
+nada é bufferizado em memória e o limite de tamanho é aplicado antes
+(Content-Length) e durante a leitura. Ao completar, o arquivo é movido
+para o blob do KYCDocument sem nova cópia, ou descartado se o blob já existir.
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from .content import ALLOWED_DOCUMENT_MIME_TYPES, ContentInspector
+from .models import DocumentUploadSession, KYCDocument
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    # Diretório dos arquivos parciais (mesmo filesystem do MEDIA_ROOT)
+    'STAGING_DIR': None,
+    # Tamanho (bytes) de cada leitura do corpo da requisição
+    'READ_CHUNK_SIZE': 64 * 1024,
+    # Validade (s) de uma sessão sem completar
+    'SESSION_TTL': 24 * 60 * 60,
+}
+
+# Estados de inspeção (hash parcial) mantidos em memória do processo
+MAX_HASH_STATES = 256
+
+
+class UploadError(Exception):
+    """Erro de upload com status HTTP associado"""
+
+    status_code = 400
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        if status_code is not None:
+            self.status_code = status_code
+
+
+class OffsetMismatch(UploadError):
+    status_code = 409
+
+
+class UploadTooLarge(UploadError):
+    status_code = 413
+
+
+class UploadExpired(UploadError):
+    status_code = 410
+
+
+class ChecksumMismatch(UploadError):
+    status_code = 460  # tus: Checksum Mismatch
+
+
+class ContentTypeNotAllowed(UploadError):
+    status_code = 415
+
+
+def get_upload_config():
+    config = {**DEFAULTS, **getattr(settings, 'KYC_UPLOAD', {})}
+    if not config['STAGING_DIR']:
+        config['STAGING_DIR'] = os.path.join(settings.MEDIA_ROOT, 'kyc_uploads')
+    return config
+
+
+def get_max_document_size():
+    return getattr(settings, 'KYC_DOCUMENT_MAX_SIZE', 10 * 1024 * 1024)
+
+
+def staging_path(session):
+    return os.path.join(str(get_upload_config()['STAGING_DIR']), f'{session.pk}.part')
+
+
+class _HashStates:
+    """
+    Inspeções parciais por sessão, válidas apenas para o offset registrado
+    Objetos hashlib não são serializáveis; quando a parte seguinte chega em
+    outro worker (ou após restart), o hash é reconstruído relendo os bytes já
+    persistidos em staging, sem que o cliente reenvie nada.
+    """
+
+    def __init__(self, max_entries=MAX_HASH_STATES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._states = OrderedDict()
+
+    def put(self, session_id, offset, inspector):
+        with self._lock:
+            self._states[session_id] = (offset, inspector)
+            self._states.move_to_end(session_id)
+            while len(self._states) > self.max_entries:
+                self._states.popitem(last=False)
+
+    def take(self, session_id, offset):
+        with self._lock:
+            state = self._states.pop(session_id, None)
+        if state is not None and state[0] == offset:
+            return state[1]
+        return None
+
+    def discard(self, session_id):
+        with self._lock:
+            self._states.pop(session_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
+
+
+hash_states = _HashStates()
+
+
+def _reinspect(path, length, chunk_size):
+    """Reconstruir a inspeção dos primeiros `length` bytes do arquivo parcial"""
+    inspector = ContentInspector()
+    remaining = length
+    with open(path, 'rb') as fh:
+        while remaining > 0:
+            data = fh.read(min(chunk_size, remaining))
+            if not data:
+                break
+            inspector.update(data)
+            remaining -= len(data)
+    if remaining:
+        raise UploadError(_('Staged upload data is missing'), status_code=409)
+    return inspector
+
+
+def create_session(user, kyc_profile, document_type, filename, mime_type, upload_length, checksum=''):
+    """Abrir sessão de upload; o tamanho declarado já é validado aqui"""
+    if upload_length > get_max_document_size():
+        raise UploadTooLarge(_('File size cannot exceed 10MB'))
+
+    ttl = get_upload_config()['SESSION_TTL']
+    return DocumentUploadSession.objects.create(
+        kyc_profile=kyc_profile,
+        created_by=user,
+        document_type=document_type,
+        original_filename=os.path.basename(filename),
+        mime_type=mime_type,
+        upload_length=upload_length,
+        checksum=checksum.lower(),
+        expires_at=timezone.now() + timedelta(seconds=ttl),
+    )
+
+
+def append_chunk(session, stream, offset, content_length=None):
+    """
+    Anexar o corpo de um PATCH ao arquivo parcial da sessão
+    A sessão deve estar bloqueada (select_for_update) pelo chamador. Se o
+    cliente cair no meio da parte, os bytes já recebidos são mantidos e o
+    offset avança até eles. Retorna a quantidade de bytes gravados.
+    """
+    if session.status != 'uploading':
+        raise UploadError(_('Upload session is not accepting data'), status_code=409)
+    if session.expires_at <= timezone.now():
+        raise UploadExpired(_('Upload session has expired'))
+    if offset != session.offset:
+        raise OffsetMismatch(_('Upload-Offset does not match the current offset'))
+
+    remaining = session.upload_length - session.offset
+    if content_length is not None and content_length > remaining:
+        # Rejeição antecipada: nenhum byte do corpo é lido
+        raise UploadTooLarge(_('Chunk exceeds the declared upload length'))
+
+    config = get_upload_config()
+    chunk_size = config['READ_CHUNK_SIZE']
+    path = staging_path(session)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    inspector = hash_states.take(session.pk, session.offset)
+    if inspector is None:
+        if session.offset:
+            inspector = _reinspect(path, session.offset, chunk_size)
+        else:
+            inspector = ContentInspector()
+
+    written = 0
+    with open(path, 'r+b' if os.path.exists(path) else 'wb') as fh:
+        # Descartar bytes de uma parte anterior não confirmada no banco
+        fh.seek(session.offset)
+        fh.truncate()
+        try:
+            while True:
+                data = stream.read(chunk_size)
+                if not data:
+                    break
+                if written + len(data) > remaining:
+                    fh.truncate(session.offset)
+                    raise UploadTooLarge(_('Chunk exceeds the declared upload length'))
+                fh.write(data)
+                inspector.update(data)
+                written += len(data)
+        except OSError as e:
+            # Conexão interrompida: mantém o que já foi recebido
+            logger.warning(f"Upload {session.pk} interrompido após {written} bytes: {e}")
+
+    session.offset += written
+    update_fields = ['offset', 'updated_at']
+    if session.is_complete:
+        # Tipo real pelos magic bytes substitui o declarado na abertura
+        session.sha256 = inspector.sha256
+        session.mime_type = inspector.mime_type(declared=session.mime_type)
+        update_fields += ['sha256', 'mime_type']
+    else:
+        hash_states.put(session.pk, session.offset, inspector)
+    session.save(update_fields=update_fields)
+    return written
+
+
+class _StagedFile(File):
+    """Arquivo já em disco: FileSystemStorage o move em vez de copiar"""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def complete_upload(session):
+    """Criar o KYCDocument a partir de uma sessão completa"""
+    path = staging_path(session)
+
+    if session.checksum and session.checksum != session.sha256:
+        # Conteúdo corrompido: a sessão recomeça do zero
+        _remove_staged(path)
+        session.offset = 0
+        session.sha256 = ''
+        session.save(update_fields=['offset', 'sha256', 'updated_at'])
+        raise ChecksumMismatch(_('Uploaded content does not match the declared checksum'))
+    
+    if session.mime_type not in ALLOWED_DOCUMENT_MIME_TYPES:
+        abort_session(session)
+        raise ContentTypeNotAllowed(_('File type not allowed'))
+
+    document = KYCDocument(
+        kyc_profile=session.kyc_profile,
+        document_type=session.document_type,
+        original_filename=session.original_filename,
+        file_size=session.upload_length,
+        mime_type=session.mime_type,
+        sha256=session.sha256,
+    )
+    with open(path, 'rb') as fh:
+        # Gravado no save(), após adquirir a referência ao blob
+        document.file = _StagedFile(fh, name=session.original_filename)
+        document.save()
+    # Blob já existente: o arquivo parcial não foi movido
+    _remove_staged(path)
+
+    session.status = 'completed'
+    session.document = document
+    session.save(update_fields=['status', 'document', 'updated_at'])
+    hash_states.discard(session.pk)
+    return document
+
+
+def abort_session(session):
+    """Cancelar a sessão e liberar o arquivo parcial"""
+    _remove_staged(staging_path(session))
+    hash_states.discard(session.pk)
+    session.status = 'aborted'
+    session.save(update_fields=['status', 'updated_at'])
+
+
+def purge_expired_sessions(now=None):
+    """Abortar sessões expiradas sem completar; retorna a quantidade"""
+    now = now or timezone.now()
+    expired = DocumentUploadSession.objects.filter(status='uploading', expires_at__lte=now)
+    count = 0
+    for session in expired.iterator():
+        abort_session(session)
+        count += 1
+    return count
+
+
+def _remove_staged(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -9,7 +9,12 @@ from . import views
 app_name = 'kyc'
 
 router = DefaultRouter()
-# router.register(r'example', views.ExampleViewSet)
+router.register(r'profiles', views.KYCProfileViewSet, basename='kycprofile')
+router.register(r'ubo-declarations', views.UBODeclarationViewSet, basename='ubodeclaration')
+router.register(r'pep-declarations', views.PEPDeclarationViewSet, basename='pepdeclaration')
+router.register(r'documents', views.KYCDocumentViewSet, basename='kycdocument')
+router.register(r'uploads', views.DocumentUploadViewSet, basename='documentupload')
+router.register(r'ocr-jobs', views.OCRJobViewSet, basename='ocrjob')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -3,23 +3,38 @@ Views do app KYC com correções de bugs identificados
 CORREÇÃO: Implementação de paginação para tabela PEPs
 """
 
-from rest_framework import viewsets, status, filters
+from rest_framework import viewsets, mixins, status, filters, renderers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.parsers import MultiPartParser
+from rest_framework.pagination import PageNumberPagination, CursorPagination
+from rest_framework.exceptions import NotFound
 from django_filters.rest_framework import DjangoFilterBackend
+from django.http import Http404
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import F, Q, Prefetch, Count
+from django.core.cache import cache
+import io
+import json
 import logging
 
-from .models import KYCProfile, UBODeclaration, PEPDeclaration, KYCDocument
+from apps.core.metrics import record_cache_access
+from .models import KYCProfile, UBODeclaration, PEPDeclaration, KYCDocument, DocumentUploadSession, OCRJob
+from . import downloads, uploads
+from .cache import get_pep_summary_timeout, pep_summary_cache_key
+from .search import TrigramSearchFilter, SEARCH_RANK_FIELD
 from .serializers import (
     KYCProfileSerializer, 
     UBODeclarationSerializer, 
     PEPDeclarationSerializer,
-    KYCDocumentSerializer
+    KYCDocumentSerializer,
+    KYCDocumentBatchUploadSerializer,
+    DocumentUploadSessionSerializer,
+    OCRJobSerializer
 )
 
 logger = logging.getLogger(__name__)
@@ -42,18 +57,171 @@ class LargePEPResultsSetPagination(PageNumberPagination):
     max_page_size = 50  # Limite menor para evitar sobrecarga
 
 
-class KYCProfileViewSet(viewsets.ModelViewSet):
+class KeysetCursorPagination(CursorPagination):
+    """
+    Paginação keyset com chave composta por todos os campos da ordenação
+    O CursorPagination do DRF filtra só pelo primeiro campo e resolve empates
+    com OFFSET (limitado a offset_cutoff), então campos com muitos empates
+    repetem ou perdem linhas. Aqui a ordenação sempre termina na pk e o
+    cursor guarda o valor de cada campo: toda posição é única e nenhuma
+    página usa OFFSET. NULL é tratado como maior que qualquer valor (por
+    último na ordem crescente, primeiro na decrescente) em todos os bancos.
+    """
+    
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view))
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering.append('-pk' if ordering[0].startswith('-') else 'pk')
+        return tuple(ordering)
+    
+    def _get_position_from_instance(self, instance, ordering):
+        values = [getattr(instance, field.lstrip('-')) for field in ordering]
+        return json.dumps([None if value is None else str(value) for value in values])
+    
+    def _order_by(self, reverse):
+        """Ordenação com a posição dos NULLs explícita (invertida se `reverse`)"""
+        expressions = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            if field.startswith('-') != reverse:
+                expressions.append(F(name).desc(nulls_first=True))
+            else:
+                expressions.append(F(name).asc(nulls_last=True))
+        return expressions
+    
+    def _keyset_filter(self, position, reverse):
+        """Linhas depois de `position` na ordenação (antes dela se `reverse`)"""
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            if value is None:
+                # Depois de NULL: na ordem decrescente, todos os valores; na crescente, nada
+                after = Q(**{f'{name}__isnull': False}) if descending else Q(pk__in=[])
+                same = Q(**{f'{name}__isnull': True})
+            elif descending:
+                after = Q(**{f'{name}__lt': value})
+                same = Q(**{name: value})
+            else:
+                after = Q(**{f'{name}__gt': value}) | Q(**{f'{name}__isnull': True})
+                same = Q(**{name: value})
+            condition |= equal & after
+            equal &= same
+        return condition
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor.reverse)
+        current_position = self.cursor.position if self.cursor else None
+        
+        queryset = queryset.order_by(*self._order_by(reverse))
+        if current_position is not None:
+            queryset = queryset.filter(self._keyset_filter(current_position, reverse))
+        
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_following_position = len(results) > len(self.page)
+        following_position = (
+            self._get_position_from_instance(results[-1], self.ordering) if has_following_position else None
+        )
+        
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None
+            self.has_previous = has_following_position
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None
+            self.next_position = following_position
+            self.previous_position = current_position
+        
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+
+class CreatedAtCursorPagination(KeysetCursorPagination):
+    """
+    Paginação keyset (cursor) por created_at com id como desempate
+    Sem OFFSET nem COUNT(*): páginas profundas custam o mesmo que a primeira
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+
+class PEPCursorPagination(CreatedAtCursorPagination):
+    """Paginação keyset para PEPs, com os mesmos limites da paginação por página"""
+    page_size = 10
+    max_page_size = 50
+
+
+class OwnershipCursorPagination(CreatedAtCursorPagination):
+    """Paginação keyset para UBOs por percentual de propriedade"""
+    ordering = ('-ownership_percentage', '-id')
+
+
+class CursorPaginationMixin:
+    """
+    Permite escolher a paginação por requisição
+    `?pagination=cursor` (ou um `?cursor=` de uma página anterior) usa
+    cursor_pagination_class; caso contrário mantém pagination_class
+    """
+    cursor_pagination_class = CreatedAtCursorPagination
+    
+    def uses_cursor_pagination(self):
+        params = self.request.query_params
+        return params.get('pagination') == 'cursor' or 'cursor' in params
+    
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.request is not None and self.uses_cursor_pagination():
+                self._paginator = self.cursor_pagination_class()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+
+class KYCProfileViewSet(CursorPaginationMixin, viewsets.ModelViewSet):
     """ViewSet para perfis KYC"""
     
-    queryset = KYCProfile.objects.all()
+    # select_related + Prefetch carregam o perfil e todos os relacionamentos
+    # aninhados do serializer em um número fixo de queries, independente
+    # do tamanho da página (evita N+1 por linha)
+    queryset = KYCProfile.objects.select_related('user', 'reviewed_by').prefetch_related(
+        Prefetch('ubo_declarations', queryset=UBODeclaration.objects.order_by('-ownership_percentage')),
+        Prefetch('pep_declarations', queryset=PEPDeclaration.objects.order_by('-created_at')),
+        Prefetch('documents', queryset=KYCDocument.objects.order_by('-created_at')),
+    )
     serializer_class = KYCProfileSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = StandardResultsSetPagination
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, TrigramSearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'nationality', 'country']
-    search_fields = ['full_name', 'document_number', 'user__email']
-    ordering_fields = ['created_at', 'updated_at', 'full_name']
-    ordering = ['-created_at']
+    search_fields = ['full_name', 'document_number', 'user_email']
+    ordering_fields = ['created_at', 'updated_at', 'full_name', SEARCH_RANK_FIELD]
+    ordering = ['-created_at', '-id']
     
     def get_queryset(self):
         """Filtrar por usuário se não for staff"""
@@ -62,6 +230,26 @@ class KYCProfileViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(user=self.request.user)
         return queryset
     
+    @action(detail=True, methods=['post'], url_path='documents/batch', parser_classes=[MultiPartParser])
+    def upload_documents(self, request, pk=None):
+        """
+        Enviar vários documentos do perfil em uma requisição
+        201 se todos foram criados, 207 se parte falhou, 400 se nenhum foi aceito
+        """
+        profile = self.get_object()
+        serializer = KYCDocumentBatchUploadSerializer(data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        results = serializer.save(kyc_profile=profile)
+        
+        created = sum(1 for result in results if result['status'] == 'created')
+        if created == len(results):
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({'created': created, 'results': results}, status=response_status)
+    
     @action(detail=True, methods=['post'])
     def submit_for_review(self, request, pk=None):
         """Submeter perfil para revisão"""
@@ -130,7 +318,7 @@ class KYCProfileViewSet(viewsets.ModelViewSet):
             }
             
             return Response(validation_result)
-            
+        
         except Exception as e:
             logger.error(f"Erro na validação do perfil {pk}: {str(e)}")
             return Response(
@@ -139,16 +327,17 @@ class KYCProfileViewSet(viewsets.ModelViewSet):
             )
 
 
-class UBODeclarationViewSet(viewsets.ModelViewSet):
+class UBODeclarationViewSet(CursorPaginationMixin, viewsets.ModelViewSet):
     """ViewSet para declarações UBO"""
     
     serializer_class = UBODeclarationSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = StandardResultsSetPagination
+    cursor_pagination_class = OwnershipCursorPagination
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['kyc_profile', 'nationality', 'country']
     ordering_fields = ['ownership_percentage', 'created_at']
-    ordering = ['-ownership_percentage']
+    ordering = ['-ownership_percentage', '-id']
     
     def get_queryset(self):
         """Filtrar UBOs baseado no perfil KYC do usuário"""
@@ -178,7 +367,7 @@ class UBODeclarationViewSet(viewsets.ModelViewSet):
         serializer.save()
 
 
-class PEPDeclarationViewSet(viewsets.ModelViewSet):
+class PEPDeclarationViewSet(CursorPaginationMixin, viewsets.ModelViewSet):
     """
     ViewSet para declarações PEP
     CORREÇÃO: Implementação de paginação otimizada para evitar congelamento
@@ -187,11 +376,12 @@ class PEPDeclarationViewSet(viewsets.ModelViewSet):
     serializer_class = PEPDeclarationSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = LargePEPResultsSetPagination  # Paginação específica
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    cursor_pagination_class = PEPCursorPagination
+    filter_backends = [DjangoFilterBackend, TrigramSearchFilter, filters.OrderingFilter]
     filterset_fields = ['is_pep', 'pep_type', 'country']
-    search_fields = ['position_held', 'organization', 'related_pep_name']
-    ordering_fields = ['created_at', 'start_date', 'end_date']
-    ordering = ['-created_at']
+    search_fields = ['position_held', 'organization', 'related_pep_name', 'kyc_profile__full_name']
+    ordering_fields = ['created_at', 'start_date', 'end_date', SEARCH_RANK_FIELD]
+    ordering = ['-created_at', '-id']
     
     def get_queryset(self):
         """
@@ -204,16 +394,8 @@ class PEPDeclarationViewSet(viewsets.ModelViewSet):
             # Filtrar apenas PEPs do usuário atual
             queryset = queryset.filter(kyc_profile__user=self.request.user)
         
-        # Aplicar filtros de busca se fornecidos
-        search = self.request.query_params.get('search', None)
-        if search:
-            queryset = queryset.filter(
-                Q(position_held__icontains=search) |
-                Q(organization__icontains=search) |
-                Q(related_pep_name__icontains=search) |
-                Q(kyc_profile__full_name__icontains=search)
-            )
-        
+        # A busca (?search=) é aplicada pelo TrigramSearchFilter, apoiada
+        # pelos índices pg_trgm no PostgreSQL
         return queryset
     
     def list(self, request, *args, **kwargs):
@@ -236,36 +418,83 @@ class PEPDeclarationViewSet(viewsets.ModelViewSet):
     def summary(self, request):
         """
         CORREÇÃO: Endpoint de resumo otimizado
-        Evita carregar dados desnecessários
+        Agregação única no banco (GROUP BY pep_type com Count condicional)
+        Modo cacheado opcional via KYC_PEP_SUMMARY_CACHE_TIMEOUT
         """
         try:
-            queryset = self.get_queryset()
+            timeout = get_pep_summary_timeout()
+            cache_key = None
             
-            summary_data = {
-                'total_declarations': queryset.count(),
-                'pep_count': queryset.filter(is_pep=True).count(),
-                'non_pep_count': queryset.filter(is_pep=False).count(),
-                'by_type': {}
-            }
+            if timeout:
+                cache_key = pep_summary_cache_key(
+                    request.user, request.query_params.get('search')
+                )
+                summary_data = cache.get(cache_key)
+                record_cache_access(summary_data is not None)
+                if summary_data is not None:
+                    return Response(summary_data)
             
-            # Contar por tipo (apenas se necessário)
-            if summary_data['pep_count'] > 0:
-                for pep_type, _ in PEPDeclaration.PEP_TYPES:
-                    count = queryset.filter(is_pep=True, pep_type=pep_type).count()
-                    if count > 0:
-                        summary_data['by_type'][pep_type] = count
+            # Apenas a busca (sem rank) é relevante para o resumo
+            queryset = filters.SearchFilter().filter_queryset(request, self.get_queryset(), self)
+            summary_data = self._build_summary(queryset)
             
-            return Response(summary_data)
+            if cache_key:
+                cache.set(cache_key, summary_data, timeout)
             
+            return Response(summary_data)
+        
         except Exception as e:
             logger.error(f"Erro no resumo PEP: {str(e)}")
             return Response(
                 {'error': _('Error generating PEP summary')},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+    
+    @staticmethod
+    def _build_summary(queryset):
+        """Calcular totais e contagem por tipo em uma única query"""
+        rows = (
+            queryset.order_by()
+            .values('pep_type')
+            .annotate(
+                total=Count('id'),
+                pep=Count('id', filter=Q(is_pep=True)),
+            )
+        )
+        
+        known_types = {pep_type for pep_type, label in PEPDeclaration.PEP_TYPES}
+        summary_data = {
+            'total_declarations': 0,
+            'pep_count': 0,
+            'non_pep_count': 0,
+            'by_type': {}
+        }
+        
+        for row in rows:
+            summary_data['total_declarations'] += row['total']
+            summary_data['pep_count'] += row['pep']
+            
+            # Contar por tipo (apenas tipos conhecidos com PEPs)
+            if row['pep'] and row['pep_type'] in known_types:
+                summary_data['by_type'][row['pep_type']] = row['pep']
+        
+        summary_data['non_pep_count'] = (
+            summary_data['total_declarations'] - summary_data['pep_count']
+        )
+        
+        return summary_data
+
+
+class PassthroughRenderer(renderers.BaseRenderer):
+    """Aceita qualquer Accept em downloads (o corpo é a própria resposta Django)"""
+    media_type = '*/*'
+    format = None
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
 
 
-class KYCDocumentViewSet(viewsets.ModelViewSet):
+class KYCDocumentViewSet(CursorPaginationMixin, viewsets.ModelViewSet):
     """ViewSet para documentos KYC"""
     
     serializer_class = KYCDocumentSerializer
@@ -274,7 +503,7 @@ class KYCDocumentViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['document_type', 'is_verified', 'ocr_processed']
     ordering_fields = ['created_at', 'file_size']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
     
     def get_queryset(self):
         """Filtrar documentos baseado no perfil KYC do usuário"""
@@ -285,25 +514,148 @@ class KYCDocumentViewSet(viewsets.ModelViewSet):
         user_profiles = KYCProfile.objects.filter(user=self.request.user)
         return KYCDocument.objects.filter(kyc_profile__in=user_profiles)
     
+    @action(detail=True, methods=['get'], renderer_classes=[renderers.JSONRenderer, PassthroughRenderer])
+    def download(self, request, pk=None):
+        """
+        Baixar o arquivo do documento (mesmas regras de acesso do get_queryset)
+        Suporta Range e requisições condicionais; `?inline=1` para exibir no navegador
+        """
+        document = self.get_object()
+        if not document.file:
+            raise Http404
+        as_attachment = request.query_params.get('inline') not in ('1', 'true')
+        return downloads.serve_document(request, document, as_attachment=as_attachment)
+    
+    @action(
+        detail=True,
+        methods=['get'],
+        url_path=r'renditions/(?P<rendition>[a-z]+)',
+        renderer_classes=[renderers.JSONRenderer, PassthroughRenderer],
+    )
+    def rendition(self, request, pk=None, rendition=None):
+        """Miniatura ou preview do documento (mesmas regras de acesso do download)"""
+        document = self.get_object()
+        if not (document.renditions or {}).get(rendition):
+            raise Http404
+        return downloads.serve_rendition(request, document, rendition)
+    
     @action(detail=True, methods=['post'])
     def process_ocr(self, request, pk=None):
-        """Processar OCR do documento"""
+        """
+        Enfileirar OCR do documento (processado pela tarefa Celery na fila kyc)
+        Responde 202 com o job para consulta em /ocr-jobs/{id}/
+        """
         document = self.get_object()
         
+        if document.ocr_processed:
+            return Response({'message': _('OCR already processed')})
+        
+        job, created = OCRJob.enqueue(document)
+        response = Response(OCRJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+        response['Location'] = request.build_absolute_uri(
+            reverse('kyc:ocrjob-detail', kwargs={'pk': job.pk})
+        )
+        return response
+
+
+class OCRJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Consulta do status de jobs de OCR"""
+    
+    serializer_class = OCRJobSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = StandardResultsSetPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['document', 'status']
+    
+    def get_queryset(self):
+        """Mesmas regras de acesso dos documentos"""
+        if self.request.user.is_staff:
+            return OCRJob.objects.all()
+        return OCRJob.objects.filter(document__kyc_profile__user=self.request.user)
+
+
+class DocumentUploadViewSet(mixins.CreateModelMixin,
+                            mixins.RetrieveModelMixin,
+                            mixins.DestroyModelMixin,
+                            viewsets.GenericViewSet):
+    """
+    Upload retomável de documentos KYC (protocolo inspirado no tus)
+    - POST: abre a sessão com tamanho, tipo e checksum declarados
+    - HEAD/GET: offset atual para retomar um upload interrompido
+    - PATCH: anexa bytes (application/offset+octet-stream) a partir de Upload-Offset
+    - DELETE: cancela a sessão
+    """
+    
+    serializer_class = DocumentUploadSessionSerializer
+    permission_classes = [IsAuthenticated]
+    
+    CHUNK_CONTENT_TYPE = 'application/offset+octet-stream'
+    
+    def get_queryset(self):
+        """Sessões dos perfis do usuário (staff vê todas)"""
+        queryset = DocumentUploadSession.objects.select_related('kyc_profile')
+        if self.request.user.is_staff:
+            return queryset
+        return queryset.filter(kyc_profile__user=self.request.user)
+    
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        session_url = reverse('kyc:documentupload-detail', kwargs={'pk': response.data['id']})
+        response['Location'] = request.build_absolute_uri(session_url)
+        self._set_upload_headers(response, response.data['offset'], response.data['upload_length'])
+        return response
+    
+    def retrieve(self, request, *args, **kwargs):
+        session = self.get_object()
+        response = Response(self.get_serializer(session).data)
+        self._set_upload_headers(response, session.offset, session.upload_length)
+        response['Cache-Control'] = 'no-store'
+        return response
+    
+    def partial_update(self, request, *args, **kwargs):
+        """Receber uma parte do arquivo, lida direto do corpo da requisição"""
+        if request.content_type != self.CHUNK_CONTENT_TYPE:
+            return Response(
+                {'error': _('Content-Type must be %s') % self.CHUNK_CONTENT_TYPE},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+            )
         try:
-            # Aqui seria implementada a lógica de OCR
-            # Por enquanto, simulamos o processamento
-            document.ocr_processed = True
-            document.ocr_text = "OCR processing completed"
-            document.ocr_confidence = 0.95
-            document.save()
-            
-            return Response({'message': _('OCR processing completed successfully')})
-            
-        except Exception as e:
-            logger.error(f"Erro no processamento OCR do documento {pk}: {str(e)}")
+            offset = int(request.headers['Upload-Offset'])
+            content_length = int(request.META['CONTENT_LENGTH']) if request.META.get('CONTENT_LENGTH') else None
+        except (KeyError, ValueError):
             return Response(
-                {'error': _('Error processing OCR')},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {'error': _('A valid Upload-Offset header is required')},
+                status=status.HTTP_400_BAD_REQUEST
             )
-
+        
+        error = None
+        document = None
+        with transaction.atomic():
+            # Lock da sessão: partes concorrentes do mesmo upload são serializadas
+            session = get_object_or_404(self.get_queryset().select_for_update(), pk=kwargs['pk'])
+            try:
+                uploads.append_chunk(session, request.stream or io.BytesIO(), offset, content_length)
+                if session.is_complete:
+                    document = uploads.complete_upload(session)
+            except uploads.UploadError as e:
+                error = e
+        
+        if error is not None:
+            response = Response({'error': str(error)}, status=error.status_code)
+        elif document is not None:
+            response = Response(
+                KYCDocumentSerializer(document, context=self.get_serializer_context()).data,
+                status=status.HTTP_201_CREATED
+            )
+        else:
+            response = Response(status=status.HTTP_204_NO_CONTENT)
+        self._set_upload_headers(response, session.offset, session.upload_length)
+        return response
+    
+    def perform_destroy(self, instance):
+        uploads.abort_session(instance)
+    
+    @staticmethod
+    def _set_upload_headers(response, offset, length):
+        response['Upload-Offset'] = str(offset)
+        response['Upload-Length'] = str(length)
@@ -9,3 +9,9 @@ class ScreeningConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.screening'
     verbose_name = 'Screening'
+    
+    def ready(self):
+        """
+        Código executado quando o app está pronto
+        """
+        from . import signals  # noqa: F401
@@ -0,0 +1,111 @@
+"""
+Índice invertido de nomes de clientes
+Os nomes triados de cada perfil (titular, UBOs e PEPs relacionados) ficam
+em CustomerName, com uma linha em CustomerNameKey por chave de busca: as
+mesmas do índice de listas (tokens, chaves fonéticas e n-gramas, ver
+apps.screening.names.name_keys). É o inverso desse índice: dada uma entrada
+de lista nova ou alterada, o banco devolve só os clientes que compartilham
+chaves com ela, sem percorrer a base de clientes
+(apps.screening.rescreening).
+
+O índice de um perfil é regravado sempre que a triagem ao salvar encontra
+nomes diferentes dos da última execução; `rebuild_customer_index` preenche
+a base existente.
+"""
+
+from django.db import transaction
+from django.db.models import Count
+
+from .models import CustomerName, CustomerNameKey
+from .names import name_keys, normalize_name
+
+KEY_MAX_LENGTH = CustomerNameKey._meta.get_field('key').max_length
+
+
+def _keys(normalized):
+    """Chaves de busca do nome, truncadas ao tamanho da coluna"""
+    return {key[:KEY_MAX_LENGTH] for key in name_keys(normalized)}
+
+
+def _customer_names(profile_id, subjects):
+    return [
+        CustomerName(
+            kyc_profile_id=profile_id,
+            subject_type=subject.subject_type,
+            subject_id=subject.subject_id,
+            name=subject.name,
+            date_of_birth=subject.date_of_birth,
+            nationality=subject.nationality or '',
+        )
+        for subject in subjects
+    ]
+
+
+def _write_names(names):
+    CustomerName.objects.bulk_create(names)
+    CustomerNameKey.objects.bulk_create([
+        CustomerNameKey(customer_name=name, key=key)
+        for name in names
+        for key in sorted(_keys(normalize_name(name.name)))
+    ])
+
+
+def index_profile_names(profile, subjects):
+    """Regravar os nomes do perfil no índice"""
+    with transaction.atomic():
+        CustomerName.objects.filter(kyc_profile=profile).delete()
+        _write_names(_customer_names(profile.pk, subjects))
+
+
+def rebuild_customer_index(batch_size=500):
+    """
+    Reconstruir o índice de toda a base, em lotes de perfis
+    Retorna o número de perfis indexados.
+    """
+    from apps.kyc.models import KYCProfile
+
+    from .services import profile_subjects
+
+    profiles = KYCProfile.objects.order_by('pk').prefetch_related('ubo_declarations', 'pep_declarations')
+    count, last_pk = 0, None
+    while True:
+        batch = profiles.filter(pk__gt=last_pk) if last_pk is not None else profiles
+        batch = list(batch[:batch_size])
+        if not batch:
+            return count
+        with transaction.atomic():
+            CustomerName.objects.filter(kyc_profile__in=batch).delete()
+            _write_names([
+                name for profile in batch for name in _customer_names(profile.pk, profile_subjects(profile))
+            ])
+        count += len(batch)
+        last_pk = batch[-1].pk
+
+
+def candidate_names(normalized, max_ngram_postings=None):
+    """
+    Nomes de clientes com alguma chave de busca em comum com `normalized`
+    Mesmas regras de WatchlistIndex.candidates, para que a retriagem encontre
+    os pares da triagem ao salvar: tokens e chaves fonéticas sempre contam;
+    n-gramas presentes em mais de `max_ngram_postings` nomes não discriminam
+    e são ignorados.
+    """
+    if max_ngram_postings is None:
+        from .services import get_screening_config
+
+        max_ngram_postings = get_screening_config()['MAX_NGRAM_POSTINGS']
+    keys = _keys(normalized)
+    if not keys:
+        return []
+    grams = [key for key in keys if key.startswith('g:')]
+    if grams:
+        keys -= set(
+            CustomerNameKey.objects
+            .filter(key__in=grams)
+            .values('key')
+            .annotate(names=Count('id'))
+            .filter(names__gt=max_ngram_postings)
+            .values_list('key', flat=True)
+        )
+    matching = CustomerNameKey.objects.filter(key__in=keys).values('customer_name')
+    return list(CustomerName.objects.filter(pk__in=matching))
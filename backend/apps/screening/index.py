@@ -0,0 +1,292 @@
+"""
+Índice em memória das listas de screening
+Cada nome de entrada (principal e aliases) é normalizado uma vez, na carga,
+e registrado nas listas invertidas das suas chaves: tokens, chaves
+fonéticas e n-gramas de caracteres (apps.screening.names). Uma consulta
+soma o peso IDF das chaves em comum sobre arrays NumPy, pontua apenas os
+melhores candidatos, todos de uma vez (scoring.score_matrix), e não
+percorre as linhas do banco. As listas
+invertidas ficam em arrays uint32 após `freeze()`, então um milhão de
+entradas cabe em algumas centenas de MB por processo.
+
+Cada processo tem o seu índice. Uma carga de lista reconstrói o índice do
+próprio processo e incrementa uma versão no cache; os demais percebem a
+nova versão (verificada a cada INDEX_CHECK_INTERVAL segundos) e constroem
+o índice novo em uma thread, trocando a referência só quando ele está
+pronto: consultas nunca esperam a reconstrução nem veem um índice parcial.
+"""
+
+import math
+import threading
+import time
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass
+
+import numpy as np
+
+from . import scoring
+from .names import name_keys, normalize_name
+
+# Peso de cada tipo de chave na geração de candidatos (token > fonética > n-grama)
+KEY_WEIGHTS = {'t': 1.0, 'p': 0.6, 'g': 0.25}
+
+INDEX_VERSION_KEY = 'screening:index:version'
+
+_index = None
+_index_version = None
+_index_checked_at = 0.0
+_index_rebuilding = False
+_index_lock = threading.Lock()
+
+
+@dataclass
+class IndexMatch:
+    entry_id: int
+    matched_name: str
+    score: float
+    name_score: float
+    dob_score: float = None
+    nationality_match: bool = None
+
+
+class WatchlistIndex:
+    """Listas invertidas de chaves de nome → nomes indexados"""
+
+    def __init__(self, max_ngram_postings=20000):
+        # Por entrada
+        self.entry_ids = array('q')
+        self.birth_ordinals = array('l')
+        self.birth_years = array('H')
+        self.nationalities = []
+        # Por nome indexado (principal e aliases)
+        self.names = []
+        self.name_entries = array('I')
+        self.max_ngram_postings = max_ngram_postings
+        self._postings = defaultdict(lambda: array('I'))
+        self._frozen = False
+
+    def __len__(self):
+        return len(self.entry_ids)
+
+    def add(self, entry_id, names, date_of_birth=None, birth_year=None, nationality=''):
+        """Indexar uma entrada com todos os seus nomes"""
+        if self._frozen:
+            raise RuntimeError('Index is frozen')
+        position = len(self.entry_ids)
+        self.entry_ids.append(entry_id)
+        self.birth_ordinals.append(date_of_birth.toordinal() if date_of_birth else 0)
+        self.birth_years.append(birth_year or (date_of_birth.year if date_of_birth else 0))
+        self.nationalities.append(normalize_name(nationality))
+
+        seen = set()
+        for name in names:
+            normalized = normalize_name(name)
+            if not normalized or normalized in seen:
+                continue
+            seen.add(normalized)
+            record = len(self.names)
+            self.names.append(normalized)
+            self.name_entries.append(position)
+            for key in name_keys(normalized):
+                self._postings[key].append(record)
+
+    def freeze(self):
+        """Converter as listas invertidas em arrays NumPy (somente leitura)"""
+        self._postings = {
+            key: np.frombuffer(postings, dtype=np.uint32) for key, postings in self._postings.items()
+        }
+        self.name_entries = np.frombuffer(self.name_entries, dtype=np.uint32)
+        self.birth_ordinals = np.array(self.birth_ordinals, dtype=np.int64)
+        self.birth_years = np.frombuffer(self.birth_years, dtype=np.uint16)
+        self._frozen = True
+        return self
+
+    def candidates(self, normalized, limit):
+        """
+        Nomes indexados com mais peso de chaves em comum com a consulta
+        N-gramas presentes em mais de `max_ngram_postings` nomes não
+        discriminam e são ignorados; tokens e chaves fonéticas sempre contam.
+        """
+        total = len(self.names)
+        arrays, weights = [], []
+        for key in name_keys(normalized):
+            postings = self._postings.get(key)
+            if postings is None or not len(postings):
+                continue
+            if key[0] == 'g' and len(postings) > self.max_ngram_postings:
+                continue
+            arrays.append(postings)
+            weights.append(KEY_WEIGHTS[key[0]] * math.log(1 + total / len(postings)))
+        if not arrays:
+            return np.empty(0, dtype=np.uint32)
+
+        records = np.concatenate(arrays)
+        record_weights = np.repeat(weights, [len(postings) for postings in arrays])
+        unique, inverse = np.unique(records, return_inverse=True)
+        totals = np.bincount(inverse, weights=record_weights)
+        if len(unique) > limit:
+            top = np.argpartition(totals, -limit)[-limit:]
+            unique = unique[top]
+        return unique
+
+    def search(self, full_name, date_of_birth=None, nationality='', limit=10, threshold=0.8,
+               pool_size=200):
+        """Candidatos ordenados pela nota, um por entrada (o nome que melhor casou)"""
+        query = normalize_name(full_name)
+        if not query:
+            return []
+        query_ordinal = date_of_birth.toordinal() if date_of_birth else 0
+        query_year = date_of_birth.year if date_of_birth else 0
+        query_nationality = normalize_name(nationality)
+
+        records = self.candidates(query, pool_size)
+        if not len(records):
+            return []
+        positions = np.asarray(self.name_entries)[records].astype(np.int64)
+        scores = scoring.score_matrix(
+            [query],
+            [self.names[record] for record in records],
+            query_dobs=[query_ordinal],
+            candidate_dobs=np.asarray(self.birth_ordinals)[positions],
+            query_years=[query_year],
+            candidate_years=np.asarray(self.birth_years)[positions],
+            query_nationalities=[query_nationality],
+            candidate_nationalities=[self.nationalities[position] for position in positions],
+        )
+
+        best = {}
+        for column in np.nonzero(scores.score[0] >= threshold)[0]:
+            position = int(positions[column])
+            match = scores.pair(0, column)
+            current = best.get(position)
+            if current is None or match.score > current.score:
+                best[position] = IndexMatch(
+                    entry_id=self.entry_ids[position],
+                    matched_name=self.names[records[column]],
+                    score=match.score,
+                    name_score=match.name,
+                    dob_score=match.dob,
+                    nationality_match=match.nationality,
+                )
+        return sorted(best.values(), key=lambda match: (-match.score, match.entry_id))[:limit]
+
+
+def build_index(max_ngram_postings=20000):
+    """
+    Construir o índice das entradas ativas a partir do banco
+    Entradas e aliases são lidos em ordem de entrada com iterator() e
+    combinados em um merge, sem carregar as tabelas inteiras em memória.
+    """
+    from .models import WatchlistAlias, WatchlistEntry
+
+    index = WatchlistIndex(max_ngram_postings=max_ngram_postings)
+    entries = (
+        WatchlistEntry.objects
+        .filter(is_active=True, source__is_active=True)
+        .order_by('id')
+        .values_list('id', 'name', 'date_of_birth', 'birth_year', 'nationality')
+    )
+    aliases = iter(
+        WatchlistAlias.objects
+        .filter(entry__is_active=True, entry__source__is_active=True)
+        .order_by('entry_id')
+        .values_list('entry_id', 'name')
+        .iterator(chunk_size=5000)
+    )
+    alias = next(aliases, None)
+    for entry_id, name, date_of_birth, birth_year, nationality in entries.iterator(chunk_size=5000):
+        names = [name]
+        while alias is not None and alias[0] <= entry_id:
+            if alias[0] == entry_id:
+                names.append(alias[1])
+            alias = next(aliases, None)
+        index.add(entry_id, names, date_of_birth, birth_year, nationality)
+    return index.freeze()
+
+
+def get_index():
+    """Índice do processo, construído no primeiro uso"""
+    global _index, _index_version
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index_version = _published_version()
+                _index = build_index(**_index_options())
+        return _index
+    _check_published_version()
+    return _index
+
+
+def rebuild_index(version=None):
+    """Construir um índice novo e trocá-lo atomicamente (consultas em curso usam o anterior)"""
+    global _index, _index_version
+    if version is None:
+        version = _published_version()
+    index = build_index(**_index_options())
+    with _index_lock:
+        _index = index
+        _index_version = version
+    return index
+
+
+def publish_index_change():
+    """Listas alteradas: reconstruir aqui e sinalizar os outros processos"""
+    from django.core.cache import cache
+
+    try:
+        version = cache.incr(INDEX_VERSION_KEY)
+    except ValueError:
+        # Chave ainda não existe: começar numa versão nova
+        version = 1
+        cache.set(INDEX_VERSION_KEY, version, None)
+    return rebuild_index(version)
+
+
+def reset_index():
+    global _index, _index_version
+    with _index_lock:
+        _index = None
+        _index_version = None
+
+
+def _published_version():
+    from django.core.cache import cache
+
+    return cache.get(INDEX_VERSION_KEY)
+
+
+def _check_published_version():
+    """Iniciar a reconstrução em background se outra carga publicou uma versão nova"""
+    global _index_checked_at, _index_rebuilding
+    now = time.monotonic()
+    if now - _index_checked_at < _screening_config()['INDEX_CHECK_INTERVAL']:
+        return
+    _index_checked_at = now
+    version = _published_version()
+    with _index_lock:
+        if version == _index_version or _index_rebuilding:
+            return
+        _index_rebuilding = True
+    threading.Thread(target=_rebuild_in_background, args=(version,), daemon=True).start()
+
+
+def _rebuild_in_background(version):
+    global _index_rebuilding
+    from django.db import connection
+
+    try:
+        rebuild_index(version)
+    finally:
+        _index_rebuilding = False
+        connection.close()
+
+
+def _screening_config():
+    from .services import get_screening_config
+
+    return get_screening_config()
+
+
+def _index_options():
+    return {'max_ngram_postings': _screening_config()['MAX_NGRAM_POSTINGS']}
@@ -0,0 +1,162 @@
+"""
+Carga incremental de listas de screening
+O arquivo é lido em streaming (apps.screening.parsers) e comparado com a
+versão anterior pelo hash de cada registro: só entradas novas, alteradas
+ou removidas tocam o banco, em lotes com bulk_create/bulk_update e uma
+transação curta por lote (a tabela nunca fica bloqueada durante a carga
+inteira). Ao final o índice em memória é reconstruído e trocado de uma vez.
+"""
+
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import index
+from .models import WatchlistAlias, WatchlistEntry, WatchlistLoad
+from .parsers import iter_records
+from .services import get_screening_config
+
+logger = logging.getLogger(__name__)
+
+ENTRY_FIELDS = [
+    'name', 'entry_type', 'date_of_birth', 'birth_year', 'nationality', 'programs', 'remarks',
+    'is_active', 'content_hash', 'last_load', 'updated_at',
+]
+
+_ENTRY_TYPES = {value for value, _label in WatchlistEntry.ENTRY_TYPES}
+# Marca de registro já visto nesta carga (ids repetidos no arquivo são ignorados)
+_SEEN = object()
+
+
+def _entry_from_record(record, content_hash, load, now, pk=None):
+    return WatchlistEntry(
+        pk=pk,
+        source_id=load.source_id,
+        external_id=record.external_id,
+        name=record.name,
+        entry_type=record.entry_type if record.entry_type in _ENTRY_TYPES else 'individual',
+        date_of_birth=record.date_of_birth,
+        birth_year=record.birth_year,
+        nationality=record.nationality,
+        programs=record.programs,
+        remarks=record.remarks,
+        is_active=True,
+        content_hash=content_hash,
+        last_load=load,
+        updated_at=now,
+    )
+
+
+def _aliases(entry, record):
+    return [WatchlistAlias(entry=entry, name=alias) for alias in record.aliases]
+
+
+def _apply_batch(load, batch, counts):
+    """Gravar um lote de (registro, hash, estado anterior) em uma transação"""
+    now = timezone.now()
+    created, updated = [], []
+    for record, content_hash, previous in batch:
+        if previous is None:
+            created.append((_entry_from_record(record, content_hash, load, now), record))
+        elif previous[1] != content_hash or not previous[2]:
+            updated.append((_entry_from_record(record, content_hash, load, now, pk=previous[0]), record))
+        else:
+            counts['unchanged'] += 1
+
+    with transaction.atomic():
+        if created:
+            WatchlistEntry.objects.bulk_create([entry for entry, _record in created])
+        if updated:
+            WatchlistEntry.objects.bulk_update([entry for entry, _record in updated], ENTRY_FIELDS)
+            WatchlistAlias.objects.filter(entry_id__in=[entry.pk for entry, _record in updated]).delete()
+        aliases = [alias for entry, record in created + updated for alias in _aliases(entry, record)]
+        WatchlistAlias.objects.bulk_create(aliases)
+
+    counts['created'] += len(created)
+    counts['updated'] += len(updated)
+
+
+def _deactivate_missing(load, previous_entries, batch_size, counts):
+    """Desativar as entradas ativas que não vieram no arquivo (marcadas com a carga para a retriagem)"""
+    now = timezone.now()
+    missing = [state[0] for state in previous_entries.values() if state is not _SEEN and state[2]]
+    for start in range(0, len(missing), batch_size):
+        chunk = missing[start:start + batch_size]
+        counts['deactivated'] += WatchlistEntry.objects.filter(pk__in=chunk).update(
+            is_active=False, last_load=load, updated_at=now
+        )
+
+
+def load_watchlist(source, path, format=None, version='', batch_size=None, rebuild_index=True):
+    """
+    Carregar uma versão da lista `source` a partir de um arquivo local
+    Retorna o WatchlistLoad com as contagens. Em caso de erro a carga fica
+    como `failed`; os lotes já gravados permanecem (marcados com esta carga)
+    e a próxima carga completa a diferença. Como a próxima carga os vê como
+    sem mudança, o índice é republicado e a retriagem dessas entradas é
+    publicada já na carga que falhou.
+    """
+    batch_size = batch_size or get_screening_config()['LOAD_BATCH_SIZE']
+    load = WatchlistLoad.objects.create(source=source, version=version, path=str(path))
+    counts = {'created': 0, 'updated': 0, 'deactivated': 0, 'unchanged': 0}
+
+    try:
+        # Estado anterior por id externo: (pk, hash, ativa)
+        previous_entries = {
+            external_id: (pk, content_hash, is_active)
+            for external_id, pk, content_hash, is_active in source.entries
+            .values_list('external_id', 'pk', 'content_hash', 'is_active')
+            .iterator(chunk_size=batch_size)
+        }
+
+        batch = []
+        for record in iter_records(str(path), format):
+            previous = previous_entries.get(record.external_id)
+            if previous is _SEEN:
+                logger.warning(f"Lista {source.code}: id {record.external_id} repetido no arquivo")
+                continue
+            previous_entries[record.external_id] = _SEEN
+            batch.append((record, record.content_hash(), previous))
+            if len(batch) >= batch_size:
+                _apply_batch(load, batch, counts)
+                batch = []
+        if batch:
+            _apply_batch(load, batch, counts)
+
+        _deactivate_missing(load, previous_entries, batch_size, counts)
+    except Exception as e:
+        WatchlistLoad.objects.filter(pk=load.pk).update(
+            status='failed', error=str(e), finished_at=timezone.now(), **_count_fields(counts)
+        )
+        if counts['created'] or counts['updated'] or counts['deactivated']:
+            from .tasks import request_load_rescreening
+
+            for field, value in _count_fields(counts).items():
+                setattr(load, field, value)
+            if rebuild_index:
+                index.publish_index_change()
+            request_load_rescreening(load)
+        raise
+
+    now = timezone.now()
+    source.version = version or source.version
+    source.loaded_at = now
+    source.save(update_fields=['version', 'loaded_at', 'updated_at'])
+    load.status = 'completed'
+    load.finished_at = now
+    for field, value in _count_fields(counts).items():
+        setattr(load, field, value)
+    load.save()
+
+    logger.info(
+        f"Lista {source.code} {version}: {counts['created']} novas, {counts['updated']} alteradas, "
+        f"{counts['deactivated']} desativadas, {counts['unchanged']} sem mudança"
+    )
+    if rebuild_index and (counts['created'] or counts['updated'] or counts['deactivated']):
+        index.publish_index_change()
+    return load
+
+
+def _count_fields(counts):
+    return {f'{key}_count': value for key, value in counts.items()}
@@ -0,0 +1,93 @@
+"""
+Comando Django para medir a vazão da pontuação de screening
+Gera nomes sintéticos (com datas e nacionalidades) e pontua N consultas
+contra M candidatos com scoring.score_matrix e, em uma amostra, par a par
+com scoring.score_pair. Relata pares por segundo de cada caminho.
+"""
+
+import random
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.screening import scoring
+
+FIRST_NAMES = [
+    'maria', 'jose', 'ana', 'joao', 'muhammad', 'mohamed', 'ivan', 'olga', 'sergei', 'carlos',
+    'fernanda', 'ali', 'hasan', 'pedro', 'paulo', 'juliana', 'aleksandr', 'dmitri', 'fatima', 'ahmed',
+]
+LAST_NAMES = [
+    'silva', 'santos', 'oliveira', 'souza', 'volkov', 'smirnova', 'ivanov', 'hassan', 'costa',
+    'pereira', 'almeida', 'rodrigues', 'petrov', 'kuznetsov', 'ferreira', 'gomes', 'martins',
+    'al rashid', 'abdullah', 'nguyen',
+]
+NATIONALITIES = ['', 'brazil', 'russia', 'syria', 'egypt', 'portugal']
+
+
+def synthetic_people(rng, count):
+    """(nomes, ordinais, anos, nacionalidades) sintéticos; parte sem data ou só com o ano"""
+    names, dobs, years, nationalities = [], [], [], []
+    for _ in range(count):
+        names.append(' '.join([rng.choice(FIRST_NAMES)] + rng.sample(LAST_NAMES, rng.randint(1, 3))))
+        birth = date(rng.randint(1940, 2005), rng.randint(1, 12), rng.randint(1, 28))
+        kind = rng.random()
+        dobs.append(birth.toordinal() if kind < 0.6 else 0)
+        years.append(birth.year if kind < 0.8 else 0)
+        nationalities.append(rng.choice(NATIONALITIES))
+    return names, dobs, years, nationalities
+
+
+class Command(BaseCommand):
+    help = 'Mede a vazão (pares/s) da pontuação de screening em lote e par a par'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=50, help='Consultas (N, padrão: 50)')
+        parser.add_argument('--candidates', type=int, default=2000, help='Candidatos (M, padrão: 2000)')
+        parser.add_argument(
+            '--scalar-pairs',
+            type=int,
+            default=10000,
+            help='Pares pontuados com score_pair para comparação (padrão: 10000; 0 desliga)',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Semente dos nomes sintéticos')
+    
+    def handle(self, *args, **options):
+        """Executar a medição"""
+        
+        if options['queries'] < 1 or options['candidates'] < 1 or options['scalar_pairs'] < 0:
+            raise CommandError('--queries e --candidates devem ser positivos')
+        
+        rng = random.Random(options['seed'])
+        queries = synthetic_people(rng, options['queries'])
+        candidates = synthetic_people(rng, options['candidates'])
+        pairs = options['queries'] * options['candidates']
+        
+        started = time.perf_counter()
+        scores = scoring.score_matrix(
+            queries[0], candidates[0],
+            query_dobs=queries[1], candidate_dobs=candidates[1],
+            query_years=queries[2], candidate_years=candidates[2],
+            query_nationalities=queries[3], candidate_nationalities=candidates[3],
+        )
+        batch_rate = pairs / (time.perf_counter() - started)
+        self.stdout.write(
+            f'📊 score_matrix: {scores.shape[0]}×{scores.shape[1]} = {pairs} pares, '
+            f'{batch_rate:,.0f} pares/s'
+        )
+        
+        sample = min(options['scalar_pairs'], pairs)
+        if not sample:
+            return
+        started = time.perf_counter()
+        for pair in range(sample):
+            row, column = divmod(pair, options['candidates'])
+            scoring.score_pair(
+                queries[0][row], candidates[0][column],
+                query_dob=queries[1][row], entry_dob=candidates[1][column],
+                query_year=queries[2][row], entry_year=candidates[2][column],
+                query_nationality=queries[3][row], entry_nationality=candidates[3][column],
+            )
+        scalar_rate = sample / (time.perf_counter() - started)
+        self.stdout.write(f'📊 score_pair: {sample} pares, {scalar_rate:,.0f} pares/s')
+        self.stdout.write(self.style.SUCCESS(f'✅ Lote {batch_rate / scalar_rate:.1f}× mais rápido'))
@@ -0,0 +1,32 @@
+"""
+Comando Django para reconstruir o índice de nomes de clientes
+Grava os nomes triados de todos os perfis (titular, UBOs e PEPs
+relacionados) no índice invertido usado pela retriagem incremental. Depois
+disso o índice é mantido pela triagem ao salvar.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.screening.customers import rebuild_customer_index
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o índice invertido de nomes de clientes usado na retriagem incremental'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Perfis por lote (padrão: 500)',
+        )
+    
+    def handle(self, *args, **options):
+        """Reconstruir o índice"""
+        
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size deve ser positivo')
+        
+        self.stdout.write(self.style.SUCCESS('🔄 Indexando nomes de clientes'))
+        count = rebuild_customer_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✅ {count} perfis indexados'))
@@ -0,0 +1,90 @@
+"""
+Comando Django para carregar uma versão de lista de screening
+Lê o arquivo (XML, CSV ou JSON lines, opcionalmente .gz) em streaming,
+grava só a diferença em relação à versão anterior e reconstrói o índice
+em memória. Com --async a carga é publicada na fila `screening`. Se a
+lista mudou, a retriagem da base de clientes é publicada na mesma fila.
+"""
+
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.screening.loader import load_watchlist
+from apps.screening.models import WatchlistSource
+from apps.screening.parsers import FORMATS, WatchlistFormatError
+from apps.screening.tasks import load_watchlist_file, request_load_rescreening
+
+
+class Command(BaseCommand):
+    help = 'Carrega uma versão de lista de screening a partir de um arquivo local (carga incremental)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=str, help='Arquivo da lista (.xml, .csv, .jsonl; aceita .gz)')
+        parser.add_argument(
+            '--source',
+            required=True,
+            help='Código da lista (criada se não existir)',
+        )
+        parser.add_argument('--name', help='Nome da lista, ao criá-la')
+        parser.add_argument(
+            '--list-type',
+            choices=[value for value, _label in WatchlistSource.LIST_TYPES],
+            default='sanctions',
+            help='Tipo da lista, ao criá-la (padrão: sanctions)',
+        )
+        parser.add_argument('--format', choices=FORMATS, help='Formato (padrão: pela extensão)')
+        parser.add_argument('--list-version', default='', help='Rótulo da versão publicada')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Registros por lote de bulk_create/bulk_update',
+        )
+        parser.add_argument(
+            '--async',
+            action='store_true',
+            dest='run_async',
+            help='Publicar a carga na fila screening em vez de executá-la aqui',
+        )
+    
+    def handle(self, *args, **options):
+        """Executar a carga"""
+        
+        path = os.path.abspath(options['path'])
+        if options['batch_size'] is not None and options['batch_size'] < 1:
+            raise CommandError('--batch-size deve ser positivo')
+        if not os.path.exists(path):
+            raise CommandError(f'Arquivo não encontrado: {path}')
+        
+        source, created = WatchlistSource.objects.get_or_create(
+            code=options['source'],
+            defaults={'name': options['name'] or options['source'], 'list_type': options['list_type']},
+        )
+        if created:
+            self.stdout.write(f'   ➕ lista {source.code} criada')
+        
+        if options['run_async']:
+            result = load_watchlist_file.delay(source.code, path, options['format'], options['list_version'])
+            self.stdout.write(self.style.SUCCESS(f'📤 Carga publicada na fila screening ({result.id})'))
+            return
+        
+        self.stdout.write(self.style.SUCCESS(f'🔄 Carregando {path} em {source.code}'))
+        try:
+            load = load_watchlist(
+                source,
+                path,
+                format=options['format'],
+                version=options['list_version'],
+                batch_size=options['batch_size'],
+            )
+        except WatchlistFormatError as e:
+            raise CommandError(f'Arquivo inválido: {e}')
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✅ Carga concluída: {load.created_count} novas, {load.updated_count} alteradas, '
+                f'{load.deactivated_count} desativadas, {load.unchanged_count} sem mudança'
+            )
+        )
+        if request_load_rescreening(load):
+            self.stdout.write('   📤 retriagem da base publicada na fila screening')
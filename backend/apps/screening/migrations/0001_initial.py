@@ -0,0 +1,157 @@
+# Generated by Django 5.0.8 on 2026-10-18 16:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="WatchlistEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("external_id", models.CharField(max_length=100)),
+                (
+                    "entry_type",
+                    models.CharField(
+                        choices=[
+                            ("individual", "Individual"),
+                            ("entity", "Entity"),
+                            ("vessel", "Vessel"),
+                            ("aircraft", "Aircraft"),
+                        ],
+                        default="individual",
+                        max_length=20,
+                    ),
+                ),
+                ("name", models.CharField(max_length=500)),
+                ("date_of_birth", models.DateField(blank=True, null=True)),
+                ("birth_year", models.PositiveSmallIntegerField(blank=True, null=True)),
+                ("nationality", models.CharField(blank=True, max_length=100)),
+                ("programs", models.CharField(blank=True, max_length=255)),
+                ("remarks", models.TextField(blank=True)),
+                ("is_active", models.BooleanField(default=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Watchlist Entry",
+                "verbose_name_plural": "Watchlist Entries",
+                "ordering": ["source", "external_id"],
+            },
+        ),
+        migrations.CreateModel(
+            name="WatchlistSource",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("code", models.SlugField(unique=True)),
+                ("name", models.CharField(max_length=255)),
+                (
+                    "list_type",
+                    models.CharField(
+                        choices=[
+                            ("sanctions", "Sanctions"),
+                            ("pep", "Politically Exposed Persons"),
+                            ("adverse_media", "Adverse Media"),
+                            ("other", "Other"),
+                        ],
+                        default="sanctions",
+                        max_length=20,
+                    ),
+                ),
+                ("authority", models.CharField(blank=True, max_length=255)),
+                ("url", models.URLField(blank=True)),
+                ("is_active", models.BooleanField(default=True)),
+                ("version", models.CharField(blank=True, max_length=100)),
+                ("loaded_at", models.DateTimeField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Watchlist Source",
+                "verbose_name_plural": "Watchlist Sources",
+                "ordering": ["code"],
+            },
+        ),
+        migrations.CreateModel(
+            name="WatchlistAlias",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=500)),
+                (
+                    "alias_type",
+                    models.CharField(
+                        choices=[
+                            ("aka", "Also Known As"),
+                            ("fka", "Formerly Known As"),
+                            ("weak", "Weak Alias"),
+                        ],
+                        default="aka",
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "entry",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="aliases",
+                        to="screening.watchlistentry",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Watchlist Alias",
+                "verbose_name_plural": "Watchlist Aliases",
+            },
+        ),
+        migrations.AddField(
+            model_name="watchlistentry",
+            name="source",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="entries",
+                to="screening.watchlistsource",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="watchlistentry",
+            index=models.Index(
+                fields=["is_active", "id"], name="screening_entry_active_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="watchlistentry",
+            constraint=models.UniqueConstraint(
+                fields=("source", "external_id"), name="screening_entry_source_ext_uniq"
+            ),
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.0.8 on 2026-10-18 16:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    
+    dependencies = [
+        ("screening", "0001_initial"),
+    ]
+    
+    operations = [
+        migrations.AddField(
+            model_name="watchlistentry",
+            name="content_hash",
+            field=models.CharField(blank=True, max_length=32),
+        ),
+        migrations.CreateModel(
+            name="WatchlistLoad",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("version", models.CharField(blank=True, max_length=100)),
+                ("path", models.CharField(max_length=500)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("running", "Running"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="running",
+                        max_length=20,
+                    ),
+                ),
+                ("created_count", models.PositiveIntegerField(default=0)),
+                ("updated_count", models.PositiveIntegerField(default=0)),
+                ("deactivated_count", models.PositiveIntegerField(default=0)),
+                ("unchanged_count", models.PositiveIntegerField(default=0)),
+                ("error", models.TextField(blank=True)),
+                ("started_at", models.DateTimeField(auto_now_add=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "source",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="loads",
+                        to="screening.watchlistsource",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Watchlist Load",
+                "verbose_name_plural": "Watchlist Loads",
+                "ordering": ["-started_at"],
+            },
+        ),
+        migrations.AddField(
+            model_name="watchlistentry",
+            name="last_load",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="changed_entries",
+                to="screening.watchlistload",
+            ),
+        ),
+    ]
@@ -0,0 +1,137 @@
+# Generated by Django 5.0.8 on 2026-10-18 16:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    
+    dependencies = [
+        ("kyc", "0010_blob_storage_tiering"),
+        ("screening", "0002_watchlist_loads"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+    
+    operations = [
+        migrations.CreateModel(
+            name="ProfileScreening",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("subjects_hash", models.CharField(max_length=32)),
+                ("hit_count", models.PositiveIntegerField(default=0)),
+                ("screened_at", models.DateTimeField()),
+                (
+                    "kyc_profile",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="screening",
+                        to="kyc.kycprofile",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Profile Screening",
+                "verbose_name_plural": "Profile Screenings",
+            },
+        ),
+        migrations.CreateModel(
+            name="ScreeningHit",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "subject_type",
+                    models.CharField(
+                        choices=[
+                            ("profile", "KYC Profile"),
+                            ("ubo", "UBO Declaration"),
+                            ("related_pep", "Related PEP"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("subject_id", models.CharField(max_length=64)),
+                ("subject_name", models.CharField(max_length=255)),
+                ("matched_name", models.CharField(max_length=500)),
+                ("score", models.FloatField()),
+                ("name_score", models.FloatField()),
+                ("dob_score", models.FloatField(blank=True, null=True)),
+                ("nationality_match", models.BooleanField(blank=True, null=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("open", "Open"),
+                            ("confirmed", "Confirmed Match"),
+                            ("dismissed", "False Positive"),
+                        ],
+                        default="open",
+                        max_length=20,
+                    ),
+                ),
+                ("reviewed_at", models.DateTimeField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "entry",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="hits",
+                        to="screening.watchlistentry",
+                    ),
+                ),
+                (
+                    "kyc_profile",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="screening_hits",
+                        to="kyc.kycprofile",
+                    ),
+                ),
+                (
+                    "reviewed_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="reviewed_screening_hits",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Screening Hit",
+                "verbose_name_plural": "Screening Hits",
+                "ordering": ["-score", "-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "-score"],
+                        name="screening_hit_status_score_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="screeninghit",
+            constraint=models.UniqueConstraint(
+                fields=("kyc_profile", "subject_type", "subject_id", "entry"),
+                name="screening_hit_subject_entry_uniq",
+            ),
+        ),
+    ]
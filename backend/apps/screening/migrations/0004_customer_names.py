@@ -0,0 +1,101 @@
+# Generated by Django 5.0.8 on 2026-10-18 16:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    
+    dependencies = [
+        ("kyc", "0010_blob_storage_tiering"),
+        ("screening", "0003_screening_hits"),
+    ]
+    
+    operations = [
+        migrations.AddField(
+            model_name="watchlistload",
+            name="rescreened_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="CustomerName",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "subject_type",
+                    models.CharField(
+                        choices=[
+                            ("profile", "KYC Profile"),
+                            ("ubo", "UBO Declaration"),
+                            ("related_pep", "Related PEP"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("subject_id", models.CharField(max_length=64)),
+                ("name", models.CharField(max_length=255)),
+                ("date_of_birth", models.DateField(blank=True, null=True)),
+                ("nationality", models.CharField(blank=True, max_length=100)),
+                (
+                    "kyc_profile",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="screened_names",
+                        to="kyc.kycprofile",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Customer Name",
+                "verbose_name_plural": "Customer Names",
+            },
+        ),
+        migrations.CreateModel(
+            name="CustomerNameKey",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=64)),
+                (
+                    "customer_name",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="keys",
+                        to="screening.customername",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Customer Name Key",
+                "verbose_name_plural": "Customer Name Keys",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="customername",
+            constraint=models.UniqueConstraint(
+                fields=("kyc_profile", "subject_type", "subject_id"),
+                name="screening_customer_name_uniq",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="customernamekey",
+            index=models.Index(
+                fields=["key", "customer_name"], name="screening_customer_key_idx"
+            ),
+        ),
+    ]
@@ -4,6 +4,272 @@ Models do app screening
 
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils.translation import gettext_lazy as _
 
 
-# Adicione seus models aqui
+class WatchlistSource(models.Model):
+    """Lista de referência (sanções, PEP, mídia adversa) e sua versão carregada"""
+    
+    LIST_TYPES = [
+        ('sanctions', _('Sanctions')),
+        ('pep', _('Politically Exposed Persons')),
+        ('adverse_media', _('Adverse Media')),
+        ('other', _('Other')),
+    ]
+    
+    code = models.SlugField(max_length=50, unique=True)
+    name = models.CharField(max_length=255)
+    list_type = models.CharField(max_length=20, choices=LIST_TYPES, default='sanctions')
+    authority = models.CharField(max_length=255, blank=True)
+    url = models.URLField(blank=True)
+    is_active = models.BooleanField(default=True)
+    
+    # Versão atualmente carregada (rótulo da publicação) e quando foi carregada
+    version = models.CharField(max_length=100, blank=True)
+    loaded_at = models.DateTimeField(null=True, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = _('Watchlist Source')
+        verbose_name_plural = _('Watchlist Sources')
+        ordering = ['code']
+    
+    def __str__(self):
+        return f"{self.name} ({self.version or '-'})"
+
+
+class WatchlistLoad(models.Model):
+    """Carga de uma versão de lista: o que entrou, mudou ou saiu em relação à anterior"""
+    
+    STATUS_CHOICES = [
+        ('running', _('Running')),
+        ('completed', _('Completed')),
+        ('failed', _('Failed')),
+    ]
+    
+    source = models.ForeignKey(WatchlistSource, on_delete=models.CASCADE, related_name='loads')
+    version = models.CharField(max_length=100, blank=True)
+    path = models.CharField(max_length=500)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running')
+    
+    created_count = models.PositiveIntegerField(default=0)
+    updated_count = models.PositiveIntegerField(default=0)
+    deactivated_count = models.PositiveIntegerField(default=0)
+    unchanged_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Retriagem da base de clientes contra as entradas alteradas nesta carga
+    rescreened_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = _('Watchlist Load')
+        verbose_name_plural = _('Watchlist Loads')
+        ordering = ['-started_at']
+    
+    def __str__(self):
+        return f"{self.source.code} {self.version or '-'} ({self.status})"
+
+
+class WatchlistEntry(models.Model):
+    """Pessoa ou entidade de uma lista; o nome principal e os aliases são indexados"""
+    
+    ENTRY_TYPES = [
+        ('individual', _('Individual')),
+        ('entity', _('Entity')),
+        ('vessel', _('Vessel')),
+        ('aircraft', _('Aircraft')),
+    ]
+    
+    source = models.ForeignKey(WatchlistSource, on_delete=models.CASCADE, related_name='entries')
+    # Identificador da entrada na publicação original (estável entre versões)
+    external_id = models.CharField(max_length=100)
+    entry_type = models.CharField(max_length=20, choices=ENTRY_TYPES, default='individual')
+    name = models.CharField(max_length=500)
+    
+    # Muitas listas só publicam o ano de nascimento
+    date_of_birth = models.DateField(null=True, blank=True)
+    birth_year = models.PositiveSmallIntegerField(null=True, blank=True)
+    nationality = models.CharField(max_length=100, blank=True)
+    programs = models.CharField(max_length=255, blank=True)
+    remarks = models.TextField(blank=True)
+    
+    # Entradas removidas da lista são desativadas, não apagadas (trilha de auditoria)
+    is_active = models.BooleanField(default=True)
+    # Hash do registro na publicação (diff entre versões) e a carga que o criou/alterou
+    content_hash = models.CharField(max_length=32, blank=True)
+    last_load = models.ForeignKey(
+        WatchlistLoad,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='changed_entries'
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = _('Watchlist Entry')
+        verbose_name_plural = _('Watchlist Entries')
+        ordering = ['source', 'external_id']
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'external_id'], name='screening_entry_source_ext_uniq'),
+        ]
+        indexes = [
+            # Carga do índice em memória: entradas ativas em ordem de id
+            models.Index(fields=['is_active', 'id'], name='screening_entry_active_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} [{self.source.code}:{self.external_id}]"
+    
+    def save(self, *args, **kwargs):
+        if self.date_of_birth and not self.birth_year:
+            self.birth_year = self.date_of_birth.year
+        super().save(*args, **kwargs)
+
+
+class WatchlistAlias(models.Model):
+    """Nome alternativo (aka/fka) de uma entrada"""
+    
+    ALIAS_TYPES = [
+        ('aka', _('Also Known As')),
+        ('fka', _('Formerly Known As')),
+        ('weak', _('Weak Alias')),
+    ]
+    
+    entry = models.ForeignKey(WatchlistEntry, on_delete=models.CASCADE, related_name='aliases')
+    name = models.CharField(max_length=500)
+    alias_type = models.CharField(max_length=10, choices=ALIAS_TYPES, default='aka')
+    
+    class Meta:
+        verbose_name = _('Watchlist Alias')
+        verbose_name_plural = _('Watchlist Aliases')
+    
+    def __str__(self):
+        return f"{self.name} ({self.get_alias_type_display()})"
+
+
+class ScreeningHit(models.Model):
+    """Possível correspondência entre um nome do perfil KYC e uma entrada de lista"""
+    
+    SUBJECT_TYPES = [
+        ('profile', _('KYC Profile')),
+        ('ubo', _('UBO Declaration')),
+        ('related_pep', _('Related PEP')),
+    ]
+    
+    STATUS_CHOICES = [
+        ('open', _('Open')),
+        ('confirmed', _('Confirmed Match')),
+        ('dismissed', _('False Positive')),
+    ]
+    
+    kyc_profile = models.ForeignKey('kyc.KYCProfile', on_delete=models.CASCADE, related_name='screening_hits')
+    # Nome triado: o próprio perfil, uma declaração UBO ou o PEP relacionado de uma declaração PEP
+    subject_type = models.CharField(max_length=20, choices=SUBJECT_TYPES)
+    subject_id = models.CharField(max_length=64)
+    subject_name = models.CharField(max_length=255)
+    
+    entry = models.ForeignKey(WatchlistEntry, on_delete=models.CASCADE, related_name='hits')
+    matched_name = models.CharField(max_length=500)
+    score = models.FloatField()
+    name_score = models.FloatField()
+    dob_score = models.FloatField(null=True, blank=True)
+    nationality_match = models.BooleanField(null=True, blank=True)
+    
+    # Decisão do analista (mantida quando o perfil é triado de novo)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
+    reviewed_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='reviewed_screening_hits'
+    )
+    reviewed_at = models.DateTimeField(null=True, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = _('Screening Hit')
+        verbose_name_plural = _('Screening Hits')
+        ordering = ['-score', '-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['kyc_profile', 'subject_type', 'subject_id', 'entry'],
+                name='screening_hit_subject_entry_uniq',
+            ),
+        ]
+        indexes = [
+            # Fila de análise: hits abertos mais prováveis primeiro
+            models.Index(fields=['status', '-score'], name='screening_hit_status_score_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.subject_name} ~ {self.matched_name} ({self.score:.2f})"
+
+
+class ProfileScreening(models.Model):
+    """Última triagem de um perfil; evita repetir a triagem quando os nomes não mudaram"""
+    
+    kyc_profile = models.OneToOneField('kyc.KYCProfile', on_delete=models.CASCADE, related_name='screening')
+    # Hash dos nomes, datas e nacionalidades triados na última execução
+    subjects_hash = models.CharField(max_length=32)
+    hit_count = models.PositiveIntegerField(default=0)
+    screened_at = models.DateTimeField()
+    
+    class Meta:
+        verbose_name = _('Profile Screening')
+        verbose_name_plural = _('Profile Screenings')
+    
+    def __str__(self):
+        return f"{self.kyc_profile_id} ({self.hit_count} hits)"
+
+
+class CustomerName(models.Model):
+    """Nome triado de um perfil no índice invertido usado pela retriagem incremental"""
+    
+    kyc_profile = models.ForeignKey('kyc.KYCProfile', on_delete=models.CASCADE, related_name='screened_names')
+    subject_type = models.CharField(max_length=20, choices=ScreeningHit.SUBJECT_TYPES)
+    subject_id = models.CharField(max_length=64)
+    name = models.CharField(max_length=255)
+    date_of_birth = models.DateField(null=True, blank=True)
+    nationality = models.CharField(max_length=100, blank=True)
+    
+    class Meta:
+        verbose_name = _('Customer Name')
+        verbose_name_plural = _('Customer Names')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['kyc_profile', 'subject_type', 'subject_id'],
+                name='screening_customer_name_uniq',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} ({self.subject_type})"
+
+
+class CustomerNameKey(models.Model):
+    """Chave de busca de um nome de cliente (lista invertida chave → nomes)"""
+    
+    customer_name = models.ForeignKey(CustomerName, on_delete=models.CASCADE, related_name='keys')
+    # Prefixada pelo tipo, como no índice de listas (`t:`, `p:`, `g:`)
+    key = models.CharField(max_length=64)
+    
+    class Meta:
+        verbose_name = _('Customer Name Key')
+        verbose_name_plural = _('Customer Name Keys')
+        indexes = [
+            # Candidatos de uma entrada: nomes que compartilham chaves, sem ler a tabela de nomes
+            models.Index(fields=['key', 'customer_name'], name='screening_customer_key_idx'),
+        ]
+    
+    def __str__(self):
+        return self.key
@@ -0,0 +1,93 @@
+"""
+Normalização e chaves de nomes para screening
+Sem dependências do Django. As mesmas funções geram as chaves do índice de
+listas (apps.screening.index) e as chaves das consultas, então nomes
+grafados de formas diferentes (acentos, ordem, transliteração) se encontram.
+"""
+
+import re
+import unicodedata
+
+# Títulos e honoríficos ignorados na comparação
+TITLES = {
+    'mr', 'mrs', 'ms', 'miss', 'dr', 'prof', 'sir', 'dame', 'lord', 'sr', 'sra', 'jr',
+    'sheikh', 'shaikh', 'haji', 'hajji', 'general', 'gen', 'col', 'colonel',
+}
+
+NGRAM_SIZE = 3
+PHONETIC_KEY_LENGTH = 6
+
+_SEPARATORS_RE = re.compile(r'[\W_]+')
+
+# Grafias com o mesmo som, aplicadas em ordem (mais longas primeiro)
+_PHONETIC_RULES = [
+    ('x', 'ks'), ('sch', 'sk'), ('tch', 'x'), ('ph', 'f'), ('ck', 'k'), ('sh', 'x'), ('ch', 'x'),
+    ('th', 't'), ('kh', 'k'), ('gh', 'g'), ('dh', 'd'), ('dj', 'j'), ('dg', 'j'),
+    ('ou', 'u'), ('oo', 'u'), ('ee', 'i'), ('q', 'k'), ('z', 's'),
+    ('w', 'v'), ('y', 'i'),
+]
+_VOWELS = set('aeiou')
+
+
+def normalize_name(name):
+    """Minúsculas, sem acentos, pontuação nem títulos, espaços simples"""
+    if not name:
+        return ''
+    text = unicodedata.normalize('NFKD', name)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    text = _SEPARATORS_RE.sub(' ', text.casefold())
+    return ' '.join(token for token in text.split() if token not in TITLES)
+
+
+def name_tokens(normalized):
+    return normalized.split()
+
+
+def phonetic_key(token):
+    """
+    Chave fonética de um token (variante simplificada do Metaphone)
+    Mantém a primeira letra, unifica grafias equivalentes, remove vogais
+    internas e letras repetidas: mohammed, muhammad e mohamad viram `mhmd`.
+    """
+    if not token:
+        return ''
+    key = token
+    for source, target in _PHONETIC_RULES:
+        key = key.replace(source, target)
+    key = ''.join(char for char in key if char.isalpha())
+    if not key:
+        return token[:PHONETIC_KEY_LENGTH]
+    # C antes de e/i soa como S; nos outros casos como K
+    key = re.sub(r'c(?=[ei])', 's', key).replace('c', 'k')
+    first, rest = key[0], key[1:]
+    if first in _VOWELS:
+        first = 'a'
+    rest = ''.join(char for char in rest if char not in _VOWELS)
+    collapsed = first
+    for char in rest:
+        if char != collapsed[-1]:
+            collapsed += char
+    return collapsed[:PHONETIC_KEY_LENGTH]
+
+
+def token_ngrams(token, size=NGRAM_SIZE):
+    """N-gramas de caracteres do token com bordas marcadas (` al`, `ali`, `li `)"""
+    padded = f' {token} '
+    if len(padded) <= size:
+        return [padded]
+    return [padded[i:i + size] for i in range(len(padded) - size + 1)]
+
+
+def name_keys(normalized):
+    """
+    Chaves de busca de um nome normalizado: tokens, chaves fonéticas e n-gramas
+    Retorna um conjunto de strings prefixadas pelo tipo (`t:`, `p:`, `g:`).
+    """
+    keys = set()
+    for token in name_tokens(normalized):
+        keys.add(f't:{token}')
+        if len(token) > 1:
+            keys.add(f'p:{phonetic_key(token)}')
+        keys.update(f'g:{gram}' for gram in token_ngrams(token))
+    return keys
+
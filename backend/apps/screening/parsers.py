@@ -0,0 +1,162 @@
+"""
+Leitura em streaming de arquivos de listas (XML, CSV, JSON lines)
+Cada parser percorre o arquivo registro a registro e nunca o carrega
+inteiro: o CSV e o JSONL linha a linha, o XML com iterparse descartando
+cada elemento já lido. Arquivos `.gz` são descomprimidos em streaming.
+Sem dependências do Django.
+
+Campos de um registro: `external_id`, `name`, `entry_type`,
+`date_of_birth` (AAAA-MM-DD ou só AAAA), `nationality`, `programs`,
+`remarks` e `aliases` (lista; no CSV separados por `;`). No XML cada
+registro é um elemento `<entry id="...">` com um filho por campo e um
+`<alias>` por nome alternativo.
+"""
+
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from datetime import date
+
+FORMATS = ('csv', 'jsonl', 'xml')
+_EXTENSIONS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.xml': 'xml'}
+
+ALIAS_SEPARATOR = ';'
+XML_ENTRY_TAG = 'entry'
+
+
+class WatchlistFormatError(Exception):
+    """Arquivo ou registro fora do formato esperado"""
+
+
+@dataclass
+class WatchlistRecord:
+    external_id: str
+    name: str
+    entry_type: str = 'individual'
+    date_of_birth: date = None
+    birth_year: int = None
+    nationality: str = ''
+    programs: str = ''
+    remarks: str = ''
+    aliases: list = field(default_factory=list)
+
+    def content_hash(self):
+        """Hash dos campos do registro; muda se e só se o conteúdo mudar"""
+        payload = json.dumps(
+            [
+                self.name, self.entry_type,
+                self.date_of_birth.isoformat() if self.date_of_birth else None,
+                self.birth_year, self.nationality, self.programs, self.remarks,
+                sorted(self.aliases),
+            ],
+            ensure_ascii=False,
+        )
+        return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def detect_format(path):
+    base, extension = os.path.splitext(path.lower())
+    if extension == '.gz':
+        extension = os.path.splitext(base)[1]
+    try:
+        return _EXTENSIONS[extension]
+    except KeyError:
+        raise WatchlistFormatError(f'Unknown watchlist format for {path}')
+
+
+def _open_binary(path):
+    return gzip.open(path, 'rb') if path.lower().endswith('.gz') else open(path, 'rb')
+
+
+def parse_birth_date(value):
+    """(data, ano) a partir de 'AAAA-MM-DD' ou 'AAAA'; valores vazios dão (None, None)"""
+    value = (value or '').strip()
+    if not value:
+        return None, None
+    try:
+        if len(value) == 4:
+            return None, int(value)
+        parsed = date.fromisoformat(value[:10])
+        return parsed, parsed.year
+    except ValueError:
+        raise WatchlistFormatError(f'Invalid date of birth: {value!r}')
+
+
+def make_record(data):
+    """Registro a partir de um dicionário de campos (CSV, JSONL ou XML)"""
+    external_id = str(data.get('external_id') or data.get('id') or '').strip()
+    name = (data.get('name') or '').strip()
+    if not external_id or not name:
+        raise WatchlistFormatError(f'Record without id or name: {data!r}')
+
+    aliases = data.get('aliases') or []
+    if isinstance(aliases, str):
+        aliases = aliases.split(ALIAS_SEPARATOR)
+    date_of_birth, birth_year = parse_birth_date(data.get('date_of_birth'))
+    if data.get('birth_year') and not birth_year:
+        birth_year = int(data['birth_year'])
+
+    return WatchlistRecord(
+        external_id=external_id,
+        name=name,
+        entry_type=(data.get('entry_type') or 'individual').strip().lower(),
+        date_of_birth=date_of_birth,
+        birth_year=birth_year,
+        nationality=(data.get('nationality') or '').strip(),
+        programs=(data.get('programs') or '').strip(),
+        remarks=(data.get('remarks') or '').strip(),
+        aliases=list(dict.fromkeys(alias.strip() for alias in aliases if alias and alias.strip())),
+    )
+
+
+def iter_csv(path):
+    with _open_binary(path) as raw:
+        reader = csv.DictReader(io.TextIOWrapper(raw, encoding='utf-8-sig', newline=''))
+        for row in reader:
+            yield make_record(row)
+
+
+def iter_jsonl(path):
+    with _open_binary(path) as raw:
+        for number, line in enumerate(io.TextIOWrapper(raw, encoding='utf-8'), start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield make_record(json.loads(line))
+            except ValueError as e:
+                raise WatchlistFormatError(f'Line {number}: {e}')
+
+
+def iter_xml(path):
+    with _open_binary(path) as raw:
+        context = ET.iterparse(raw, events=('start', 'end'))
+        _, root = next(context)
+        for event, element in context:
+            if event != 'end' or element.tag != XML_ENTRY_TAG:
+                continue
+            data = {'external_id': element.get('id'), 'aliases': []}
+            for child in element:
+                text = (child.text or '').strip()
+                if child.tag == 'alias':
+                    data['aliases'].append(text)
+                else:
+                    data[child.tag] = text
+            yield make_record(data)
+            # Libera o elemento lido (memória constante)
+            element.clear()
+            root.clear()
+
+
+def iter_records(path, format=None):
+    """Registros do arquivo em `path`, um por vez"""
+    format = format or detect_format(path)
+    parsers = {'csv': iter_csv, 'jsonl': iter_jsonl, 'xml': iter_xml}
+    if format not in parsers:
+        raise WatchlistFormatError(f'Unsupported format: {format}')
+    return parsers[format](path)
@@ -0,0 +1,140 @@
+"""
+Retriagem incremental da base de clientes
+Quando uma lista muda, só as entradas criadas, alteradas ou desativadas na
+carga (WatchlistEntry.last_load) são comparadas com os clientes, e cada
+uma só com os nomes que o índice invertido de clientes devolve
+(apps.screening.customers). O custo acompanha o tamanho da diferença entre
+versões da lista, não o tamanho da base.
+"""
+
+import logging
+from collections import defaultdict
+
+import numpy as np
+from django.utils import timezone
+
+from . import scoring
+from .customers import candidate_names
+from .models import ScreeningHit, WatchlistEntry
+from .names import normalize_name
+from .services import ScreeningCandidate, ScreeningSubject, get_screening_config, store_hits
+
+logger = logging.getLogger(__name__)
+
+
+def _entry_names(entry):
+    """Nomes normalizados distintos da entrada (principal e aliases)"""
+    names = [normalize_name(entry.name)]
+    names.extend(normalize_name(alias.name) for alias in entry.aliases.all())
+    return [name for name in dict.fromkeys(names) if name]
+
+
+def _subject(customer):
+    return ScreeningSubject(
+        customer.subject_type, customer.subject_id, customer.name, customer.date_of_birth, customer.nationality
+    )
+
+
+def _ordinal(value):
+    return value.toordinal() if value else 0
+
+
+def _year(value):
+    return value.year if value else 0
+
+
+def match_entries(entries, threshold):
+    """
+    Clientes que casam com cada entrada
+    Os nomes da entrada e os clientes candidatos de todos eles são
+    pontuados juntos em uma matriz (scoring.score_matrix). Retorna
+    {kyc_profile_id: {ScreeningSubject: [ScreeningCandidate]}} com o melhor
+    nome de cada entrada por cliente.
+    """
+    matches = defaultdict(lambda: defaultdict(list))
+    for entry in entries:
+        entry_names = _entry_names(entry)
+        customers = {}
+        for entry_name in entry_names:
+            customers.update((customer.pk, customer) for customer in candidate_names(entry_name))
+        if not customers:
+            continue
+        customers = list(customers.values())
+
+        count = len(entry_names)
+        scores = scoring.score_matrix(
+            entry_names,
+            [normalize_name(customer.name) for customer in customers],
+            query_dobs=[_ordinal(entry.date_of_birth)] * count,
+            candidate_dobs=[_ordinal(customer.date_of_birth) for customer in customers],
+            query_years=[entry.birth_year or 0] * count,
+            candidate_years=[_year(customer.date_of_birth) for customer in customers],
+            query_nationalities=[normalize_name(entry.nationality)] * count,
+            candidate_nationalities=[normalize_name(customer.nationality) for customer in customers],
+        )
+        # Melhor nome da entrada para cada cliente (o primeiro em caso de empate)
+        best_names = scores.score.argmax(axis=0)
+        for column in np.nonzero(scores.score.max(axis=0) >= threshold)[0]:
+            customer, row = customers[column], best_names[column]
+            match = scores.pair(row, column)
+            matches[customer.kyc_profile_id][_subject(customer)].append(ScreeningCandidate(
+                entry=entry,
+                matched_name=entry_names[row],
+                score=match.score,
+                name_score=match.name,
+                dob_score=match.dob,
+                nationality_match=match.nationality,
+            ))
+    return matches
+
+
+def rescreen_entries(entry_ids, threshold=None):
+    """
+    Retriar a base contra as entradas `entry_ids` e gravar os hits
+    Perfis com hits abertos nessas entradas que não casam mais (entrada
+    alterada ou desativada) também são atualizados. Retorna o número de
+    perfis atualizados.
+    """
+    from apps.kyc.models import KYCProfile
+
+    if threshold is None:
+        threshold = get_screening_config()['MATCH_THRESHOLD']
+    entries = (
+        WatchlistEntry.objects
+        .filter(pk__in=entry_ids, is_active=True, source__is_active=True)
+        .prefetch_related('aliases')
+    )
+    matches = match_entries(entries, threshold)
+
+    profile_ids = set(matches)
+    profile_ids.update(
+        ScreeningHit.objects
+        .filter(entry_id__in=entry_ids, status='open')
+        .values_list('kyc_profile_id', flat=True)
+    )
+    for profile in KYCProfile.objects.filter(pk__in=profile_ids):
+        results = list(matches.get(profile.pk, {}).items())
+        store_hits(profile, results, entry_scope=entry_ids)
+    return len(profile_ids)
+
+
+def rescreen_load(load, batch_size=None):
+    """
+    Retriar a base contra as entradas que mudaram na carga `load`
+    Retorna o número de perfis atualizados.
+    """
+    batch_size = batch_size or get_screening_config()['RESCREEN_BATCH_SIZE']
+    entry_ids = list(
+        WatchlistEntry.objects.filter(last_load=load).order_by('pk').values_list('pk', flat=True)
+    )
+    profiles = 0
+    for start in range(0, len(entry_ids), batch_size):
+        profiles += rescreen_entries(entry_ids[start:start + batch_size])
+
+    load.rescreened_at = timezone.now()
+    load.save(update_fields=['rescreened_at'])
+    logger.info(
+        f"Lista {load.source.code} {load.version}: {len(entry_ids)} entradas retriadas, "
+        f"{profiles} perfis atualizados"
+    )
+    return profiles
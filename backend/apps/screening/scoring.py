@@ -0,0 +1,387 @@
+"""
+Pontuação de candidatos de screening
+Compara um nome consultado com um nome de lista já normalizados
+(apps.screening.names) e combina a similaridade do nome com a proximidade
+da data de nascimento e a concordância da nacionalidade.
+
+`score_pair` pontua um par em Python puro e é a referência da regra.
+`score_matrix` pontua N consultas contra M candidatos de uma vez com
+arrays NumPy e dá as mesmas notas; é o caminho usado pelo índice de listas
+e pela retriagem da base.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+WEIGHTS = {'name': 0.8, 'dob': 0.15, 'nationality': 0.05}
+
+# Diferença de anos a partir da qual a data de nascimento não soma nada
+DOB_TOLERANCE_YEARS = 3
+# Mesmo ano, data diferente (dia/mês trocados são comuns nas listas)
+DOB_SAME_YEAR_SCORE = 0.9
+# Casas decimais das notas devolvidas
+SCORE_DECIMALS = 4
+
+
+@dataclass
+class MatchScore:
+    score: float
+    name: float
+    dob: float = None
+    nationality: bool = None
+
+
+def jaro_winkler(a, b, prefix_scale=0.1):
+    """Similaridade Jaro-Winkler (0-1)"""
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+
+    window = max(max(len(a), len(b)) // 2 - 1, 0)
+    a_matched = [False] * len(a)
+    b_matched = [False] * len(b)
+    matches = 0
+    for i, char in enumerate(a):
+        for j in range(max(0, i - window), min(i + window + 1, len(b))):
+            if not b_matched[j] and b[j] == char:
+                a_matched[i] = b_matched[j] = True
+                matches += 1
+                break
+    if not matches:
+        return 0.0
+
+    a_chars = [char for char, matched in zip(a, a_matched) if matched]
+    b_chars = [char for char, matched in zip(b, b_matched) if matched]
+    transpositions = sum(x != y for x, y in zip(a_chars, b_chars)) / 2
+    jaro = (matches / len(a) + matches / len(b) + (matches - transpositions) / matches) / 3
+
+    prefix = 0
+    for x, y in zip(a[:4], b[:4]):
+        if x != y:
+            break
+        prefix += 1
+    return jaro + prefix * prefix_scale * (1 - jaro)
+
+
+def token_set_similarity(a, b):
+    """
+    Similaridade por conjunto de tokens (ordem e tokens extras pesam menos)
+    Compara a interseção ordenada com cada nome completo ordenado e fica
+    com a maior similaridade, como o token_set_ratio do fuzzywuzzy.
+    """
+    a_tokens, b_tokens = set(a.split()), set(b.split())
+    if not a_tokens or not b_tokens:
+        return 0.0
+    common = ' '.join(sorted(a_tokens & b_tokens))
+    a_sorted = ' '.join(filter(None, [common, ' '.join(sorted(a_tokens - b_tokens))]))
+    b_sorted = ' '.join(filter(None, [common, ' '.join(sorted(b_tokens - a_tokens))]))
+    scores = [jaro_winkler(a_sorted, b_sorted)]
+    if common:
+        scores += [jaro_winkler(common, a_sorted), jaro_winkler(common, b_sorted)]
+    return max(scores)
+
+
+def name_similarity(a, b):
+    return max(jaro_winkler(a, b), token_set_similarity(a, b))
+
+
+def dob_proximity(query_dob, query_year, entry_dob, entry_year):
+    """
+    Proximidade das datas de nascimento (0-1) ou None se um lado é desconhecido
+    Datas completas iguais valem 1; na comparação por ano a nota cai
+    linearmente até zero em DOB_TOLERANCE_YEARS.
+    """
+    if not query_year or not entry_year:
+        return None
+    if query_dob and entry_dob:
+        if query_dob == entry_dob:
+            return 1.0
+        if query_year == entry_year:
+            return DOB_SAME_YEAR_SCORE
+    elif query_year == entry_year:
+        return 1.0
+    return max(0.0, 1 - abs(query_year - entry_year) / DOB_TOLERANCE_YEARS) * DOB_SAME_YEAR_SCORE
+
+
+def combine(name, dob=None, nationality=None):
+    """Média ponderada dos componentes conhecidos"""
+    total = WEIGHTS['name'] * name
+    weight = WEIGHTS['name']
+    if dob is not None:
+        total += WEIGHTS['dob'] * dob
+        weight += WEIGHTS['dob']
+    if nationality is not None:
+        total += WEIGHTS['nationality'] * float(nationality)
+        weight += WEIGHTS['nationality']
+    return total / weight
+
+
+def score_pair(query_name, entry_name, query_dob=None, entry_dob=None, query_year=None,
+               entry_year=None, query_nationality='', entry_nationality=''):
+    """Nota de um par (nome consultado, nome da lista), ambos normalizados"""
+    name = name_similarity(query_name, entry_name)
+    dob = dob_proximity(query_dob, query_year, entry_dob, entry_year)
+    nationality = None
+    if query_nationality and entry_nationality:
+        nationality = query_nationality == entry_nationality
+    return MatchScore(_round(combine(name, dob, nationality)), _round(name), dob, nationality)
+
+
+def _round(value):
+    # Mesmo arredondamento do cálculo em lote (np.round difere de round() em empates binários)
+    return float(np.round(value, SCORE_DECIMALS))
+
+
+# Células (par × caractere × caractere) por bloco no Jaro-Winkler em lote (limita a memória)
+BATCH_CELLS = 4_000_000
+BATCH_WIDTH_STEP = 8
+
+
+@dataclass
+class ScoreMatrix:
+    """Notas de N consultas × M candidatos; NaN onde o componente é desconhecido"""
+    score: np.ndarray
+    name: np.ndarray
+    dob: np.ndarray
+    nationality: np.ndarray
+
+    @property
+    def shape(self):
+        return self.score.shape
+
+    def pair(self, query, candidate):
+        """MatchScore do par (linha, coluna), como score_pair o devolveria"""
+        dob = self.dob[query, candidate]
+        nationality = self.nationality[query, candidate]
+        return MatchScore(
+            float(self.score[query, candidate]),
+            float(self.name[query, candidate]),
+            None if np.isnan(dob) else float(dob),
+            None if np.isnan(nationality) else bool(nationality),
+        )
+
+
+def _encode(strings):
+    """Códigos dos caracteres (uint32, zeros à direita) e comprimentos de cada string"""
+    lengths = np.fromiter((len(string) for string in strings), dtype=np.int64, count=len(strings))
+    codes = np.zeros((len(strings), max(int(lengths.max(initial=0)), 1)), dtype=np.uint32)
+    for row, string in enumerate(strings):
+        if string:
+            codes[row, :len(string)] = np.frombuffer(string.encode('utf-32-le'), dtype=np.uint32)
+    return codes, lengths
+
+
+def _jaro_winkler_codes(a, a_len, b, b_len, prefix_scale):
+    """jaro_winkler de cada linha de `a` com a mesma linha de `b` (mesma largura)"""
+    rows = np.arange(len(a))
+    positions = np.arange(a.shape[1])
+    window = np.maximum(np.maximum(a_len, b_len) // 2 - 1, 0)
+
+    # Pares de caracteres iguais dentro da janela: (par, posição em a, posição em b)
+    candidates = a[:, :, None] == b[:, None, :]
+    candidates &= np.abs(positions[:, None] - positions[None, :]) <= window[:, None, None]
+    candidates &= (positions < a_len[:, None])[:, :, None]
+    candidates &= (positions < b_len[:, None])[:, None, :]
+
+    # Mesmo casamento guloso de jaro_winkler: cada caractere de `a`, em ordem,
+    # fica com o primeiro caractere livre igual de `b` dentro da janela
+    a_matched = np.zeros(a.shape, dtype=bool)
+    b_free = np.ones(b.shape, dtype=bool)
+    for i in range(int(a_len.max(initial=0))):
+        allowed = candidates[:, i, :] & b_free
+        first = allowed.argmax(axis=1)
+        found = allowed[rows, first]
+        b_free[rows[found], first[found]] = False
+        a_matched[found, i] = True
+    b_matched = ~b_free & (positions < b_len[:, None])
+
+    matches = a_matched.sum(axis=1)
+    # k-ésimo caractere casado de `a` contra o k-ésimo de `b`
+    a_sequence = np.take_along_axis(a, np.argsort(~a_matched, axis=1, kind='stable'), axis=1)
+    b_sequence = np.take_along_axis(b, np.argsort(~b_matched, axis=1, kind='stable'), axis=1)
+    transpositions = ((a_sequence != b_sequence) & (positions < matches[:, None])).sum(axis=1) / 2
+
+    safe_matches = np.maximum(matches, 1)
+    jaro = (
+        matches / np.maximum(a_len, 1) + matches / np.maximum(b_len, 1)
+        + (matches - transpositions) / safe_matches
+    ) / 3
+
+    width = min(4, a.shape[1])
+    common_prefix = (a[:, :width] == b[:, :width]) & (positions[:width] < np.minimum(a_len, b_len)[:, None])
+    prefix = np.cumprod(common_prefix, axis=1).sum(axis=1)
+    result = jaro + prefix * prefix_scale * (1 - jaro)
+    result[matches == 0] = 0.0
+    result[(a_len == b_len) & (a == b).all(axis=1)] = 1.0
+    return result
+
+
+def jaro_winkler_batch(left, right, prefix_scale=0.1):
+    """jaro_winkler de cada par (left[k], right[k]) como array"""
+    strings = {}
+    left_slots = np.array([strings.setdefault(string, len(strings)) for string in left], dtype=np.int64)
+    right_slots = np.array([strings.setdefault(string, len(strings)) for string in right], dtype=np.int64)
+    codes, lengths = _encode(list(strings))
+    return _jaro_winkler_slots(codes, lengths, left_slots, right_slots, prefix_scale)
+
+
+def _jaro_winkler_slots(codes, lengths, left, right, prefix_scale=0.1):
+    """
+    jaro_winkler dos pares de strings codificadas (índices em `codes`)
+    Os pares são agrupados pelo maior comprimento, então cada bloco usa uma
+    largura próxima da menor possível; o tamanho do bloco limita a matriz
+    par × a × b a BATCH_CELLS células.
+    """
+    result = np.empty(len(left), dtype=np.float64)
+    # Larguras arredondadas para múltiplos de BATCH_WIDTH_STEP: menos blocos em lotes pequenos
+    widths = -(-np.maximum(lengths[left], lengths[right]) // BATCH_WIDTH_STEP) * BATCH_WIDTH_STEP
+    for width in np.unique(widths):
+        group = np.nonzero(widths == width)[0]
+        width = min(max(int(width), 1), codes.shape[1])
+        size = max(BATCH_CELLS // (width * width), 1)
+        for start in range(0, len(group), size):
+            chunk = group[start:start + size]
+            a, b = left[chunk], right[chunk]
+            result[chunk] = _jaro_winkler_codes(
+                codes[a, :width], lengths[a], codes[b, :width], lengths[b], prefix_scale
+            )
+    return result
+
+
+def name_similarity_matrix(queries, candidates):
+    """
+    name_similarity de cada consulta com cada candidato (matriz N×M)
+    Nomes sem tokens em comum (a maioria dos pares) usam os nomes com
+    tokens ordenados, preparados uma vez por nome; só os pares com tokens
+    em comum montam as strings do token_set em Python. Todas as
+    comparações Jaro-Winkler rodam em lote.
+    """
+    rows, columns = len(queries), len(candidates)
+    strings = {}
+
+    def slots(values):
+        return np.array([strings.setdefault(value, len(strings)) for value in values], dtype=np.int64)
+
+    query_tokens = [set(query.split()) for query in queries]
+    candidate_tokens = [set(candidate.split()) for candidate in candidates]
+    query_slots, candidate_slots = slots(queries), slots(candidates)
+    query_sorted = slots([' '.join(sorted(tokens)) for tokens in query_tokens])
+    candidate_sorted = slots([' '.join(sorted(tokens)) for tokens in candidate_tokens])
+
+    # Candidatos com algum token em comum, por consulta
+    postings = {}
+    for column, tokens in enumerate(candidate_tokens):
+        for token in tokens:
+            postings.setdefault(token, []).append(column)
+    overlap = np.zeros((rows, columns), dtype=bool)
+    for row, tokens in enumerate(query_tokens):
+        for token in tokens:
+            overlap[row, postings.get(token, [])] = True
+
+    # Comparação do nome inteiro em todos os pares
+    pair_ids = [np.arange(rows * columns)]
+    left = [np.repeat(query_slots, columns)]
+    right = [np.tile(candidate_slots, rows)]
+
+    # token_set sem tokens em comum: só os nomes ordenados (se diferirem dos originais)
+    disjoint = ~overlap
+    disjoint &= (query_sorted != query_slots)[:, None] | (candidate_sorted != candidate_slots)[None, :]
+    disjoint &= np.array([bool(tokens) for tokens in query_tokens], dtype=bool)[:, None]
+    disjoint &= np.array([bool(tokens) for tokens in candidate_tokens], dtype=bool)[None, :]
+    disjoint_rows, disjoint_columns = np.nonzero(disjoint)
+    pair_ids.append(disjoint_rows * columns + disjoint_columns)
+    left.append(query_sorted[disjoint_rows])
+    right.append(candidate_sorted[disjoint_columns])
+
+    # token_set com tokens em comum
+    shared_ids, shared_left, shared_right = [], [], []
+    for row, column in zip(*np.nonzero(overlap)):
+        a_tokens, b_tokens = query_tokens[row], candidate_tokens[column]
+        common = ' '.join(sorted(a_tokens & b_tokens))
+        a_sorted = ' '.join(filter(None, [common, ' '.join(sorted(a_tokens - b_tokens))]))
+        b_sorted = ' '.join(filter(None, [common, ' '.join(sorted(b_tokens - a_tokens))]))
+        pair = row * columns + column
+        for x, y in ((a_sorted, b_sorted), (common, a_sorted), (common, b_sorted)):
+            shared_ids.append(pair)
+            shared_left.append(x)
+            shared_right.append(y)
+    pair_ids.append(np.array(shared_ids, dtype=np.int64))
+    left.append(slots(shared_left))
+    right.append(slots(shared_right))
+
+    codes, lengths = _encode(list(strings))
+    scores = _jaro_winkler_slots(codes, lengths, np.concatenate(left), np.concatenate(right))
+    result = np.zeros(rows * columns, dtype=np.float64)
+    np.maximum.at(result, np.concatenate(pair_ids), scores)
+    return result.reshape(rows, columns)
+
+
+def _as_int_array(values, count):
+    if values is None:
+        return np.zeros(count, dtype=np.int64)
+    return np.asarray(values, dtype=np.int64).reshape(count)
+
+
+def dob_proximity_matrix(query_dobs, query_years, candidate_dobs, candidate_years):
+    """dob_proximity de cada par a partir de ordinais e anos (0 = desconhecido); NaN se desconhecida"""
+    query_dobs, query_years = query_dobs[:, None], query_years[:, None]
+    candidate_dobs, candidate_years = candidate_dobs[None, :], candidate_years[None, :]
+    same_year = query_years == candidate_years
+    by_year = np.maximum(0.0, 1 - np.abs(query_years - candidate_years) / DOB_TOLERANCE_YEARS) * DOB_SAME_YEAR_SCORE
+    both_dates = (query_dobs != 0) & (candidate_dobs != 0)
+    result = np.where(
+        both_dates,
+        np.where(query_dobs == candidate_dobs, 1.0, np.where(same_year, DOB_SAME_YEAR_SCORE, by_year)),
+        np.where(same_year, 1.0, by_year),
+    )
+    result[(query_years == 0) | (candidate_years == 0)] = np.nan
+    return result
+
+
+def nationality_matrix(query_nationalities, candidate_nationalities):
+    """1 se as nacionalidades (normalizadas) coincidem, 0 se não, NaN se uma falta"""
+    codes = {'': 0}
+    queries = np.array([codes.setdefault(value or '', len(codes)) for value in query_nationalities])[:, None]
+    candidates = np.array([codes.setdefault(value or '', len(codes)) for value in candidate_nationalities])[None, :]
+    result = (queries == candidates).astype(np.float64)
+    result[(queries == 0) | (candidates == 0)] = np.nan
+    return result
+
+
+def combine_matrix(name, dob, nationality):
+    """combine elemento a elemento; componentes NaN ficam fora da média"""
+    dob_known = ~np.isnan(dob)
+    nationality_known = ~np.isnan(nationality)
+    total = WEIGHTS['name'] * name
+    total = total + np.where(dob_known, WEIGHTS['dob'] * np.nan_to_num(dob), 0.0)
+    total = total + np.where(nationality_known, WEIGHTS['nationality'] * np.nan_to_num(nationality), 0.0)
+    weight = WEIGHTS['name'] + np.where(dob_known, WEIGHTS['dob'], 0.0)
+    weight = weight + np.where(nationality_known, WEIGHTS['nationality'], 0.0)
+    return total / weight
+
+
+def score_matrix(query_names, candidate_names, query_dobs=None, candidate_dobs=None, query_years=None,
+                 candidate_years=None, query_nationalities=None, candidate_nationalities=None):
+    """
+    Notas de N consultas × M candidatos (nomes normalizados)
+    Datas como ordinais (date.toordinal) e anos, 0 quando desconhecidos;
+    nacionalidades normalizadas. Cada célula é igual ao score_pair do par.
+    """
+    rows, columns = len(query_names), len(candidate_names)
+    name = name_similarity_matrix(query_names, candidate_names)
+    dob = dob_proximity_matrix(
+        _as_int_array(query_dobs, rows), _as_int_array(query_years, rows),
+        _as_int_array(candidate_dobs, columns), _as_int_array(candidate_years, columns),
+    )
+    nationality = nationality_matrix(
+        query_nationalities if query_nationalities is not None else [''] * rows,
+        candidate_nationalities if candidate_nationalities is not None else [''] * columns,
+    )
+    return ScoreMatrix(
+        score=np.round(combine_matrix(name, dob, nationality), SCORE_DECIMALS),
+        name=np.round(name, SCORE_DECIMALS),
+        dob=dob,
+        nationality=nationality,
+    )
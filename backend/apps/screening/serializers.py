@@ -6,4 +6,30 @@ from rest_framework import serializers
 from . import models
 
 
-# Adicione seus serializers aqui
+class WatchlistEntrySerializer(serializers.ModelSerializer):
+    """Entrada de lista resumida (exibida nos hits)"""
+    
+    source = serializers.SlugRelatedField(slug_field='code', read_only=True)
+    
+    class Meta:
+        model = models.WatchlistEntry
+        fields = [
+            'id', 'source', 'external_id', 'entry_type', 'name', 'date_of_birth',
+            'birth_year', 'nationality', 'programs', 'is_active'
+        ]
+        read_only_fields = fields
+
+
+class ScreeningHitSerializer(serializers.ModelSerializer):
+    """Serializer para hits de screening de um perfil"""
+    
+    entry = WatchlistEntrySerializer(read_only=True)
+    
+    class Meta:
+        model = models.ScreeningHit
+        fields = [
+            'id', 'kyc_profile', 'subject_type', 'subject_id', 'subject_name', 'entry',
+            'matched_name', 'score', 'name_score', 'dob_score', 'nationality_match',
+            'status', 'reviewed_by', 'reviewed_at', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
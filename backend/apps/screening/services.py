@@ -0,0 +1,213 @@
+"""
+Serviços de screening
+`screen_name` consulta o índice em memória (apps.screening.index) e só vai
+ao banco para carregar as poucas entradas retornadas. `screen_profile`
+tria todos os nomes de um perfil KYC (titular, UBOs e PEPs relacionados)
+e grava o resultado como ScreeningHit; `store_hits` também grava os hits
+da retriagem incremental (apps.screening.rescreening).
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import date
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .customers import index_profile_names
+from .index import get_index
+from .models import ProfileScreening, ScreeningHit, WatchlistEntry
+
+DEFAULTS = {
+    # Nota mínima (0-1) para um candidato ser retornado
+    'MATCH_THRESHOLD': 0.8,
+    'MAX_RESULTS': 10,
+    # Nomes pontuados por consulta após a geração de candidatos
+    'CANDIDATE_POOL': 200,
+    # N-gramas mais frequentes que isso não geram candidatos
+    'MAX_NGRAM_POSTINGS': 20000,
+    # Intervalo (s) entre verificações de nova versão publicada do índice
+    'INDEX_CHECK_INTERVAL': 30,
+    # Registros por lote na carga de listas (bulk_create/bulk_update)
+    'LOAD_BATCH_SIZE': 2000,
+    # Espera (s) antes de triar um perfil alterado; alterações nesse intervalo viram uma só triagem
+    'DEBOUNCE_SECONDS': 10,
+    # Entradas de lista alteradas por lote na retriagem da base de clientes
+    'RESCREEN_BATCH_SIZE': 500,
+    # Validade (s) da marca de triagem agendada (libera novo agendamento se a tarefa se perder)
+    'PENDING_TTL': 300,
+}
+
+
+def get_screening_config():
+    return {**DEFAULTS, **getattr(settings, 'SCREENING', {})}
+
+
+@dataclass
+class ScreeningCandidate:
+    entry: WatchlistEntry
+    matched_name: str
+    score: float
+    name_score: float
+    dob_score: float = None
+    nationality_match: bool = None
+
+
+@dataclass(frozen=True)
+class ScreeningSubject:
+    subject_type: str
+    subject_id: str
+    name: str
+    date_of_birth: date = None
+    nationality: str = ''
+
+
+def screen_name(full_name, dob=None, nationality='', limit=None, threshold=None):
+    """
+    Candidatos das listas ativas para um nome, do mais para o menos provável
+    `dob` e `nationality` pesam na nota quando informados e presentes na
+    entrada da lista; ausentes em um dos lados, só o nome é considerado.
+    """
+    config = get_screening_config()
+    matches = get_index().search(
+        full_name,
+        date_of_birth=dob,
+        nationality=nationality or '',
+        limit=limit or config['MAX_RESULTS'],
+        threshold=config['MATCH_THRESHOLD'] if threshold is None else threshold,
+        pool_size=config['CANDIDATE_POOL'],
+    )
+    entries = WatchlistEntry.objects.select_related('source').in_bulk(
+        [match.entry_id for match in matches]
+    )
+    return [
+        ScreeningCandidate(
+            entry=entries[match.entry_id],
+            matched_name=match.matched_name,
+            score=match.score,
+            name_score=match.name_score,
+            dob_score=match.dob_score,
+            nationality_match=match.nationality_match,
+        )
+        for match in matches
+        if match.entry_id in entries
+    ]
+
+
+def profile_subjects(profile):
+    """Nomes triados de um perfil: titular, UBOs declarados e PEPs relacionados"""
+    subjects = [
+        ScreeningSubject('profile', str(profile.pk), profile.full_name, profile.date_of_birth, profile.nationality)
+    ]
+    for ubo in profile.ubo_declarations.all():
+        subjects.append(
+            ScreeningSubject('ubo', str(ubo.pk), ubo.full_name, ubo.date_of_birth, ubo.nationality)
+        )
+    # all() e filtro aqui: aproveita prefetch_related na reconstrução do índice de clientes
+    for declaration in profile.pep_declarations.all():
+        if declaration.related_pep_name:
+            subjects.append(ScreeningSubject('related_pep', str(declaration.pk), declaration.related_pep_name))
+    return [subject for subject in subjects if subject.name.strip()]
+
+
+def subjects_hash(subjects):
+    payload = json.dumps(
+        sorted(
+            [subject.subject_type, subject.subject_id, subject.name,
+             subject.date_of_birth.isoformat() if subject.date_of_birth else None, subject.nationality]
+            for subject in subjects
+        ),
+        ensure_ascii=False,
+    )
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def lock_profile_screening(profile):
+    """
+    Bloquear a linha de ProfileScreening do perfil até o fim da transação
+    Serializa as triagens e retriagens do mesmo perfil: sem o lock, duas
+    execuções sem hits prévios criariam os mesmos ScreeningHit em paralelo.
+    Na primeira triagem a linha é criada vazia (hash que nunca coincide).
+    """
+    state, _created = ProfileScreening.objects.select_for_update().get_or_create(
+        kyc_profile=profile,
+        defaults={'subjects_hash': '', 'screened_at': timezone.now()},
+    )
+    return state
+
+
+def store_hits(profile, results, entry_scope=None):
+    """
+    Gravar os candidatos de cada sujeito como ScreeningHit do perfil
+    Hits já existentes são atualizados mantendo a decisão do analista. Hits
+    abertos que não apareceram de novo são removidos; com `entry_scope`
+    (triagem só de algumas entradas) a remoção se limita a essas entradas.
+    Retorna o número de hits gravados.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        lock_profile_screening(profile)
+        hits = profile.screening_hits.select_for_update()
+        if entry_scope is not None:
+            hits = hits.filter(entry_id__in=entry_scope)
+        existing = {(hit.subject_type, hit.subject_id, hit.entry_id): hit for hit in hits}
+
+        created, updated, seen = [], [], set()
+        for subject, candidates in results:
+            for candidate in candidates:
+                key = (subject.subject_type, subject.subject_id, candidate.entry.pk)
+                seen.add(key)
+                hit = existing.get(key) or ScreeningHit(
+                    kyc_profile=profile,
+                    subject_type=subject.subject_type,
+                    subject_id=subject.subject_id,
+                    entry=candidate.entry,
+                )
+                hit.subject_name = subject.name
+                hit.matched_name = candidate.matched_name
+                hit.score = candidate.score
+                hit.name_score = candidate.name_score
+                hit.dob_score = candidate.dob_score
+                hit.nationality_match = candidate.nationality_match
+                hit.updated_at = now
+                (updated if hit.pk else created).append(hit)
+
+        ScreeningHit.objects.bulk_create(created)
+        ScreeningHit.objects.bulk_update(
+            updated,
+            ['subject_name', 'matched_name', 'score', 'name_score', 'dob_score', 'nationality_match', 'updated_at'],
+        )
+        stale = [hit.pk for key, hit in existing.items() if key not in seen and hit.status == 'open']
+        ScreeningHit.objects.filter(pk__in=stale).delete()
+    return len(created) + len(updated)
+
+
+def screen_profile(profile, force=False):
+    """
+    Triar todos os nomes do perfil e gravar os hits
+    Retorna o número de hits, ou None quando nomes, datas e nacionalidades
+    não mudaram desde a última triagem (mudanças nas listas são cobertas
+    pela retriagem incremental, que usa o índice de nomes regravado aqui).
+    """
+    with transaction.atomic():
+        # Nomes lidos com o lock: uma execução atrasada não grava dados antigos
+        state = lock_profile_screening(profile)
+        profile.refresh_from_db(fields=['full_name', 'date_of_birth', 'nationality'])
+        subjects = profile_subjects(profile)
+        digest = subjects_hash(subjects)
+        if state.subjects_hash == digest and not force:
+            return None
+
+        results = [
+            (subject, screen_name(subject.name, subject.date_of_birth, subject.nationality))
+            for subject in subjects
+        ]
+        hit_count = store_hits(profile, results)
+        index_profile_names(profile, subjects)
+        state.subjects_hash = digest
+        state.hit_count = hit_count
+        state.screened_at = timezone.now()
+        state.save(update_fields=['subjects_hash', 'hit_count', 'screened_at'])
+    return hit_count
@@ -0,0 +1,31 @@
+"""
+Signals do app screening
+Alterações nos nomes triados de um perfil KYC agendam a sua triagem na
+fila `screening`; a requisição nunca espera o screening.
+"""
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.kyc.models import KYCProfile, UBODeclaration, PEPDeclaration
+from .tasks import request_profile_screening
+
+# Campos do perfil que entram na triagem
+SCREENED_PROFILE_FIELDS = {'full_name', 'date_of_birth', 'nationality'}
+
+
+@receiver(post_save, sender=KYCProfile)
+def screen_profile_on_save(sender, instance, update_fields=None, **kwargs):
+    """Triar o perfil criado ou alterado (saves parciais sem campos triados são ignorados)"""
+    if update_fields is not None and not SCREENED_PROFILE_FIELDS & set(update_fields):
+        return
+    request_profile_screening(instance.pk)
+
+
+@receiver(post_save, sender=UBODeclaration)
+@receiver(post_delete, sender=UBODeclaration)
+@receiver(post_save, sender=PEPDeclaration)
+@receiver(post_delete, sender=PEPDeclaration)
+def screen_profile_on_declaration_change(sender, instance, **kwargs):
+    """UBOs e PEPs relacionados são triados junto com o perfil"""
+    request_profile_screening(instance.kyc_profile_id)
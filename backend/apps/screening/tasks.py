@@ -0,0 +1,85 @@
+"""
+Tarefas Celery do app screening
+Publicadas na fila `screening` pelo roteamento `apps.screening.*` (config/celery.py).
+"""
+
+import logging
+from functools import partial
+
+from celery import shared_task
+from django.core.cache import cache
+from django.db import transaction
+
+from .loader import load_watchlist
+from .models import WatchlistLoad, WatchlistSource
+from .rescreening import rescreen_load
+from .services import get_screening_config, screen_profile
+
+logger = logging.getLogger(__name__)
+
+PENDING_SCREENING_KEY = 'screening:profile:pending:{}'
+
+
+def request_profile_screening(profile_id):
+    """
+    Agendar a triagem do perfil após o commit, coalescendo rajadas
+    A primeira alteração marca o perfil como pendente no cache e agenda a
+    tarefa com DEBOUNCE_SECONDS de atraso; as seguintes, enquanto a marca
+    existir, não agendam nada: a tarefa lê o estado do banco ao executar.
+    """
+    transaction.on_commit(partial(_schedule_profile_screening, str(profile_id)))
+
+
+def _schedule_profile_screening(profile_id):
+    config = get_screening_config()
+    if cache.add(PENDING_SCREENING_KEY.format(profile_id), 1, config['PENDING_TTL']):
+        screen_kyc_profile.apply_async(args=[profile_id], countdown=config['DEBOUNCE_SECONDS'])
+
+
+def request_load_rescreening(load):
+    """Publicar a retriagem da base se a carga criou, alterou ou desativou entradas"""
+    if load.created_count or load.updated_count or load.deactivated_count:
+        transaction.on_commit(partial(rescreen_watchlist_load.delay, load.pk))
+        return True
+    return False
+
+
+@shared_task(name='apps.screening.tasks.load_watchlist_file')
+def load_watchlist_file(source_code, path, format=None, version=''):
+    """Carregar uma versão de lista a partir de um arquivo local do worker"""
+    source = WatchlistSource.objects.filter(code=source_code).first()
+    if source is None:
+        logger.warning(f"Lista {source_code} não encontrada")
+        return None
+    load = load_watchlist(source, path, format=format, version=version)
+    request_load_rescreening(load)
+    return {
+        'load_id': load.pk,
+        'created': load.created_count,
+        'updated': load.updated_count,
+        'deactivated': load.deactivated_count,
+        'unchanged': load.unchanged_count,
+    }
+
+
+@shared_task(name='apps.screening.tasks.screen_kyc_profile')
+def screen_kyc_profile(profile_id):
+    """Triar os nomes de um perfil KYC (agendada por request_profile_screening)"""
+    from apps.kyc.models import KYCProfile
+
+    # Alterações a partir daqui agendam uma nova execução
+    cache.delete(PENDING_SCREENING_KEY.format(profile_id))
+    profile = KYCProfile.objects.filter(pk=profile_id).first()
+    if profile is None:
+        return None
+    return screen_profile(profile)
+
+
+@shared_task(name='apps.screening.tasks.rescreen_watchlist_load')
+def rescreen_watchlist_load(load_id):
+    """Retriar a base de clientes contra as entradas alteradas por uma carga de lista"""
+    load = WatchlistLoad.objects.select_related('source').filter(pk=load_id).first()
+    if load is None:
+        logger.warning(f"Carga {load_id} não encontrada")
+        return None
+    return rescreen_load(load)
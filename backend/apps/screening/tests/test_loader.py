@@ -0,0 +1,163 @@
+"""
+Testes para a carga incremental de listas de screening
+"""
+
+import csv
+import gzip
+import json
+import pytest
+from datetime import date
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from apps.screening import index
+from apps.screening.loader import load_watchlist
+from apps.screening.models import WatchlistSource, WatchlistEntry
+from apps.screening.parsers import iter_records
+from apps.screening.services import screen_name
+
+RECORDS = [
+    {'external_id': '1', 'name': 'Muhammad Ali Hasan', 'date_of_birth': '1970-05-17',
+     'nationality': 'Syria', 'aliases': ['Abu Ali']},
+    {'external_id': '2', 'name': 'Ivan Petrovich Volkov', 'date_of_birth': '1965', 'aliases': []},
+    {'external_id': '3', 'name': 'Northern Shipping LLC', 'entry_type': 'entity', 'aliases': []},
+]
+
+
+def write_jsonl(path, records):
+    path.write_text('\n'.join(json.dumps(record) for record in records) + '\n')
+    return path
+
+
+def write_csv(path, records):
+    with open(path, 'w', newline='') as fh:
+        writer = csv.DictWriter(fh, fieldnames=['external_id', 'name', 'entry_type', 'date_of_birth',
+                                                'nationality', 'aliases'])
+        writer.writeheader()
+        for record in records:
+            writer.writerow({**record, 'aliases': ';'.join(record['aliases'])})
+    return path
+
+
+def write_xml_gz(path, records):
+    body = ''.join(
+        f'<entry id="{record["external_id"]}"><name>{record["name"]}</name>'
+        f'<entry_type>{record.get("entry_type", "")}</entry_type>'
+        f'<date_of_birth>{record.get("date_of_birth", "")}</date_of_birth>'
+        f'<nationality>{record.get("nationality", "")}</nationality>'
+        + ''.join(f'<alias>{alias}</alias>' for alias in record['aliases'])
+        + '</entry>'
+        for record in records
+    )
+    with gzip.open(path, 'wt') as fh:
+        fh.write(f'<?xml version="1.0"?><watchlist>{body}</watchlist>')
+    return path
+
+
+@pytest.fixture
+def source(db):
+    index.reset_index()
+    yield WatchlistSource.objects.create(code='ofac-sdn', name='OFAC SDN')
+    index.reset_index()
+
+
+@pytest.mark.unit
+class TestParsers:
+    """Testes para os parsers em streaming"""
+    
+    def test_formats_yield_same_records(self, tmp_path):
+        parsed = [
+            list(iter_records(str(write_jsonl(tmp_path / 'list.jsonl', RECORDS)))),
+            list(iter_records(str(write_csv(tmp_path / 'list.csv', RECORDS)))),
+            list(iter_records(str(write_xml_gz(tmp_path / 'list.xml.gz', RECORDS)))),
+        ]
+        
+        hashes = [[record.content_hash() for record in records] for records in parsed]
+        assert hashes[0] == hashes[1] == hashes[2]
+        assert parsed[0][0].date_of_birth == date(1970, 5, 17)
+        assert parsed[0][1].date_of_birth is None
+        assert parsed[0][1].birth_year == 1965
+        assert parsed[2][0].aliases == ['Abu Ali']
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestLoadWatchlist:
+    """Testes para load_watchlist"""
+    
+    def test_second_version_applies_only_the_diff(self, source, tmp_path):
+        load_watchlist(source, write_jsonl(tmp_path / 'v1.jsonl', RECORDS), version='v1', batch_size=2)
+        volkov_updated_at = WatchlistEntry.objects.get(external_id='2').updated_at
+        
+        changed = [
+            {**RECORDS[0], 'aliases': ['Abu Ali', 'Hasan Muhammad']},
+            RECORDS[1],
+            {'external_id': '4', 'name': 'Olga Ivanova Smirnova', 'aliases': []},
+        ]
+        load = load_watchlist(source, write_jsonl(tmp_path / 'v2.jsonl', changed), version='v2', batch_size=2)
+        
+        assert load.created_count == 1
+        assert load.updated_count == 1
+        assert load.deactivated_count == 1
+        assert load.unchanged_count == 1
+        assert load.status == 'completed'
+        assert set(load.changed_entries.values_list('external_id', flat=True)) == {'1', '3', '4'}
+        hasan = WatchlistEntry.objects.get(external_id='1')
+        assert sorted(hasan.aliases.values_list('name', flat=True)) == ['Abu Ali', 'Hasan Muhammad']
+        assert WatchlistEntry.objects.get(external_id='2').updated_at == volkov_updated_at
+        assert WatchlistEntry.objects.get(external_id='3').is_active is False
+        source.refresh_from_db()
+        assert source.version == 'v2'
+    
+    def test_index_rebuilt_after_load(self, source, tmp_path):
+        assert screen_name('Olga Smirnova') == []
+        
+        load_watchlist(source, write_jsonl(tmp_path / 'v1.jsonl', [
+            {'external_id': '4', 'name': 'Olga Ivanova Smirnova', 'aliases': []},
+        ]))
+        
+        assert screen_name('Olga Ivanova Smirnova')[0].entry.external_id == '4'
+    
+    def test_removed_entry_reactivated(self, source, tmp_path):
+        load_watchlist(source, write_jsonl(tmp_path / 'v1.jsonl', RECORDS))
+        load_watchlist(source, write_jsonl(tmp_path / 'v2.jsonl', RECORDS[:2]))
+        
+        load = load_watchlist(source, write_jsonl(tmp_path / 'v3.jsonl', RECORDS))
+        
+        assert load.updated_count == 1
+        assert WatchlistEntry.objects.filter(is_active=True).count() == 3
+    
+    def test_duplicate_ids_in_file_ignored(self, source, tmp_path):
+        load = load_watchlist(source, write_jsonl(tmp_path / 'v1.jsonl', RECORDS + RECORDS[:1]))
+        
+        assert load.created_count == 3
+        assert WatchlistEntry.objects.count() == 3
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestLoadWatchlistCommand:
+    """Testes para o comando load_watchlist"""
+    
+    def test_creates_source_and_loads(self, tmp_path):
+        path = write_csv(tmp_path / 'list.csv', RECORDS)
+        out = StringIO()
+        
+        call_command(
+            'load_watchlist', str(path), '--source', 'un-consolidated',
+            '--list-version', '2026-10', stdout=out
+        )
+        
+        source = WatchlistSource.objects.get(code='un-consolidated')
+        assert source.version == '2026-10'
+        assert source.entries.count() == 3
+        assert '3 novas' in out.getvalue()
+        index.reset_index()
+    
+    def test_invalid_file(self, tmp_path):
+        path = tmp_path / 'list.jsonl'
+        path.write_text('{"name": "No Id"}\n')
+        
+        with pytest.raises(CommandError):
+            call_command('load_watchlist', str(path), '--source', 'broken', stdout=StringIO())
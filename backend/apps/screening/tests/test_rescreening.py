@@ -0,0 +1,211 @@
+"""
+Testes para o índice de nomes de clientes e a retriagem incremental
+"""
+
+import json
+import pytest
+from io import StringIO
+from django.core.management import call_command
+
+from apps.screening import index, rescreening
+from apps.screening.customers import candidate_names, rebuild_customer_index
+from apps.screening.loader import load_watchlist
+from apps.screening.models import WatchlistSource, WatchlistLoad, CustomerName, ScreeningHit
+from apps.screening.parsers import WatchlistFormatError
+from apps.screening.rescreening import rescreen_load
+from apps.screening.services import screen_name, screen_profile
+from apps.screening.tasks import request_load_rescreening
+from conftest import KYCProfileFactory, UBODeclarationFactory, PEPDeclarationFactory
+
+BASE_RECORDS = [
+    {'external_id': '1', 'name': 'Muhammad Ali Hasan', 'date_of_birth': '1970-05-17', 'aliases': []},
+    {'external_id': '2', 'name': 'Northern Shipping LLC', 'entry_type': 'entity', 'aliases': []},
+]
+
+
+def write_jsonl(path, records):
+    path.write_text('\n'.join(json.dumps(record) for record in records) + '\n')
+    return path
+
+
+@pytest.fixture
+def source(db):
+    index.reset_index()
+    yield WatchlistSource.objects.create(code='ofac-sdn', name='OFAC SDN')
+    index.reset_index()
+
+
+@pytest.fixture
+def customers(db):
+    """Perfis com titular, UBO e PEP relacionado já indexados"""
+    volkov = KYCProfileFactory(full_name='Ivan Petrovich Volkov')
+    other = KYCProfileFactory(full_name='Maria Fernanda Costa')
+    ubo = UBODeclarationFactory(kyc_profile=other, full_name='Olga Smirnova')
+    PEPDeclarationFactory(kyc_profile=other, related_pep_name='Sergei Ivanov')
+    rebuild_customer_index(batch_size=1)
+    return {'volkov': volkov, 'other': other, 'ubo': ubo}
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestCustomerIndex:
+    """Testes para o índice invertido de nomes de clientes"""
+    
+    def test_rebuild_indexes_every_subject(self, customers):
+        assert CustomerName.objects.count() == 4
+        assert set(CustomerName.objects.values_list('subject_type', flat=True)) == {
+            'profile', 'ubo', 'related_pep'
+        }
+    
+    def test_candidates_share_search_keys(self, customers):
+        assert 'Ivan Petrovich Volkov' in [name.name for name in candidate_names('ivan volkov')]
+        assert 'Olga Smirnova' in [name.name for name in candidate_names('olga smirnowa')]
+        assert candidate_names('bob') == []
+    
+    def test_frequent_ngrams_ignored(self, customers):
+        """Com o limite de n-gramas só tokens e chaves fonéticas contam"""
+        assert {'Sergei Ivanov', 'Ivan Petrovich Volkov'} <= {name.name for name in candidate_names('ivanov')}
+        assert [name.name for name in candidate_names('ivanov', max_ngram_postings=0)] == ['Sergei Ivanov']
+    
+    def test_command_rebuilds_index(self, customers):
+        CustomerName.objects.all().delete()
+        out = StringIO()
+        
+        call_command('index_customer_names', '--batch-size', '1', stdout=out)
+        
+        assert CustomerName.objects.count() == 4
+        assert '2 perfis indexados' in out.getvalue()
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestRescreenLoad:
+    """Testes para a retriagem incremental após uma carga de lista"""
+    
+    def test_new_entries_matched_against_customers(self, source, customers, tmp_path):
+        load_watchlist(source, write_jsonl(tmp_path / 'v1.jsonl', BASE_RECORDS))
+        load = load_watchlist(source, write_jsonl(tmp_path / 'v2.jsonl', BASE_RECORDS + [
+            {'external_id': '3', 'name': 'Ivan Volkov', 'aliases': []},
+            {'external_id': '4', 'name': 'Olga Ivanova Smirnova', 'aliases': ['Olga Smirnova']},
+        ]))
+        
+        assert rescreen_load(load) == 2
+        
+        load.refresh_from_db()
+        assert load.rescreened_at is not None
+        volkov_hits = ScreeningHit.objects.filter(kyc_profile=customers['volkov'])
+        assert '3' in volkov_hits.values_list('entry__external_id', flat=True)
+        hit = ScreeningHit.objects.get(kyc_profile=customers['other'], subject_type='ubo')
+        assert hit.subject_id == str(customers['ubo'].pk)
+        assert hit.entry.external_id == '4'
+    
+    def test_only_changed_entries_are_matched(self, source, customers, tmp_path, mocker):
+        load_watchlist(source, write_jsonl(tmp_path / 'v1.jsonl', BASE_RECORDS))
+        load = load_watchlist(source, write_jsonl(tmp_path / 'v2.jsonl', BASE_RECORDS + [
+            {'external_id': '3', 'name': 'Ivan Volkov', 'aliases': ['Ivan Wolkow']},
+        ]))
+        spy = mocker.spy(rescreening, 'candidate_names')
+        
+        rescreen_load(load)
+        
+        assert sorted(call.args[0] for call in spy.call_args_list) == ['ivan volkov', 'ivan wolkow']
+    
+    def test_removed_entry_clears_open_hits_and_keeps_reviewed(self, source, customers, tmp_path):
+        records = BASE_RECORDS + [
+            {'external_id': '3', 'name': 'Ivan Volkov', 'aliases': []},
+            {'external_id': '4', 'name': 'Olga Smirnova', 'aliases': []},
+        ]
+        rescreen_load(load_watchlist(source, write_jsonl(tmp_path / 'v1.jsonl', records)))
+        ScreeningHit.objects.filter(kyc_profile=customers['other']).update(status='dismissed')
+        
+        load = load_watchlist(source, write_jsonl(tmp_path / 'v2.jsonl', BASE_RECORDS))
+        assert load.deactivated_count == 2
+        rescreen_load(load)
+        
+        assert not ScreeningHit.objects.filter(kyc_profile=customers['volkov']).exists()
+        assert set(ScreeningHit.objects.filter(kyc_profile=customers['other']).values_list('status', flat=True)) == {
+            'dismissed'
+        }
+    
+    def test_customer_name_contained_in_entry_keeps_hit(self, source, customers, tmp_path):
+        """Nome do cliente contido no da entrada: a retriagem mantém o hit da triagem ao salvar"""
+        record = {'external_id': '5', 'name': 'Mohammed Ali Hassan Tikriti', 'aliases': []}
+        load_watchlist(source, write_jsonl(tmp_path / 'v1.jsonl', BASE_RECORDS + [record]))
+        profile = KYCProfileFactory(full_name='Mohammed Hassan')
+        screen_profile(profile, force=True)
+        assert ScreeningHit.objects.get(kyc_profile=profile).entry.external_id == '5'
+        assert 'Mohammed Hassan' in [name.name for name in candidate_names('mohammed ali hassan tikriti')]
+        
+        load = load_watchlist(source, write_jsonl(tmp_path / 'v2.jsonl', BASE_RECORDS + [
+            dict(record, remarks='Updated designation'),
+        ]))
+        rescreen_load(load)
+        
+        hit = ScreeningHit.objects.get(kyc_profile=profile)
+        assert (hit.entry.external_id, hit.status) == ('5', 'open')
+    
+    def test_failed_load_publishes_committed_batches(self, source, customers, tmp_path, mocker,
+                                                     django_capture_on_commit_callbacks):
+        """Lotes gravados antes do erro são indexados e retriados (a próxima carga os vê sem mudança)"""
+        load_watchlist(source, write_jsonl(tmp_path / 'v1.jsonl', BASE_RECORDS))
+        path = write_jsonl(tmp_path / 'v2.jsonl', BASE_RECORDS + [
+            {'external_id': '3', 'name': 'Ivan Volkov', 'aliases': []},
+            {'name': 'Record Without Id'},
+        ])
+        publish = mocker.spy(index, 'publish_index_change')
+        delay = mocker.patch('apps.screening.tasks.rescreen_watchlist_load.delay')
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            with pytest.raises(WatchlistFormatError):
+                load_watchlist(source, path, batch_size=1)
+        
+        failed = WatchlistLoad.objects.get(status='failed')
+        assert failed.created_count == 1
+        publish.assert_called_once_with()
+        delay.assert_called_once_with(failed.pk)
+        rescreen_load(failed)
+        assert ScreeningHit.objects.get(kyc_profile=customers['volkov']).entry.external_id == '3'
+    
+    def test_rescreening_matches_on_save_screening(self, source, tmp_path):
+        """A retriagem de uma carga encontra os mesmos pares que a triagem de cada cliente"""
+        profiles = [
+            KYCProfileFactory(full_name=name)
+            for name in ['Jon Smith', 'Mohamad Hassan', 'Katherine Zeta', 'Olga Smirnova', 'Maria Costa']
+        ]
+        rebuild_customer_index()
+        load = load_watchlist(source, write_jsonl(tmp_path / 'v1.jsonl', BASE_RECORDS + [
+            {'external_id': '5', 'name': 'John Smith', 'aliases': []},
+            {'external_id': '6', 'name': 'Mohammed Ali Hassan Tikriti', 'aliases': ['Muhammad Hasan']},
+            {'external_id': '7', 'name': 'Catherine Zeta Jones', 'aliases': []},
+            {'external_id': '8', 'name': 'Olga Ivanova Smirnowa', 'aliases': []},
+        ]))
+        expected = {
+            profile.pk: {
+                match.entry.external_id
+                for match in screen_name(profile.full_name, profile.date_of_birth, profile.nationality)
+            }
+            for profile in profiles
+        }
+        
+        rescreen_load(load)
+        
+        hits = {
+            profile.pk: set(
+                ScreeningHit.objects.filter(kyc_profile=profile).values_list('entry__external_id', flat=True)
+            )
+            for profile in profiles
+        }
+        assert hits == expected
+        assert expected[profiles[0].pk] == {'5'}
+    
+    def test_rescreening_published_only_when_list_changed(self, source, customers, tmp_path, mocker,
+                                                          django_capture_on_commit_callbacks):
+        delay = mocker.patch('apps.screening.tasks.rescreen_watchlist_load.delay')
+        path = write_jsonl(tmp_path / 'v1.jsonl', BASE_RECORDS)
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            first = load_watchlist(source, path)
+            assert request_load_rescreening(first) is True
+            assert request_load_rescreening(load_watchlist(source, path)) is False
+        
+        delay.assert_called_once_with(first.pk)
@@ -0,0 +1,66 @@
+"""
+Testes para a pontuação em lote (score_matrix)
+"""
+
+import random
+import pytest
+from io import StringIO
+from django.core.management import call_command
+
+from apps.screening import scoring
+from apps.screening.management.commands.benchmark_screening import synthetic_people
+
+NAMES = [
+    'muhammad ali hasan', 'mohammed ali hassan', 'hasan ali muhammad', 'ivan petrovich volkov',
+    'ivan volkov', 'johann wolkow', 'olga smirnova', 'a', 'xu', 'maria fernanda costa',
+]
+
+
+@pytest.mark.unit
+class TestScoreMatrix:
+    """Testes para scoring.score_matrix"""
+    
+    def test_jaro_winkler_batch_matches_scalar(self):
+        left = [a for a in NAMES for b in NAMES]
+        right = [b for a in NAMES for b in NAMES]
+        
+        batch = scoring.jaro_winkler_batch(left, right)
+        
+        assert list(batch) == pytest.approx([scoring.jaro_winkler(a, b) for a, b in zip(left, right)])
+    
+    def test_matrix_cells_equal_score_pair(self):
+        names, dobs, years, nationalities = synthetic_people(random.Random(1), 15)
+        names, dobs, years, nationalities = names + NAMES, dobs + [0] * 10, years + [0] * 10, nationalities + [''] * 10
+        candidates, candidate_dobs, candidate_years, candidate_nationalities = synthetic_people(random.Random(2), 40)
+        
+        matrix = scoring.score_matrix(
+            names, candidates,
+            query_dobs=dobs, candidate_dobs=candidate_dobs,
+            query_years=years, candidate_years=candidate_years,
+            query_nationalities=nationalities, candidate_nationalities=candidate_nationalities,
+        )
+        
+        assert matrix.shape == (25, 40)
+        for row in range(25):
+            for column in range(40):
+                assert matrix.pair(row, column) == scoring.score_pair(
+                    names[row], candidates[column],
+                    query_dob=dobs[row], entry_dob=candidate_dobs[column],
+                    query_year=years[row], entry_year=candidate_years[column],
+                    query_nationality=nationalities[row], entry_nationality=candidate_nationalities[column],
+                )
+    
+    def test_unknown_components_are_nan(self):
+        matrix = scoring.score_matrix(['ivan volkov'], ['ivan volkov'])
+        
+        match = matrix.pair(0, 0)
+        assert (match.score, match.dob, match.nationality) == (1.0, None, None)
+    
+    def test_benchmark_command_reports_throughput(self):
+        out = StringIO()
+        
+        call_command('benchmark_screening', '--queries', '3', '--candidates', '20', '--scalar-pairs', '10',
+                     stdout=out)
+        
+        assert '3×20 = 60 pares' in out.getvalue()
+        assert 'score_pair: 10 pares' in out.getvalue()
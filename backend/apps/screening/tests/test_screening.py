@@ -0,0 +1,152 @@
+"""
+Testes para a triagem de perfis KYC ao salvar
+"""
+
+import pytest
+from datetime import date
+
+from apps.kyc.models import KYCProfile
+from apps.screening import index, services
+from apps.screening.models import WatchlistSource, WatchlistEntry, ScreeningHit, ProfileScreening
+from apps.screening.services import screen_profile, store_hits
+from apps.screening.tasks import screen_kyc_profile
+from conftest import KYCProfileFactory, UBODeclarationFactory, PEPDeclarationFactory
+
+
+@pytest.fixture
+def watchlist(db):
+    source = WatchlistSource.objects.create(code='ofac-sdn', name='OFAC SDN')
+    entries = {
+        'hasan': WatchlistEntry.objects.create(
+            source=source, external_id='1', name='Muhammad Ali Hasan',
+            date_of_birth=date(1970, 5, 17), nationality='Syria'
+        ),
+        'volkov': WatchlistEntry.objects.create(
+            source=source, external_id='2', name='Ivan Petrovich Volkov'
+        ),
+    }
+    index.reset_index()
+    yield entries
+    index.reset_index()
+
+
+@pytest.fixture
+def locmem_cache(settings):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestScreenProfile:
+    """Testes para screen_profile"""
+    
+    def test_profile_ubo_and_related_pep_are_screened(self, watchlist):
+        profile = KYCProfileFactory(full_name='Mohammed Ali Hassan', date_of_birth=date(1970, 5, 17),
+                                    nationality='Syria')
+        ubo = UBODeclarationFactory(kyc_profile=profile, full_name='Ivan P. Volkov')
+        pep = PEPDeclarationFactory(kyc_profile=profile, related_pep_name='Ivan Petrovich Volkov')
+        
+        assert screen_profile(profile) == 3
+        
+        hits = {(hit.subject_type, hit.subject_id, hit.entry_id) for hit in profile.screening_hits.all()}
+        assert hits == {
+            ('profile', str(profile.pk), watchlist['hasan'].pk),
+            ('ubo', str(ubo.pk), watchlist['volkov'].pk),
+            ('related_pep', str(pep.pk), watchlist['volkov'].pk),
+        }
+        assert ProfileScreening.objects.get(kyc_profile=profile).hit_count == 3
+    
+    def test_unchanged_subjects_are_not_screened_again(self, watchlist, mocker):
+        profile = KYCProfileFactory(full_name='Mohammed Ali Hassan')
+        screen_profile(profile)
+        
+        search = mocker.patch('apps.screening.services.screen_name')
+        assert screen_profile(profile) is None
+        search.assert_not_called()
+        
+        screen_profile(profile, force=True)
+        search.assert_called_once()
+    
+    def test_stale_open_hits_removed_and_reviewed_hits_kept(self, watchlist):
+        profile = KYCProfileFactory(full_name='Ivan Petrovich Volkov')
+        UBODeclarationFactory(kyc_profile=profile, full_name='Ivan Volkov')
+        assert screen_profile(profile) == 2
+        ubo_hit = profile.screening_hits.get(subject_type='ubo')
+        ubo_hit.status = 'dismissed'
+        ubo_hit.save()
+        
+        profile.full_name = 'Maria Fernanda Costa'
+        profile.save()
+        screen_profile(profile)
+        
+        hits = list(profile.screening_hits.all())
+        assert [hit.subject_type for hit in hits] == ['ubo']
+        assert hits[0].status == 'dismissed'
+    
+    def test_overlapping_run_screens_data_committed_before_its_lock(self, watchlist, mocker):
+        profile = KYCProfileFactory(full_name='Maria Fernanda Costa')
+        stale = KYCProfile.objects.get(pk=profile.pk)
+        lock = services.lock_profile_screening
+        
+        def commit_concurrent_change(locked_profile):
+            # Outra execução gravou e liberou o lock enquanto esta esperava
+            patched.side_effect = lock
+            KYCProfile.objects.filter(pk=profile.pk).update(full_name='Ivan Petrovich Volkov')
+            screen_profile(KYCProfile.objects.get(pk=profile.pk))
+            return lock(locked_profile)
+        
+        patched = mocker.patch(
+            'apps.screening.services.lock_profile_screening', side_effect=commit_concurrent_change
+        )
+        
+        assert screen_profile(stale) is None
+        hits = list(profile.screening_hits.values_list('subject_name', 'entry_id'))
+        assert hits == [('Ivan Petrovich Volkov', watchlist['volkov'].pk)]
+    
+    def test_rescreened_profile_still_gets_first_screening(self, watchlist):
+        profile = KYCProfileFactory(full_name='Ivan Petrovich Volkov')
+        store_hits(profile, [])
+        
+        assert ProfileScreening.objects.get(kyc_profile=profile).subjects_hash == ''
+        assert screen_profile(profile) == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestScreeningSignals:
+    """Testes para o agendamento da triagem ao salvar"""
+    
+    def test_burst_of_changes_schedules_one_screening(self, watchlist, locmem_cache, mocker,
+                                                      django_capture_on_commit_callbacks):
+        apply_async = mocker.patch('apps.screening.tasks.screen_kyc_profile.apply_async')
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            profile = KYCProfileFactory(full_name='Mohammed Ali Hassan')
+            UBODeclarationFactory.create_batch(3, kyc_profile=profile)
+            PEPDeclarationFactory(kyc_profile=profile, related_pep_name='Ivan Volkov')
+        
+        apply_async.assert_called_once_with(args=[str(profile.pk)], countdown=10)
+    
+    def test_task_clears_pending_mark_and_stores_hits(self, watchlist, locmem_cache, mocker,
+                                                      django_capture_on_commit_callbacks):
+        apply_async = mocker.patch('apps.screening.tasks.screen_kyc_profile.apply_async')
+        with django_capture_on_commit_callbacks(execute=True):
+            profile = KYCProfileFactory(full_name='Ivan Petrovich Volkov')
+        
+        screen_kyc_profile(str(profile.pk))
+        assert ScreeningHit.objects.filter(kyc_profile=profile).count() == 1
+        
+        # Nova alteração após a execução agenda outra triagem
+        with django_capture_on_commit_callbacks(execute=True):
+            profile.full_name = 'Maria Fernanda Costa'
+            profile.save()
+        assert apply_async.call_count == 2
+    
+    def test_partial_save_without_screened_fields_is_ignored(self, watchlist, mocker,
+                                                             django_capture_on_commit_callbacks):
+        profile = KYCProfileFactory()
+        request = mocker.patch('apps.screening.signals.request_profile_screening')
+        
+        profile.status = 'under_review'
+        profile.save(update_fields=['status'])
+        request.assert_not_called()
@@ -0,0 +1,102 @@
+"""
+Testes para o índice de listas e screen_name
+"""
+
+import pytest
+from datetime import date
+
+from apps.screening import index
+from apps.screening.models import WatchlistSource, WatchlistEntry, WatchlistAlias
+from apps.screening.names import normalize_name, phonetic_key
+from apps.screening.services import screen_name
+
+
+@pytest.fixture
+def watchlist(db):
+    """Lista pequena com homônimos, aliases e entradas inativas"""
+    source = WatchlistSource.objects.create(code='ofac-sdn', name='OFAC SDN', version='2026-10-01')
+    entries = {
+        'hasan': WatchlistEntry.objects.create(
+            source=source, external_id='1001', name='Muhammad Ali Hasan',
+            date_of_birth=date(1970, 5, 17), nationality='Syria'
+        ),
+        'hassan_younger': WatchlistEntry.objects.create(
+            source=source, external_id='1002', name='Mohamed Ali Hassan',
+            birth_year=1991, nationality='Egypt'
+        ),
+        'volkov': WatchlistEntry.objects.create(
+            source=source, external_id='1003', name='Ivan Petrovich Volkov', nationality='Russia'
+        ),
+        'inactive': WatchlistEntry.objects.create(
+            source=source, external_id='1004', name='Carlos Alberto Mendes', is_active=False
+        ),
+    }
+    WatchlistAlias.objects.create(entry=entries['volkov'], name='Johann Wolkow')
+    index.reset_index()
+    yield entries
+    index.reset_index()
+
+
+@pytest.mark.unit
+class TestNames:
+    """Testes para normalização e chaves de nomes"""
+    
+    def test_normalize_name(self):
+        assert normalize_name('Dr. José  Álvarez-Núñez, Jr.') == 'jose alvarez nunez'
+    
+    def test_phonetic_variants_share_key(self):
+        assert len({phonetic_key(name) for name in ['mohammed', 'muhammad', 'mohamad']}) == 1
+        assert phonetic_key('catherine') == phonetic_key('kathryn')
+        assert phonetic_key('yusuf') == phonetic_key('youssef')
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestScreenName:
+    """Testes para screen_name"""
+    
+    def test_spelling_variants_match(self, watchlist):
+        candidates = screen_name('Mohammed Ali Hassan')
+        
+        assert {candidate.entry for candidate in candidates} == {
+            watchlist['hasan'], watchlist['hassan_younger']
+        }
+        assert all(candidate.dob_score is None for candidate in candidates)
+    
+    def test_dob_and_nationality_rank_candidates(self, watchlist):
+        candidates = screen_name(
+            'Mohammed Ali Hassan', dob=date(1970, 5, 17), nationality='Syria', threshold=0.5
+        )
+        
+        assert [candidate.entry for candidate in candidates[:2]] == [
+            watchlist['hasan'], watchlist['hassan_younger']
+        ]
+        assert candidates[0].dob_score == 1.0
+        assert candidates[0].nationality_match is True
+        assert candidates[1].dob_score == 0.0
+        assert candidates[1].nationality_match is False
+    
+    def test_token_order_and_alias(self, watchlist):
+        candidates = screen_name('Wolkow, Johann')
+        
+        assert candidates[0].entry == watchlist['volkov']
+        assert candidates[0].matched_name == 'johann wolkow'
+    
+    def test_inactive_and_unrelated_names(self, watchlist):
+        assert screen_name('Carlos Alberto Mendes') == []
+        assert screen_name('Maria Fernanda Souza') == []
+    
+    def test_index_rebuild_picks_up_changes(self, watchlist):
+        assert screen_name('Carlos Alberto Mendes') == []
+        WatchlistEntry.objects.filter(pk=watchlist['inactive'].pk).update(is_active=True)
+        
+        index.rebuild_index()
+        
+        assert screen_name('Carlos Alberto Mendes')[0].entry == watchlist['inactive']
+    
+    def test_index_is_compact(self, watchlist):
+        watchlist_index = index.get_index()
+        
+        assert len(watchlist_index) == 3
+        assert len(watchlist_index.names) == 4
+        assert all(postings.dtype.name == 'uint32' for postings in watchlist_index._postings.values())
@@ -9,7 +9,7 @@ from . import views
 app_name = 'screening'
 
 router = DefaultRouter()
-# router.register(r'example', views.ExampleViewSet)
+router.register(r'hits', views.ScreeningHitViewSet, basename='screeninghit')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -5,7 +5,22 @@ Views do app screening
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
+from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import render
 
+from .models import ScreeningHit
+from .serializers import ScreeningHitSerializer
 
-# Adicione suas views aqui
+
+class ScreeningHitViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Hits de screening para análise de compliance
+    Restrito à equipe: o titular não pode saber que foi sinalizado.
+    """
+    
+    serializer_class = ScreeningHitSerializer
+    permission_classes = [IsAdminUser]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['kyc_profile', 'status', 'subject_type']
+    queryset = ScreeningHit.objects.select_related('entry__source')
@@ -5,6 +5,7 @@ Este arquivo contém configurações comuns a todos os ambientes.
 
 import os
 from pathlib import Path
+from celery.schedules import crontab
 from dynaconf import settings as dynaconf_settings
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -59,7 +60,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'apps.core.middleware.RequestLoggingMiddleware',
+    'apps.core.middleware.RequestMetricsMiddleware',
     'apps.core.middleware.DatabaseHealthMiddleware',
     'apps.core.middleware.ErrorHandlingMiddleware',
 ]
@@ -180,6 +181,13 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+# Tarefas periódicas padrão (sincronizadas pelo DatabaseScheduler na inicialização do beat)
+CELERY_BEAT_SCHEDULE = {
+    'kyc-archive-cold-documents': {
+        'task': 'apps.kyc.tasks.archive_cold_documents',
+        'schedule': crontab(hour=3, minute=30),
+    },
+}
 
 # Security Settings
 SECURE_BROWSER_XSS_FILTER = True
@@ -273,6 +281,96 @@ CACHES = {
     }
 }
 
+# Circuit breaker do banco (DatabaseHealthMiddleware)
+DATABASE_CIRCUIT_BREAKER = {
+    'FAILURE_THRESHOLD': dynaconf_settings.get('DB_CIRCUIT_FAILURE_THRESHOLD', 3),
+    'SUCCESS_THRESHOLD': dynaconf_settings.get('DB_CIRCUIT_SUCCESS_THRESHOLD', 2),
+    'PROBE_INTERVAL': dynaconf_settings.get('DB_CIRCUIT_PROBE_INTERVAL', 5.0),
+}
+
+# Health check detalhado (/health/): TTL do relatório e timeout por probe
+HEALTH_CHECK = {
+    'CACHE_TTL': dynaconf_settings.get('HEALTH_CHECK_CACHE_TTL', 10.0),
+    'PROBE_TIMEOUT': dynaconf_settings.get('HEALTH_CHECK_PROBE_TIMEOUT', 2.0),
+}
+
+# Readiness (/ready/): intervalo (s) de nova verificação enquanto há migrações pendentes
+READINESS_RECHECK_INTERVAL = dynaconf_settings.get('READINESS_RECHECK_INTERVAL', 5.0)
+
+# Métricas de requisições (RequestMetricsMiddleware, /metrics/)
+REQUEST_METRICS = {
+    # Fração das requisições com linha INFO no log (lentas sempre são registradas)
+    'LOG_SAMPLE_RATE': dynaconf_settings.get('REQUEST_LOG_SAMPLE_RATE', 0.01),
+    'SLOW_REQUEST_THRESHOLD': dynaconf_settings.get('SLOW_REQUEST_THRESHOLD', 2.0),
+    # /metrics/ exige "Authorization: Bearer <token>"; vazio só é aceito com DEBUG
+    'TOKEN': dynaconf_settings.get('METRICS_TOKEN', ''),
+}
+
+# Documentos KYC: tamanho máximo (bytes) e upload retomável em partes
+KYC_DOCUMENT_MAX_SIZE = dynaconf_settings.get('MAX_FILE_SIZE', 10 * 1024 * 1024)
+# Máximo de arquivos por upload em lote (/profiles/{id}/documents/batch/)
+KYC_BATCH_UPLOAD_MAX_FILES = dynaconf_settings.get('KYC_BATCH_UPLOAD_MAX_FILES', 10)
+# Storage endereçado por conteúdo (blobs por SHA-256 com contagem de referências)
+# com camada fria comprimida para documentos de perfis encerrados
+KYC_DOCUMENT_STORAGE = 'apps.kyc.storage.TieredStorage'
+KYC_STORAGE_TIERING = {
+    'COLD_ROOT': dynaconf_settings.get('KYC_COLD_STORAGE_ROOT') or str(BASE_DIR / 'cold_storage'),
+    # Documentos de perfis aprovados/rejeitados há mais de N dias vão para a camada fria
+    'ARCHIVE_AFTER_DAYS': dynaconf_settings.get('KYC_ARCHIVE_AFTER_DAYS', 90),
+    'HOT_CACHE_TTL': dynaconf_settings.get('KYC_ARCHIVE_HOT_CACHE_TTL', 7 * 24 * 60 * 60),
+    'COMPRESSION_LEVEL': 6,
+    'BATCH_SIZE': 500,
+}
+KYC_UPLOAD = {
+    # Arquivos parciais das sessões de upload (mesmo filesystem do MEDIA_ROOT)
+    'STAGING_DIR': dynaconf_settings.get('KYC_UPLOAD_STAGING_DIR', str(MEDIA_ROOT / 'kyc_uploads')),
+    'READ_CHUNK_SIZE': dynaconf_settings.get('KYC_UPLOAD_READ_CHUNK_SIZE', 64 * 1024),
+    'SESSION_TTL': dynaconf_settings.get('KYC_UPLOAD_SESSION_TTL', 24 * 60 * 60),
+}
+
+# Download de documentos: prefixo da location interna do nginx (X-Accel-Redirect)
+# apontando para o MEDIA_ROOT; vazio faz o Django transmitir o arquivo em blocos
+KYC_DOWNLOAD = {
+    'ACCEL_REDIRECT_PREFIX': dynaconf_settings.get('KYC_DOWNLOAD_ACCEL_PREFIX', ''),
+    'CHUNK_SIZE': 64 * 1024,
+}
+
+# OCR assíncrono de documentos (apps.kyc.tasks.process_document_ocr)
+KYC_OCR = {
+    # Threads para OCR de páginas de PDF em paralelo (1 desativa o pool)
+    'PAGE_WORKERS': dynaconf_settings.get('KYC_OCR_PAGE_WORKERS', 4),
+    'LANG': dynaconf_settings.get('KYC_OCR_LANG', 'eng'),
+    'LOCK_TIMEOUT': dynaconf_settings.get('KYC_OCR_LOCK_TIMEOUT', 15 * 60),
+}
+
+# Normalização de imagens após o upload (apps.kyc.tasks.normalize_document):
+# orientação, remoção de metadados, redução e recompressão no próprio worker
+KYC_NORMALIZATION = {
+    'ENABLED': dynaconf_settings.get('KYC_NORMALIZATION_ENABLED', False),
+    'MAX_DIMENSION': dynaconf_settings.get('KYC_NORMALIZATION_MAX_DIMENSION', 2480),
+    'JPEG_QUALITY': dynaconf_settings.get('KYC_NORMALIZATION_JPEG_QUALITY', 85),
+    # Tipos de documento que exigem o arquivo original (ex.: ['passport', 'national_id'])
+    'KEEP_ORIGINAL_TYPES': dynaconf_settings.get('KYC_NORMALIZATION_KEEP_ORIGINAL_TYPES', []),
+}
+
+# Screening contra listas (apps.screening): índice em memória por processo
+SCREENING = {
+    'MATCH_THRESHOLD': dynaconf_settings.get('SCREENING_MATCH_THRESHOLD', 0.8),
+    'MAX_RESULTS': 10,
+    'CANDIDATE_POOL': dynaconf_settings.get('SCREENING_CANDIDATE_POOL', 200),
+    'MAX_NGRAM_POSTINGS': 20000,
+    'INDEX_CHECK_INTERVAL': 30,
+    'LOAD_BATCH_SIZE': dynaconf_settings.get('SCREENING_LOAD_BATCH_SIZE', 2000),
+    # Triagem após alterações no perfil: espera para coalescer rajadas de edições
+    'DEBOUNCE_SECONDS': dynaconf_settings.get('SCREENING_DEBOUNCE_SECONDS', 10),
+    'PENDING_TTL': 300,
+    # Retriagem da base quando uma lista muda: entradas alteradas por lote
+    'RESCREEN_BATCH_SIZE': dynaconf_settings.get('SCREENING_RESCREEN_BATCH_SIZE', 500),
+}
+
+# Resumo PEP cacheado (segundos; 0 desativa). Invalidado a cada escrita em PEPDeclaration
+KYC_PEP_SUMMARY_CACHE_TIMEOUT = dynaconf_settings.get('KYC_PEP_SUMMARY_CACHE_TIMEOUT', 60)
+
 # Internationalization
 LANGUAGES = [
     ('en', 'English'),
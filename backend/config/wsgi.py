@@ -22,3 +22,11 @@ else:
 
 application = get_wsgi_application()
 
+# Calcular readiness (plano de migrações) uma vez no startup do servidor
+from apps.core.readiness import warm_up  # noqa: E402
+
+try:
+    warm_up()
+except Exception:
+    # Não impedir o boot; /ready/ reporta o erro e tenta novamente
+    pass